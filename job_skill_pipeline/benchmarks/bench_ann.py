@@ -0,0 +1,65 @@
+# bench_ann.py
+"""Recall@k and latency of the ANN taxonomy backends versus exact brute force."""
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import argparse
+import json
+import random
+
+from nlp.ann_index import HNSWIndex, IVFIndex, hnswlib, recall_report
+from nlp.normalize_skills import SkillNormalizer
+from nlp.taxonomy_loader import TaxonomyLoader
+
+
+def sample_queries(skill_texts, n, seed=0):
+    """Perturbed taxonomy labels (lowercased, one word dropped) as stand-in extracted skills."""
+    rng = random.Random(seed)
+    queries = []
+    for text in rng.sample(skill_texts, min(n, len(skill_texts))):
+        words = text.lower().split()
+        if len(words) > 2:
+            words.pop(rng.randrange(len(words)))
+        queries.append(" ".join(words))
+    return queries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ANN backends against brute-force taxonomy matching")
+    parser.add_argument("--taxonomy", default="data/SkillsFramework.xlsx")
+    parser.add_argument("--queries", default=None, help="text file with one extracted skill per line (default: perturbed taxonomy labels)")
+    parser.add_argument("--n-queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=1)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32], help="IVF probe counts to sweep")
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128], help="HNSW ef_search values to sweep")
+    args = parser.parse_args()
+
+    taxonomy = TaxonomyLoader(args.taxonomy).load_all()
+    normalizer = SkillNormalizer(taxonomy, ann_backend="brute")
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = sample_queries(normalizer.skill_texts, args.n_queries)
+    query_embeds = normalizer.encode(queries, batch_size=256)
+
+    reports = []
+    ivf = IVFIndex.build(normalizer.embeddings)
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        reports.append({"nprobe": nprobe, **recall_report(ivf, normalizer.embeddings, query_embeds, k=args.k)})
+    if hnswlib is not None:
+        hnsw = HNSWIndex.build(normalizer.embeddings)
+        for ef in args.ef:
+            hnsw.ef_search = ef
+            reports.append({"ef_search": ef, **recall_report(hnsw, normalizer.embeddings, query_embeds, k=args.k)})
+    else:
+        print("hnswlib not installed: skipping HNSW")
+
+    print(f"{len(normalizer.skill_texts)} taxonomy texts, {len(queries)} queries")
+    for report in reports:
+        print(json.dumps(report))
@@ -0,0 +1,69 @@
+# bench_encoder.py
+"""Throughput and embedding drift of the quantized / ONNX encoders versus the PyTorch reference."""
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from bench_ann import sample_queries
+from nlp.ann_index import BruteForceIndex
+from nlp.encoders import export_onnx, load_encoder
+from nlp.normalize_skills import DEFAULT_MODEL
+from nlp.taxonomy_loader import TaxonomyLoader
+
+
+def timed_encode(encoder, texts, batch_size):
+    start = time.perf_counter()
+    vectors = encoder.encode(texts, batch_size=batch_size)
+    return vectors, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark encoder backends on the taxonomy texts")
+    parser.add_argument("--taxonomy", default="data/SkillsFramework.xlsx")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--onnx-path", default="data/models/minilm.onnx")
+    parser.add_argument("--export", action="store_true", help="export the ONNX model first if it does not exist")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--n-queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.export and not os.path.exists(args.onnx_path):
+        export_onnx(args.model, args.onnx_path)
+
+    taxonomy = TaxonomyLoader(args.taxonomy).load_all()
+    texts = sorted(set(
+        s for col in ("skill_nl", "skill_fr", "skill_en") for s in taxonomy[col].fillna("").tolist() if len(s) > 1
+    ))
+    queries = sample_queries(texts, args.n_queries)
+
+    reference = load_encoder(args.model, "torch")
+    ref_vectors, ref_s = timed_encode(reference, texts, args.batch_size)
+    ref_matches = BruteForceIndex(ref_vectors).search(reference.encode(queries, batch_size=args.batch_size))[0][:, 0]
+    print(f"{len(texts)} taxonomy texts, {len(queries)} queries")
+    print(json.dumps({"backend": "torch", "sentences_per_s": len(texts) / ref_s}))
+
+    for backend in ("quantized", "onnx"):
+        encoder = load_encoder(args.model, backend, onnx_path=args.onnx_path)
+        if encoder.backend != backend:
+            continue
+        vectors, seconds = timed_encode(encoder, texts, args.batch_size)
+        cosine = (vectors * ref_vectors).sum(axis=1)
+        matches = BruteForceIndex(vectors).search(encoder.encode(queries, batch_size=args.batch_size))[0][:, 0]
+        print(json.dumps({
+            "backend": backend,
+            "sentences_per_s": len(texts) / seconds,
+            "speedup": ref_s / seconds,
+            "mean_cosine_to_torch": float(cosine.mean()),
+            "min_cosine_to_torch": float(cosine.min()),
+            "match_agreement": float((matches == ref_matches).mean()),
+        }))
@@ -0,0 +1,108 @@
+# bench_extraction.py
+"""Extraction throughput against the local mock LLM: jobs/sec, per-posting latency percentiles and retries."""
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from nlp.metrics import MetricsSink
+from nlp.mock_llm import add_mock_arguments, server_from_args
+from nlp.skill_extractor import SkillExtractor
+from nlp.text_reducer import TextReducer
+
+
+def load_postings(path, repeat, reduce_text, token_budget):
+    with open(path, encoding="utf-8") as f:
+        jobs = json.load(f)
+    reducer = TextReducer(max_tokens=token_budget)
+    postings = []
+    for _ in range(repeat):
+        for job in jobs:
+            text = reducer.reduce(job).text if reduce_text else reducer.original_text(job)
+            postings.append((text, job.get("title", "")))
+    return postings, reducer
+
+
+def run_sync(extractor, postings):
+    latencies, failures = [], 0
+    for text, title in postings:
+        start = time.perf_counter()
+        try:
+            extractor.extract(text, title)
+        except Exception:
+            failures += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, failures
+
+
+async def run_async(extractor, postings):
+    async def timed(text, title):
+        start = time.perf_counter()
+        try:
+            await extractor.aextract(text, title)
+            return time.perf_counter() - start, False
+        except Exception:
+            return time.perf_counter() - start, True
+
+    results = await asyncio.gather(*(timed(text, title) for text, title in postings))
+    return [r[0] for r in results], sum(r[1] for r in results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay scraped postings through SkillExtractor against the mock LLM")
+    parser.add_argument("--input", default="../data_scrapping/vdab_jobs_playwright_preview_New5.json")
+    parser.add_argument("--repeat", type=int, default=5, help="replay the corpus this many times")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight (1 = the synchronous extract loop)")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--token-budget", type=int, default=1000)
+    parser.add_argument("--no-reduce", action="store_true", help="send whole descriptions instead of the reduced text")
+    parser.add_argument("--hedge", action="store_true", help="hedge slow requests with a duplicate to the mock")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    postings, reducer = load_postings(args.input, args.repeat, not args.no_reduce, args.token_budget)
+    with server_from_args(args) as server:
+        extractor = SkillExtractor(
+            provider="mock",
+            model_name="mock",
+            max_retries=args.retries,
+            max_in_flight=args.concurrency,
+            base_url=server.url,
+            hedge=args.hedge,
+            hedge_provider="mock",
+            metrics=MetricsSink(),  # in memory: its retry count excludes hedged duplicates
+        )
+        start = time.perf_counter()
+        if args.concurrency > 1:
+            latencies, failures = asyncio.run(run_async(extractor, postings))
+        else:
+            latencies, failures = run_sync(extractor, postings)
+        elapsed = time.perf_counter() - start
+
+    latencies_ms = 1000 * np.asarray(latencies)
+    print(json.dumps({
+        "postings": len(postings),
+        "concurrency": args.concurrency,
+        "jobs_per_sec": len(postings) / elapsed,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "failures": int(failures),
+        "server_requests": server.stats["requests"],
+        "retries": extractor.metrics.summary()["run"]["retries"],
+        "server_429": server.stats["rate_limited"],
+        "server_500": server.stats["errors"],
+        "limiter": extractor.limiter_stats("mock"),
+        "input_tokens_before": reducer.stats["tokens_before"],
+        "input_tokens_after": reducer.stats["tokens_after"],
+        "connections": extractor.connection_stats(),
+        "hedging": extractor.hedging_stats(),
+    }))
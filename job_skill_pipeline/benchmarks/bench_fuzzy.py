@@ -0,0 +1,67 @@
+# bench_fuzzy.py
+"""Speed and agreement of the indexed fuzzy matcher versus the full SequenceMatcher scan."""
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import argparse
+import json
+import time
+from difflib import SequenceMatcher
+
+from bench_ann import sample_queries
+from nlp.fuzzy_index import FuzzyIndex
+from nlp.language import LANGUAGES
+from nlp.taxonomy_loader import TaxonomyLoader
+
+
+def full_scan(query, labels, threshold):
+    """The original loop in SkillExtractor: score every label, keep the first maximum."""
+    best_match, best_score = None, 0
+    for label in labels:
+        score = SequenceMatcher(None, query.lower(), label.lower()).ratio()
+        if score > best_score:
+            best_score, best_match = score, label
+    return best_match if best_score > threshold else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark indexed fuzzy matching against the full SequenceMatcher scan")
+    parser.add_argument("--taxonomy", default="data/SkillsFramework.xlsx")
+    parser.add_argument("--n-queries", type=int, default=300, help="queries per language (the full scan is slow)")
+    parser.add_argument("--threshold", type=float, default=0.75)
+    args = parser.parse_args()
+
+    taxonomy = TaxonomyLoader(args.taxonomy).load_all()
+    for lang in LANGUAGES:
+        labels = taxonomy[f"skill_{lang}"].dropna().astype(str).str.strip().tolist()
+        if not labels:
+            continue
+        queries = sample_queries(labels, args.n_queries)
+
+        start = time.perf_counter()
+        index = FuzzyIndex(labels)
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = [full_scan(q, labels, args.threshold) for q in queries]
+        scan_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        got = [index.best_match(q, args.threshold)[0] for q in queries]
+        index_s = time.perf_counter() - start
+
+        print(json.dumps({
+            "language": lang,
+            "labels": len(labels),
+            "queries": len(queries),
+            "build_ms": 1000 * build_s,
+            "scan_ms_per_query": 1000 * scan_s / len(queries),
+            "index_ms_per_query": 1000 * index_s / len(queries),
+            "speedup": scan_s / index_s,
+            "matched": sum(m is not None for m in expected),
+            "disagreements": sum(a != b for a, b in zip(expected, got)),
+        }))
@@ -0,0 +1,83 @@
+# bench_gazetteer.py
+"""LLM calls avoided and recall lost by hybrid gazetteer extraction, relative to LLM-only extraction."""
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import argparse
+import json
+import time
+
+from nlp.gazetteer import Gazetteer
+from nlp.skill_extractor import SkillExtractor
+from nlp.taxonomy_loader import TaxonomyLoader
+
+TEXT_FIELDS = ("functieomschrijving", "profiel", "professionele_vaardigheden")
+
+
+def posting_text(job):
+    text = "\n".join(str(job[f]) for f in TEXT_FIELDS if job.get(f))
+    return text or str(job.get("full_description") or "")
+
+
+def recall(found, reference):
+    reference = {s.lower() for s in reference}
+    if not reference:
+        return 1.0
+    return len(reference & {s.lower() for s in found}) / len(reference)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report LLM calls avoided and recall delta of hybrid gazetteer extraction")
+    parser.add_argument("--input", default="../data_scrapping/vdab_jobs_playwright_preview_New5.json")
+    parser.add_argument("--taxonomy", default="data/SkillsFramework.xlsx")
+    parser.add_argument("--provider", choices=["auto", "openai", "gemini"], default="auto")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--cache-path", default="data/llm_cache.sqlite", help="LLM answer cache (re-runs cost no LLM calls)")
+    parser.add_argument("--min-uncovered", type=int, nargs="+", default=[0, 10, 20, 30, 50, 80], help="hybrid thresholds to sweep")
+    args = parser.parse_args()
+
+    with open(args.input, encoding="utf-8") as f:
+        jobs = json.load(f)
+    taxonomy = TaxonomyLoader(args.taxonomy).load_all()
+
+    start = time.perf_counter()
+    gazetteer = Gazetteer.from_taxonomy(taxonomy)
+    print(f"{len(gazetteer)} labels, {len(gazetteer.automaton)} automaton states, built in {time.perf_counter() - start:.2f}s")
+
+    # Reference: LLM-only extraction, one call per posting
+    extractor = SkillExtractor(provider=args.provider, model_name=args.model, cache_path=args.cache_path)
+    rows = []
+    scan_s = 0.0
+    for job in jobs:
+        text = posting_text(job)
+        title = job.get("title", "")
+        reference = extractor.extract(text, title)
+        start = time.perf_counter()
+        coverage = gazetteer.coverage(text)
+        scan_s += time.perf_counter() - start
+        local_only = extractor._postprocess(json.dumps(coverage.skills, ensure_ascii=False), text, title)
+        merged = extractor._postprocess(json.dumps(reference, ensure_ascii=False), text, title, extra=coverage.skills)
+        rows.append((coverage, reference, local_only, merged))
+    print(f"gazetteer scan: {1000 * scan_s / max(1, len(rows)):.2f} ms/posting")
+
+    for threshold in args.min_uncovered:
+        llm = [c.uncovered_words >= threshold for c, _, _, _ in rows]
+        recalls = [recall(merged if use_llm else local, ref) for (c, ref, local, merged), use_llm in zip(rows, llm)]
+        extra = sum(
+            len({s.lower() for s in (merged if use_llm else local)} - {s.lower() for s in ref})
+            for (c, ref, local, merged), use_llm in zip(rows, llm)
+        )
+        mean_recall = sum(recalls) / max(1, len(recalls))
+        print(json.dumps({
+            "min_uncovered": threshold,
+            "postings": len(rows),
+            "llm_calls": sum(llm),
+            "llm_calls_avoided": len(rows) - sum(llm),
+            "recall_vs_llm": mean_recall,
+            "recall_delta": mean_recall - 1.0,
+            "skills_added_by_gazetteer": extra,
+        }))
@@ -0,0 +1,62 @@
+# bench_precision.py
+"""Memory, scoring speed and argmax stability of float16 / int8 taxonomy matrices versus float32."""
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from bench_ann import sample_queries
+from nlp.ann_index import BruteForceIndex
+from nlp.normalize_skills import SkillNormalizer
+from nlp.quantization import QuantizedMatrix, matrix_nbytes
+from nlp.taxonomy_loader import TaxonomyLoader
+
+
+def time_search(index, queries, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = index.search(queries, k=1)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark reduced-precision taxonomy matrices")
+    parser.add_argument("--taxonomy", default="data/SkillsFramework.xlsx")
+    parser.add_argument("--n-queries", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.65, help="match threshold used to count accept/reject flips")
+    args = parser.parse_args()
+
+    taxonomy = TaxonomyLoader(args.taxonomy).load_all()
+    normalizer = SkillNormalizer(taxonomy, ann_backend="brute")
+    queries = normalizer.encode(sample_queries(normalizer.skill_texts, args.n_queries), batch_size=256)
+    reference = np.asarray(normalizer.embeddings, dtype=np.float32)
+
+    base_s, (base_idx, base_scores) = time_search(BruteForceIndex(reference), queries, args.repeats)
+    base_accept = base_scores[:, 0] >= args.threshold
+    print(f"{len(normalizer.skill_texts)} taxonomy texts, {queries.shape[0]} queries")
+    print(json.dumps({"precision": "float32", "matrix_mb": matrix_nbytes(reference) / 2**20, "ms": 1000 * base_s}))
+
+    for precision in ("float16", "int8"):
+        matrix = QuantizedMatrix.quantize(reference, precision)
+        seconds, (idx, scores) = time_search(BruteForceIndex(matrix), queries, args.repeats)
+        print(json.dumps({
+            "precision": precision,
+            "matrix_mb": matrix_nbytes(matrix) / 2**20,
+            "memory_saved": 1 - matrix_nbytes(matrix) / matrix_nbytes(reference),
+            "ms": 1000 * seconds,
+            "speedup": base_s / seconds,
+            "argmax_changed": float((idx[:, 0] != base_idx[:, 0]).mean()),
+            "threshold_flips": float(((scores[:, 0] >= args.threshold) != base_accept).mean()),
+            "max_score_error": float(np.abs(scores[:, 0] - base_scores[:, 0]).max()),
+        }))
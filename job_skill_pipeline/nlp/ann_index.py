@@ -0,0 +1,199 @@
+
+"""Nearest-neighbour backends for matching query embeddings against the taxonomy matrix."""
+
+import os
+import time
+from typing import Optional
+
+import numpy as np
+
+from nlp.quantization import matrix_dot
+
+# --- Optional HNSW backend ---
+hnswlib = None
+try:
+    import hnswlib as hnswlib_lib
+    hnswlib = hnswlib_lib
+except Exception:
+    hnswlib = None
+
+# Taxonomies with at least this many texts switch from brute force to an ANN index
+ANN_THRESHOLD = int(os.getenv("SKILL_ANN_THRESHOLD", "20000"))
+
+
+def _top_k_dense(scores: np.ndarray, k: int):
+    """Returns (indices, scores) of the k highest columns per row, best first."""
+    if k == 1:
+        idx = scores.argmax(axis=1)[:, None]
+    else:
+        idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, idx, axis=1), axis=1, kind="stable")
+        idx = np.take_along_axis(idx, order, axis=1)
+    return idx.astype(np.int64, copy=False), np.take_along_axis(scores, idx, axis=1).astype(np.float32, copy=False)
+
+
+class BruteForceIndex:
+    """
+    Exact dot-product search over L2-normalized rows, in query chunks. `matrix` may
+    be a float32 array or a reduced-precision QuantizedMatrix.
+    """
+
+    name = "brute"
+
+    def __init__(self, matrix: np.ndarray, chunk_size: int = 2048):
+        self.matrix = matrix
+        self.chunk_size = chunk_size
+
+    def search(self, queries: np.ndarray, k: int = 1):
+        n = queries.shape[0]
+        k = max(1, min(k, len(self.matrix)))
+        top_idx = np.empty((n, k), dtype=np.int64)
+        top_scores = np.empty((n, k), dtype=np.float32)
+        for start in range(0, n, self.chunk_size):
+            stop = start + self.chunk_size
+            top_idx[start:stop], top_scores[start:stop] = _top_k_dense(matrix_dot(queries[start:stop], self.matrix), k)
+        return top_idx, top_scores
+
+
+class HNSWIndex:
+    """Graph-based ANN index backed by hnswlib (inner-product space)."""
+
+    name = "hnsw"
+    suffix = ".hnsw.bin"
+
+    def __init__(self, index, count: int, ef_search: int = 64):
+        self.index = index
+        self.count = count
+        self.ef_search = ef_search
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, m: int = 16, ef_construction: int = 200, ef_search: int = 64):
+        if hnswlib is None:
+            raise RuntimeError("hnswlib is not installed: pip install hnswlib, or use the 'ivf' backend.")
+        count, dim = matrix.shape
+        index = hnswlib.Index(space="ip", dim=dim)
+        index.init_index(max_elements=count, ef_construction=ef_construction, M=m)
+        index.add_items(np.asarray(matrix, dtype=np.float32), np.arange(count))
+        return cls(index, count, ef_search)
+
+    @classmethod
+    def load(cls, path: str, dim: int, count: int, ef_search: int = 64):
+        if hnswlib is None:
+            raise RuntimeError("hnswlib is not installed: pip install hnswlib, or use the 'ivf' backend.")
+        index = hnswlib.Index(space="ip", dim=dim)
+        index.load_index(path, max_elements=count)
+        return cls(index, count, ef_search)
+
+    def save(self, path: str):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        self.index.save_index(tmp)
+        os.replace(tmp, path)
+
+    def search(self, queries: np.ndarray, k: int = 1):
+        k = max(1, min(k, self.count))
+        self.index.set_ef(max(self.ef_search, k))
+        labels, distances = self.index.knn_query(np.asarray(queries, dtype=np.float32), k=k)
+        # hnswlib's "ip" distance is 1 - dot product
+        return labels.astype(np.int64), (1.0 - distances).astype(np.float32)
+
+
+class IVFIndex:
+    """
+    Inverted-file index in plain numpy: rows are clustered with spherical k-means
+    and a query only scores the rows of its `nprobe` closest clusters.
+    """
+
+    name = "ivf"
+    suffix = ".ivf.npz"
+
+    def __init__(self, matrix: np.ndarray, centroids: np.ndarray, offsets: np.ndarray, ids: np.ndarray, nprobe: int = 8):
+        self.matrix = matrix
+        self.centroids = centroids
+        self.offsets = offsets
+        self.ids = ids
+        self.nprobe = nprobe
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, nlist: Optional[int] = None, iterations: int = 10, nprobe: int = 8, seed: int = 0):
+        count = matrix.shape[0]
+        nlist = nlist or max(1, int(4 * np.sqrt(count)))
+        nlist = min(nlist, count)
+        rng = np.random.default_rng(seed)
+        data = np.asarray(matrix, dtype=np.float32)
+
+        # Train on a bounded sample; every row is assigned to its final cluster afterwards
+        sample = data[rng.choice(count, size=min(count, 64 * nlist), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = BruteForceIndex(centroids).search(sample, k=1)[0][:, 0]
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            filled = norms[:, 0] > 0
+            centroids[filled] = sums[filled] / norms[filled]
+        assign = BruteForceIndex(centroids).search(data, k=1)[0][:, 0]
+
+        ids = np.argsort(assign, kind="stable").astype(np.int64)
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assign, minlength=nlist))
+        return cls(matrix, centroids, offsets, ids, nprobe)
+
+    @classmethod
+    def load(cls, path: str, matrix: np.ndarray, nprobe: int = 8):
+        with np.load(path) as data:
+            return cls(matrix, data["centroids"], data["offsets"], data["ids"], nprobe)
+
+    def save(self, path: str):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, centroids=self.centroids, offsets=self.offsets, ids=self.ids)
+        os.replace(tmp, path)
+
+    def search(self, queries: np.ndarray, k: int = 1):
+        n = queries.shape[0]
+        k = max(1, min(k, len(self.matrix)))
+        nprobe = min(self.nprobe, self.centroids.shape[0])
+        probes = BruteForceIndex(self.centroids).search(queries, k=nprobe)[0]
+
+        top_idx = np.zeros((n, k), dtype=np.int64)
+        top_scores = np.full((n, k), -np.inf, dtype=np.float32)
+        for i in range(n):
+            candidates = np.concatenate([self.ids[self.offsets[c]:self.offsets[c + 1]] for c in probes[i]])
+            if candidates.size == 0:
+                continue
+            scores = (self.matrix[candidates] @ queries[i])[None, :]
+            local_idx, local_scores = _top_k_dense(scores, min(k, candidates.size))
+            top_idx[i, :local_idx.shape[1]] = candidates[local_idx[0]]
+            top_scores[i, :local_scores.shape[1]] = local_scores[0]
+        return top_idx, top_scores
+
+
+def recall_report(index, matrix: np.ndarray, queries: np.ndarray, k: int = 1) -> dict:
+    """
+    Compares `index` against exact brute force on the same queries: recall@k
+    (share of exact top-1 hits found in the index's top-k), top-1 agreement and
+    per-query latency of both, so accuracy can be traded against speed knowingly.
+    """
+    brute = BruteForceIndex(matrix)
+
+    start = time.perf_counter()
+    exact_idx, exact_scores = brute.search(queries, k=1)
+    brute_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ann_idx, ann_scores = index.search(queries, k=k)
+    ann_s = time.perf_counter() - start
+
+    n = max(1, queries.shape[0])
+    hits = (ann_idx == exact_idx).any(axis=1)
+    # A different row with the same score is an equally good answer (duplicate embeddings)
+    ties = np.isclose(ann_scores[:, 0], exact_scores[:, 0], atol=1e-6)
+    return {
+        "backend": index.name,
+        "queries": int(queries.shape[0]),
+        f"recall@{k}": float((hits | ties).mean()) if queries.shape[0] else 1.0,
+        "top1_agreement": float((ann_idx[:, 0] == exact_idx[:, 0]).mean()) if queries.shape[0] else 1.0,
+        "mean_score_loss": float(np.maximum(exact_scores[:, 0] - ann_scores[:, 0], 0).mean()) if queries.shape[0] else 0.0,
+        "brute_ms_per_query": 1000 * brute_s / n,
+        "ann_ms_per_query": 1000 * ann_s / n,
+    }
@@ -0,0 +1,117 @@
+
+"""
+Context-aware audience filtering: drops candidate skills that the posting uses
+as a recipient or audience (e.g. 'communicate with production people').
+"""
+
+import re
+from typing import Iterable, Optional, Set
+
+# Per language: words that introduce an audience (the term follows within five
+# words), and nouns that mark the term right before them as an audience.
+AUDIENCE_PATTERNS = {
+    "en": (
+        r"with|to|for|among|together with|work with|work closely with|communicat(?:e|ing|ed) with|liaise with|coordinate with|report to",
+        r"people|team|department|colleagues|stakeholders|customers|clients",
+    ),
+    # Dutch: 'met', 'naar', 'voor', 'samen met', 'werken met', 'rapporteren aan', 'communiceren met', etc.
+    "nl": (
+        r"met|naar|voor|samen met|werken met|werk samen met|communiceren met|rapporteren aan|contact met|afstemming met",
+        r"mensen|team|afdeling|collega's|belanghebbenden|klanten",
+    ),
+    # French: 'avec', 'pour', 'auprès de', 'travailler avec', 'rapporter à', 'communiquer avec'
+    "fr": (
+        r"avec|pour|auprès de|travailler avec|reporter à|communiquer avec|coordonner avec|prendre contact avec",
+        r"personnes|équipe|département|collègues|parties prenantes|clients",
+    ),
+    # Fallback for any other language: English-like patterns
+    None: (
+        r"with|to|for|among|together with|work with|communicat(?:e|ing|ed) with|report to",
+        r"people|team|department|colleagues|stakeholders|customers|clients",
+    ),
+}
+
+# Up to five whole words between the audience word and the term
+MAX_GAP_WORDS = 5
+
+_SPACE = re.compile(r"\s+")
+_WORD_SPACE = re.compile(r"\w+\s+")
+_WORD_CHAR = re.compile(r"\w")
+
+
+def _compile(triggers: str, nouns: str):
+    # Zero-width alternatives, so overlapping triggers ('werk samen met' / 'samen met') are all found
+    return re.compile(
+        rf"(?=(?P<trigger>\b(?:{triggers})\b))"
+        rf"|(?<=\S)(?=\s+(?:{nouns})\b)"
+    )
+
+
+# Compiled once at import; a posting is then scanned once whatever the number of candidates
+_SCANNERS = {lang: _compile(*patterns) for lang, patterns in AUDIENCE_PATTERNS.items()}
+
+
+def _is_boundary(text: str, i: int) -> bool:
+    """Same test as the regex `\\b` at position i."""
+    before = i > 0 and _WORD_CHAR.match(text[i - 1]) is not None
+    after = i < len(text) and _WORD_CHAR.match(text[i]) is not None
+    return before != after
+
+
+def _term_starts(text: str, end: int, positions: Set[int]):
+    """Positions where a term may start after an audience word ending at `end`."""
+    m = _SPACE.match(text, end)
+    if m is None:
+        return
+    pos = m.end()
+    positions.add(pos)
+    for _ in range(MAX_GAP_WORDS):
+        m = _WORD_SPACE.match(text, pos)
+        if m is None:
+            return
+        pos = m.end()
+        positions.add(pos)
+
+
+def audience_mentions(terms: Iterable[str], text: str, lang: Optional[str]) -> Set[str]:
+    """
+    Returns the terms (lowercased) that `text` uses as an audience.
+
+    The lowercased text is scanned once with the language's precompiled pattern
+    bank, collecting where a term would have to start (after an audience word)
+    or end (before an audience noun). Every candidate is then checked against
+    those positions, instead of running a regex search per candidate.
+    """
+    txt = text.lower()
+    scanner = _SCANNERS.get(lang, _SCANNERS[None])
+    starts: Set[int] = set()
+    ends: Set[int] = set()
+    for m in scanner.finditer(txt):
+        if m.group("trigger") is not None:
+            _term_starts(txt, m.end("trigger"), starts)
+        else:
+            ends.add(m.start())
+
+    flagged = set()
+    if not starts and not ends:
+        return flagged
+    for term in terms:
+        t = term.lower()
+        if t in flagged:
+            continue
+        n = len(t)
+        if any(txt.startswith(t, p) and _is_boundary(txt, p + n) for p in starts):
+            flagged.add(t)
+        elif any(
+            q >= n and txt.startswith(t, q - n) and _is_boundary(txt, q - n) and _is_boundary(txt, q)
+            for q in ends
+        ):
+            flagged.add(t)
+    return flagged
+
+
+def audience_filter(terms: Iterable[str], text: str, lang: Optional[str]) -> list:
+    """Keeps the terms that are not used as an audience in `text`."""
+    terms = list(terms)
+    flagged = audience_mentions(terms, text, lang)
+    return [s for s in terms if s.lower() not in flagged]
@@ -0,0 +1,91 @@
+
+import hashlib
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    On-disk store for taxonomy embeddings.
+
+    Each entry is a `<key>.npy` matrix plus a `<key>.json` sidecar holding the
+    text index. The key hashes the model name and the ordered taxonomy texts,
+    so an entry is only reused while both are unchanged. Matrices are opened
+    memory-mapped, which lets several worker processes share the same pages.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def make_key(model_name: str, texts: List[str]) -> str:
+        h = hashlib.sha256(model_name.encode("utf-8"))
+        for text in texts:
+            h.update(b"\x00")
+            h.update(text.encode("utf-8"))
+        return h.hexdigest()[:32]
+
+    def paths(self, key: str):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".npy", base + ".json"
+
+    def load(self, key: str, expected_count: int) -> Optional[np.ndarray]:
+        """Returns the memory-mapped matrix for `key`, or None on a cache miss."""
+        npy_path, index_path = self.paths(key)
+        if not (os.path.exists(npy_path) and os.path.exists(index_path)):
+            return None
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            matrix = np.load(npy_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if meta.get("count") != expected_count or matrix.shape[0] != expected_count:
+            return None
+        return matrix
+
+    def save(self, key: str, model_name: str, texts: List[str], matrix: np.ndarray) -> np.ndarray:
+        """Writes the entry atomically and returns it re-opened memory-mapped."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        npy_path, index_path = self.paths(key)
+
+        tmp_npy = f"{npy_path}.{os.getpid()}.tmp"
+        with open(tmp_npy, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix))
+        os.replace(tmp_npy, npy_path)
+
+        meta = {
+            "model": model_name,
+            "count": len(texts),
+            "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+            "dtype": str(matrix.dtype),
+            "texts": texts,
+        }
+        tmp_index = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_index, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_index, index_path)
+
+        return np.load(npy_path, mmap_mode="r")
+
+    def load_array(self, key: str, variant: str) -> Optional[np.ndarray]:
+        """Memory-maps a derived array stored next to entry `key` (e.g. a float16 copy)."""
+        path = os.path.join(self.cache_dir, f"{key}.{variant}.npy")
+        if not os.path.exists(path):
+            return None
+        try:
+            return np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+    def save_array(self, key: str, variant: str, array: np.ndarray) -> np.ndarray:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, f"{key}.{variant}.npy")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(tmp, path)
+        return np.load(path, mmap_mode="r")
@@ -0,0 +1,81 @@
+
+"""Multi-process sentence encoding for large taxonomy and corpus embedding jobs."""
+
+import multiprocessing
+import os
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from nlp.encoders import load_encoder
+
+# Encoder owned by each worker process, loaded once by the pool initializer
+_worker_encoder = None
+
+
+def _init_worker(model_name: str, backend: str, onnx_path: Optional[str], threads: int):
+    global _worker_encoder
+    # One BLAS/OpenMP thread pool per worker, sized so workers do not oversubscribe the cores
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except Exception:
+        pass
+    _worker_encoder = load_encoder(model_name, backend, onnx_path, threads=threads)
+
+
+def _encode_chunk(args) -> np.ndarray:
+    texts, batch_size = args
+    return _worker_encoder.encode(texts, batch_size=batch_size)
+
+
+class EncodePool:
+    """
+    Spreads encoding over `processes` CPU worker processes. Each worker loads the
+    model once; texts are split into chunks of `chunk_size` and the encoded chunks
+    stream back in input order.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        processes: int,
+        backend: str = "torch",
+        onnx_path: Optional[str] = None,
+        chunk_size: int = 512,
+        threads_per_worker: Optional[int] = None,
+    ):
+        self.processes = max(1, int(processes))
+        self.chunk_size = max(1, int(chunk_size))
+        self.backend = backend
+        threads = threads_per_worker or max(1, (os.cpu_count() or 1) // self.processes)
+        # spawn: workers must not inherit a forked copy of torch's thread pools
+        ctx = multiprocessing.get_context("spawn")
+        self.pool = ctx.Pool(
+            self.processes,
+            initializer=_init_worker,
+            initargs=(model_name, backend, onnx_path, threads),
+        )
+
+    def imap_encode(self, texts: List[str], batch_size: int = 64) -> Iterator[np.ndarray]:
+        """Yields encoded chunks in input order as soon as each one is ready."""
+        chunks = ((texts[i:i + self.chunk_size], batch_size) for i in range(0, len(texts), self.chunk_size))
+        return self.pool.imap(_encode_chunk, chunks)
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(list(self.imap_encode(texts, batch_size)))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,146 @@
+
+"""Sentence encoder backends: PyTorch SentenceTransformer, dynamically quantized PyTorch, and ONNX Runtime."""
+
+import os
+from typing import List, Optional
+
+import numpy as np
+
+# --- Optional ONNX Runtime backend ---
+ort = None
+try:
+    import onnxruntime as ort_lib
+    ort = ort_lib
+except Exception:
+    ort = None
+
+ENCODER_BACKENDS = ("torch", "quantized", "onnx")
+
+
+def _l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.maximum(norms, 1e-12)).astype(np.float32, copy=False)
+
+
+class TorchEncoder:
+    """The reference SentenceTransformer model (optionally with int8 dynamic quantization)."""
+
+    def __init__(self, model_name: str, quantize: bool = False):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu" if quantize else None)
+        self.backend = "torch"
+        if quantize:
+            import torch
+            # Linear layers to int8; activations stay float and are quantized on the fly
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+            self.backend = "quantized"
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        # SentenceTransformer already sorts by length and pads per batch
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        ).astype(np.float32, copy=False)
+
+
+class OnnxEncoder:
+    """
+    Runs an exported ONNX version of the transformer with ONNX Runtime on CPU.
+
+    Inputs are sorted by token length and padded per batch only to the longest
+    member, then mean-pooled over the attention mask (as the MiniLM
+    paraphrase models do) and L2-normalized.
+    """
+
+    backend = "onnx"
+
+    def __init__(self, model_name: str, onnx_path: str, threads: Optional[int] = None):
+        if ort is None:
+            raise RuntimeError("onnxruntime is not installed: pip install onnxruntime")
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(f"ONNX model not found: {onnx_path}")
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.max_length = min(getattr(self.tokenizer, "model_max_length", 128) or 128, 128)
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        lengths = [len(ids) for ids in self.tokenizer(texts, truncation=True, max_length=self.max_length)["input_ids"]]
+        order = np.argsort(lengths, kind="stable")
+
+        out = [None] * len(texts)
+        for start in range(0, len(texts), batch_size):
+            batch_idx = order[start:start + batch_size]
+            enc = self.tokenizer(
+                [texts[i] for i in batch_idx],
+                padding="longest",
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            feeds = {
+                name: enc[name].astype(np.int64)
+                for name in ("input_ids", "attention_mask", "token_type_ids")
+                if name in self.input_names and name in enc
+            }
+            token_embeds = self.session.run(None, feeds)[0]
+            mask = enc["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeds * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            for i, vector in zip(batch_idx, _l2_normalize(pooled)):
+                out[i] = vector
+        return np.stack(out)
+
+
+def export_onnx(model_name: str, onnx_path: str, opset: int = 14):
+    """Exports the transformer inside a SentenceTransformer model to ONNX (token embeddings output)."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    axes = {n: {0: "batch", 1: "sequence"} for n in names}
+    axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+
+    directory = os.path.dirname(onnx_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[n] for n in names),
+            onnx_path,
+            input_names=names,
+            output_names=["token_embeddings"],
+            dynamic_axes=axes,
+            opset_version=opset,
+        )
+    return onnx_path
+
+
+def load_encoder(model_name: str, backend: str = "torch", onnx_path: Optional[str] = None, threads: Optional[int] = None):
+    """
+    Returns an encoder for `backend`, falling back to the plain PyTorch model
+    when the optimized backend cannot be loaded (missing package or model file).
+    """
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend: {backend} (expected one of {ENCODER_BACKENDS})")
+    try:
+        if backend == "onnx":
+            return OnnxEncoder(model_name, onnx_path or "", threads=threads)
+        if backend == "quantized":
+            return TorchEncoder(model_name, quantize=True)
+    except Exception as e:
+        print(f"⚠️ {backend} encoder unavailable ({e}); falling back to PyTorch.")
+    return TorchEncoder(model_name)
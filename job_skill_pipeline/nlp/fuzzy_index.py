@@ -0,0 +1,86 @@
+
+"""Character inverted index that shortlists taxonomy labels for difflib fuzzy matching."""
+
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class FuzzyIndex:
+    """
+    Finds the label with the highest `SequenceMatcher(None, query, label).ratio()`
+    (both lowercased) without scoring every label.
+
+    The ratio is 2*M/T, where M counts matched characters and T the combined
+    length. M can never exceed the number of characters the two strings share
+    as multisets, so that overlap (difflib's `quick_ratio`) bounds the ratio
+    from above. The index stores, per character, which labels contain it and
+    how often, so the bound for all labels comes from a few vectorized
+    posting-list updates. Labels whose bound does not exceed the threshold are
+    skipped, and the rest are scored in decreasing bound order until no
+    remaining bound can beat the best score.
+
+    The result is the same label a full scan picks, including the tie-break
+    (first label in list order).
+    """
+
+    def __init__(self, labels: List[str]):
+        self.labels = list(labels)
+        lowered = [label.lower() for label in self.labels]
+        self._lowered = lowered
+        self.lengths = np.fromiter((len(s) for s in lowered), dtype=np.int32, count=len(lowered))
+
+        postings = {}
+        for i, text in enumerate(lowered):
+            for char, count in Counter(text).items():
+                postings.setdefault(char, ([], []))
+                postings[char][0].append(i)
+                postings[char][1].append(count)
+        self.postings = {
+            char: (np.asarray(ids, dtype=np.int32), np.asarray(counts, dtype=np.int32))
+            for char, (ids, counts) in postings.items()
+        }
+
+    def __len__(self):
+        return len(self.labels)
+
+    def upper_bounds(self, query: str) -> np.ndarray:
+        """Upper bound of the difflib ratio between `query` and every label."""
+        query = query.lower()
+        overlap = np.zeros(len(self.labels), dtype=np.int32)
+        for char, count in Counter(query).items():
+            posting = self.postings.get(char)
+            if posting is not None:
+                ids, counts = posting
+                overlap[ids] += np.minimum(counts, count)
+        total = self.lengths + len(query)
+        # difflib defines the ratio of two empty strings as 1.0
+        return np.where(total > 0, 2.0 * overlap / np.maximum(total, 1), 1.0)
+
+    def best_match(self, query: str, threshold: float = 0.75) -> Tuple[Optional[str], float]:
+        """Returns (label, ratio) for the best label scoring above `threshold`, else (None, 0.0)."""
+        if not self.labels:
+            return None, 0.0
+        bounds = self.upper_bounds(query)
+        candidates = np.flatnonzero(bounds > threshold)
+        if candidates.size == 0:
+            return None, 0.0
+        # Highest bound first; ties keep list order
+        order = candidates[np.lexsort((candidates, -bounds[candidates]))]
+
+        query = query.lower()
+        best_idx, best_score = -1, threshold
+        matcher = SequenceMatcher(None)
+        matcher.set_seq1(query)
+        for i in order:
+            if bounds[i] < best_score:
+                break
+            matcher.set_seq2(self._lowered[i])
+            score = matcher.ratio()
+            if score > best_score or (score == best_score and best_idx >= 0 and i < best_idx):
+                best_idx, best_score = i, score
+        if best_idx < 0:
+            return None, 0.0
+        return self.labels[best_idx], best_score
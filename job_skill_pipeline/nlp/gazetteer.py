@@ -0,0 +1,184 @@
+
+"""
+Local taxonomy gazetteer: an Aho-Corasick automaton over the NL/FR/EN taxonomy
+labels that finds literal skill mentions in a posting without calling an LLM.
+"""
+
+import re
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from nlp.language import LANGUAGES
+
+# Words and single punctuation marks, so 'c++' and "collega's" tokenize like the text around them
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+# Sentences, bullet items and comma-separated list items
+SEGMENT_PATTERN = re.compile(r"[^.!?;,:\n•·|]+")
+# Words that count towards uncovered text (shorter ones are mostly articles and prepositions)
+CONTENT_WORD = re.compile(r"\w{3,}")
+
+GAZETTEER_MODES = ("off", "hybrid", "only")
+
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    """Lowercased tokens with their character spans in `text`."""
+    return [(m.group().lower(), m.start(), m.end()) for m in TOKEN_PATTERN.finditer(text)]
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher over token sequences. One left-to-right pass over the
+    text reports every occurrence of every pattern; matching whole tokens keeps
+    'excel' from firing inside 'excellent'.
+    """
+
+    def __init__(self, patterns: List[Tuple[str, ...]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[int]] = [[]]
+        self.lengths = [len(p) for p in patterns]
+
+        for pid, tokens in enumerate(patterns):
+            node = 0
+            for token in tokens:
+                nxt = self.goto[node].get(token)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][token] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = nxt
+            self.out[node].append(pid)
+
+        # Breadth-first failure links; outputs are merged along them
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and token not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(token, 0)
+                self.fail[child] = target if target != child else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def __len__(self):
+        return len(self.goto)
+
+    def iter_matches(self, tokens: List[str]):
+        """Yields (start token, end token exclusive, pattern id) for every occurrence."""
+        node = 0
+        for i, token in enumerate(tokens):
+            while node and token not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(token, 0)
+            for pid in self.out[node]:
+                yield i + 1 - self.lengths[pid], i + 1, pid
+
+
+@dataclass
+class GazetteerMatch:
+    label: str
+    languages: Tuple[str, ...]
+    start: int
+    end: int
+
+
+@dataclass
+class GazetteerCoverage:
+    """Skills found in a posting, and how much of its text no taxonomy label explains."""
+    matches: List[GazetteerMatch] = field(default_factory=list)
+    uncovered_words: int = 0
+    total_words: int = 0
+
+    @property
+    def skills(self) -> List[str]:
+        seen, skills = set(), []
+        for m in self.matches:
+            if m.label.lower() not in seen:
+                seen.add(m.label.lower())
+                skills.append(m.label)
+        return skills
+
+    @property
+    def uncovered_ratio(self) -> float:
+        return self.uncovered_words / self.total_words if self.total_words else 0.0
+
+
+class Gazetteer:
+    """
+    Finds taxonomy labels that occur literally in a posting.
+
+    Overlapping hits resolve leftmost-longest ('rijbewijs B' wins over 'rijbewijs').
+    `coverage` also splits the posting into sentences and list items and counts
+    the content words in segments without any hit; hybrid extraction only calls
+    the LLM when that uncovered text is large enough to hide further skills.
+    """
+
+    def __init__(self, labels: Dict[str, List[str]], min_chars: int = 3):
+        patterns, self.labels, self.languages = {}, [], []
+        for lang, lang_labels in labels.items():
+            for label in lang_labels:
+                label = " ".join(str(label).split())
+                tokens = tuple(t for t, _, _ in tokenize(label))
+                if len(label) < min_chars or not tokens:
+                    continue
+                pid = patterns.get(tokens)
+                if pid is None:
+                    pid = patterns[tokens] = len(self.labels)
+                    self.labels.append(label)
+                    self.languages.append([])
+                if lang not in self.languages[pid]:
+                    self.languages[pid].append(lang)
+        self.automaton = AhoCorasick(list(patterns))
+
+    @classmethod
+    def from_taxonomy(cls, taxonomy_df: pd.DataFrame, min_chars: int = 3) -> "Gazetteer":
+        """Builds the gazetteer from the skill_nl / skill_fr / skill_en columns of `TaxonomyLoader.load_all()`."""
+        labels = {}
+        for lang in LANGUAGES:
+            column = f"skill_{lang}"
+            if column in taxonomy_df.columns:
+                labels[lang] = [str(v).strip() for v in taxonomy_df[column].dropna() if str(v).strip()]
+        return cls(labels, min_chars=min_chars)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def find(self, text: str) -> List[GazetteerMatch]:
+        """Non-overlapping label hits in `text`, leftmost-longest, in text order."""
+        tokens = tokenize(text or "")
+        hits = sorted(
+            self.automaton.iter_matches([t for t, _, _ in tokens]),
+            key=lambda hit: (hit[0], -(hit[1] - hit[0])),
+        )
+        matches, next_free = [], 0
+        for start, end, pid in hits:
+            if start < next_free:
+                continue
+            matches.append(GazetteerMatch(self.labels[pid], tuple(self.languages[pid]), tokens[start][1], tokens[end - 1][2]))
+            next_free = end
+        return matches
+
+    def coverage(self, text: str) -> GazetteerCoverage:
+        text = text or ""
+        matches = self.find(text)
+        starts = [m.start for m in matches]
+        result = GazetteerCoverage(matches=matches)
+        for segment in SEGMENT_PATTERN.finditer(text):
+            words = len(CONTENT_WORD.findall(segment.group()))
+            result.total_words += words
+            # Covered when a hit starts inside the segment or spans into it
+            i = bisect_left(starts, segment.start())
+            covered = (i < len(matches) and matches[i].start < segment.end()) or (
+                i > 0 and matches[i - 1].end > segment.start()
+            )
+            if not covered:
+                result.uncovered_words += words
+        return result
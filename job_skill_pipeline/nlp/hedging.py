@@ -0,0 +1,325 @@
+
+"""Hedged LLM requests with per-provider latency tracking and circuit breakers."""
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from nlp.rate_limit import is_rate_limit_error
+
+
+class LatencyTracker:
+    """Sliding window of successful response times for one provider."""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, q: float, min_samples: int) -> Optional[float]:
+        with self._lock:
+            if len(self.samples) < min_samples:
+                return None
+            return float(np.percentile(np.fromiter(self.samples, dtype=float), q))
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_after` seconds; then lets one trial call through (half-open), which
+    closes the breaker on success or re-opens it on failure.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            reopen = self.trial_running
+            self.trial_running = False
+            if reopen or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+
+    def release_trial(self):
+        """A half-open trial call was abandoned before it produced a verdict."""
+        with self._lock:
+            self.trial_running = False
+
+
+class HedgePolicy:
+    """
+    Sends a request to the primary provider and, when it has not answered
+    within that provider's recent p95 latency (clamped to
+    [min_deadline, max_deadline]; `initial_deadline` until `min_samples`
+    answers are known), fires a duplicate at the secondary provider. The first
+    valid answer wins. A failed or invalid answer triggers the duplicate at once.
+
+    Only the slowest ~(100 - percentile)% of requests are duplicated, so average
+    cost grows by about that share. Providers behind an open circuit breaker are
+    skipped, which turns hedging into plain failover while one is degraded.
+    `providers` may name the same provider twice to hedge against itself.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        multiplier: float = 1.0,
+        min_deadline: float = 0.5,
+        max_deadline: float = 30.0,
+        initial_deadline: float = 10.0,
+        min_samples: int = 20,
+        window: int = 200,
+        failure_threshold: int = 5,
+        reset_after: float = 30.0,
+        max_workers: int = 32,
+    ):
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_deadline = min_deadline
+        self.max_deadline = max_deadline
+        self.initial_deadline = initial_deadline
+        self.min_samples = min_samples
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.max_workers = max_workers
+        self.latency: Dict[str, LatencyTracker] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._executor = None
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0, "invalid_answers": 0}
+
+    # ------------------------------------------------------------------
+    # Bookkeeping
+    # ------------------------------------------------------------------
+    def _tracker(self, provider: str) -> LatencyTracker:
+        with self._lock:
+            if provider not in self.latency:
+                self.latency[provider] = LatencyTracker(self.window)
+                self.breakers[provider] = CircuitBreaker(self.failure_threshold, self.reset_after)
+            return self.latency[provider]
+
+    def _breaker(self, provider: str) -> CircuitBreaker:
+        self._tracker(provider)
+        return self.breakers[provider]
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def deadline(self, provider: str) -> float:
+        p = self._tracker(provider).percentile(self.percentile, self.min_samples)
+        if p is None:
+            return self.initial_deadline
+        return min(self.max_deadline, max(self.min_deadline, self.multiplier * p))
+
+    def _take(self, candidates: List[str]) -> Optional[str]:
+        """Pops candidates until one whose breaker lets a call through."""
+        while candidates:
+            provider = candidates.pop(0)
+            if self._breaker(provider).allow():
+                return provider
+        return None
+
+    def _primary(self, providers: List[str], candidates: List[str]) -> str:
+        primary = self._take(candidates)
+        if primary is None:
+            # Every provider is broken: keep trying the first one rather than failing outright
+            return providers[0]
+        if primary != providers[0]:
+            self._count("failovers")
+        return primary
+
+    def _record(self, provider: str, seconds: float, error: Optional[Exception]):
+        if error is None:
+            self._tracker(provider).add(seconds)
+            self._breaker(provider).record_success()
+        elif is_rate_limit_error(error):
+            # Rate limits are the limiter's business, not a sign of degradation
+            self._breaker(provider).release_trial()
+        else:
+            self._breaker(provider).record_failure()
+
+    def _invalid(self, provider: str):
+        self._count("invalid_answers")
+        self._breaker(provider).record_failure()
+
+    def breaker_states(self) -> Dict[str, str]:
+        return {p: b.state for p, b in self.breakers.items()}
+
+    # ------------------------------------------------------------------
+    # Sync (threads)
+    # ------------------------------------------------------------------
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm-hedge")
+            return self._executor
+
+    def _submit(self, provider: str, call: Callable[[str], str]):
+        # Each request runs in a copy of the caller's context, so context variables
+        # (such as the extractor's per-posting metrics record) follow it into the worker
+        return self._pool().submit(contextvars.copy_context().run, self._timed, provider, call)
+
+    def _timed(self, provider: str, call: Callable[[str], str]) -> str:
+        start = time.monotonic()
+        try:
+            result = call(provider)
+        except Exception as e:
+            self._record(provider, time.monotonic() - start, e)
+            raise
+        self._record(provider, time.monotonic() - start, None)
+        return result
+
+    def call(self, providers: List[str], call: Callable[[str], str], valid: Callable[[str], bool]) -> str:
+        """Runs `call(provider)` with hedging; the losing request is left to finish in the background."""
+        self._count("requests")
+        candidates = list(providers)
+        primary = self._primary(providers, candidates)
+        first = self._submit(primary, call)
+        futures = {first: primary}
+
+        done, _ = wait(futures, timeout=self.deadline(primary))
+        if not done:
+            provider = self._take(candidates)
+            if provider is not None:
+                self._count("hedged")
+                futures[self._submit(provider, call)] = provider
+
+        errors, fallback = [], None
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(e)
+                else:
+                    if valid(result):
+                        if future is not first:
+                            self._count("hedge_wins")
+                        return result
+                    self._invalid(provider)
+                    fallback = result if fallback is None else fallback
+                provider = self._take(candidates)
+                if provider is not None:
+                    futures[self._submit(provider, call)] = provider
+        if fallback is not None:
+            return fallback
+        raise next((e for e in errors if is_rate_limit_error(e)), errors[-1])
+
+    # ------------------------------------------------------------------
+    # Async (tasks; the losing request is cancelled)
+    # ------------------------------------------------------------------
+    async def _atimed(self, provider: str, call, started: Optional[asyncio.Event] = None) -> str:
+        start = time.monotonic()
+
+        def on_start():
+            # Latency is measured from when the request leaves the client-side queue
+            nonlocal start
+            start = time.monotonic()
+            if started is not None:
+                started.set()
+
+        try:
+            result = await call(provider, on_start)
+        except asyncio.CancelledError:
+            self._breaker(provider).release_trial()
+            raise
+        except Exception as e:
+            self._record(provider, time.monotonic() - start, e)
+            raise
+        self._record(provider, time.monotonic() - start, None)
+        return result
+
+    async def acall(self, providers: List[str], call, valid: Callable[[str], bool]) -> str:
+        """
+        Async `call`: `call(provider, on_start)` returns an awaitable and calls
+        `on_start()` once the request is actually sent (after any limiter wait),
+        which is when the hedging deadline starts. The loser is cancelled.
+        """
+        self._count("requests")
+        candidates = list(providers)
+        primary = self._primary(providers, candidates)
+        started = asyncio.Event()
+        first = asyncio.ensure_future(self._atimed(primary, call, started))
+        tasks = {first: primary}
+
+        sent = asyncio.ensure_future(started.wait())
+        await asyncio.wait({first, sent}, return_when=asyncio.FIRST_COMPLETED)
+        sent.cancel()
+        done, _ = await asyncio.wait(tasks, timeout=self.deadline(primary))
+        if not done:
+            provider = self._take(candidates)
+            if provider is not None:
+                self._count("hedged")
+                tasks[asyncio.ensure_future(self._atimed(provider, call))] = provider
+
+        errors, fallback = [], None
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider = tasks.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        errors.append(e)
+                    else:
+                        if valid(result):
+                            if task is not first:
+                                self._count("hedge_wins")
+                            return result
+                        self._invalid(provider)
+                        fallback = result if fallback is None else fallback
+                    provider = self._take(candidates)
+                    if provider is not None:
+                        tasks[asyncio.ensure_future(self._atimed(provider, call))] = provider
+        finally:
+            for task in tasks:
+                task.cancel()
+        if fallback is not None:
+            return fallback
+        raise next((e for e in errors if is_rate_limit_error(e)), errors[-1])
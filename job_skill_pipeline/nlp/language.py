@@ -0,0 +1,18 @@
+
+"""Language detection shared by the extractor and the normalizer."""
+
+from langdetect import detect, DetectorFactory
+
+# Fix deterministic language detection results
+DetectorFactory.seed = 0
+
+LANGUAGES = ("nl", "fr", "en")
+
+
+def detect_language(text: str) -> str:
+    """Detects the dominant language of `text` as 'nl', 'fr' or 'en' (default 'en')."""
+    try:
+        lang = detect(text)
+        return lang if lang in LANGUAGES else "en"
+    except Exception:
+        return "en"
@@ -0,0 +1,135 @@
+
+"""Long-lived, pooled LLM clients shared by every call, retry and thread of a SkillExtractor."""
+
+import asyncio
+import threading
+from typing import Optional
+
+import openai
+
+# --- Optional httpx (bundled with openai>=1.0) for connection pool tuning and tracing ---
+httpx = None
+try:
+    import httpx as httpx_lib
+    httpx = httpx_lib
+except Exception:
+    httpx = None
+
+# --- Optional Gemini (Google) backend ---
+genai = None
+try:
+    import google.generativeai as genai_lib
+    genai = genai_lib
+except Exception:
+    genai = None
+
+
+class ClientPool:
+    """
+    Caches one OpenAI client per (api key, base url), one AsyncOpenAI client per
+    event loop, and one Gemini model per model name. The OpenAI clients sit on
+    httpx pools with keep-alive, and every request is traced, so `stats()`
+    shows how many TCP connects and TLS handshakes the requests really cost
+    (Gemini manages its own transport and is not traced).
+    """
+
+    def __init__(self, max_connections: int = 20, max_keepalive: int = 10, keepalive_expiry: float = 60.0, timeout: float = 120.0):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._stats = {"clients_created": 0, "requests": 0, "tcp_connects": 0, "tls_handshakes": 0}
+
+    # ------------------------------------------------------------------
+    # Tracing (httpcore "trace" extension, installed by a request hook)
+    # ------------------------------------------------------------------
+    def _count(self, event: str):
+        with self._lock:
+            if event == "connection.connect_tcp.complete":
+                self._stats["tcp_connects"] += 1
+            elif event == "connection.start_tls.complete":
+                self._stats["tls_handshakes"] += 1
+
+    def _on_request(self, request):
+        with self._lock:
+            self._stats["requests"] += 1
+        request.extensions["trace"] = lambda event, info: self._count(event)
+
+    async def _on_async_request(self, request):
+        with self._lock:
+            self._stats["requests"] += 1
+
+        async def trace(event, info):
+            self._count(event)
+        request.extensions["trace"] = trace
+
+    def _limits(self):
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def _get(self, key, factory):
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = factory()
+                self._clients[key] = client
+                self._stats["clients_created"] += 1
+            return client
+
+    # ------------------------------------------------------------------
+    # Providers
+    # ------------------------------------------------------------------
+    def openai(self, api_key: Optional[str], base_url: Optional[str] = None):
+        Client = getattr(openai, "OpenAI", None)
+        if Client is None:
+            raise RuntimeError(
+                "OpenAI client not available: please install openai>=1.0 and set OPENAI_API_KEY, or pin to openai==0.28 to use legacy API."
+            )
+
+        def factory():
+            # No SDK retries: SkillExtractor retries itself, so every retry is counted in its metrics
+            kwargs = {"api_key": api_key, "base_url": base_url, "max_retries": 0}
+            if httpx is not None:
+                kwargs["http_client"] = httpx.Client(
+                    limits=self._limits(), timeout=self.timeout, event_hooks={"request": [self._on_request]}
+                )
+            return Client(**kwargs)
+
+        return self._get(("openai", api_key, base_url), factory)
+
+    def async_openai(self, api_key: Optional[str], base_url: Optional[str] = None):
+        Client = getattr(openai, "AsyncOpenAI", None)
+        if Client is None:
+            raise RuntimeError("Async OpenAI client not available: please install openai>=1.0.")
+
+        def factory():
+            # Retries are left to the provider limiter, which needs to see every 429
+            kwargs = {"api_key": api_key, "base_url": base_url, "max_retries": 0}
+            if httpx is not None:
+                kwargs["http_client"] = httpx.AsyncClient(
+                    limits=self._limits(), timeout=self.timeout, event_hooks={"request": [self._on_async_request]}
+                )
+            return Client(**kwargs)
+
+        # httpx async pools are bound to the event loop that opened their connections. Keyed on
+        # the loop itself, not id(loop): a later loop can reuse the id of a collected one
+        loop = asyncio.get_running_loop()
+        return self._get(("async_openai", api_key, base_url, loop), factory)
+
+    def gemini(self, model_name: str):
+        if genai is None:
+            raise RuntimeError("google-generativeai is not installed.")
+
+        return self._get(("gemini", model_name), lambda: genai.GenerativeModel(model_name))
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        requests = stats["requests"]
+        stats["connection_reuse_rate"] = 1 - stats["tcp_connects"] / requests if requests else 0.0
+        return stats
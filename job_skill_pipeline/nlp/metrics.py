@@ -0,0 +1,163 @@
+
+"""Per-posting extraction metrics: a JSONL sink plus in-process per-domain and per-run aggregates."""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Optional
+
+import numpy as np
+
+# USD per 1M (prompt, completion) tokens; list prices, update when they change
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "mock": (0.0, 0.0),
+}
+
+
+def estimate_cost(model: Optional[str], prompt_tokens: float, completion_tokens: float) -> Optional[float]:
+    """Cost in USD, or None for a model without a known price."""
+    prices = MODEL_PRICES.get(model or "")
+    if prices is None:
+        # Dated snapshots ('gpt-4o-mini-2024-07-18') are priced like their base model
+        prices = next((p for name, p in sorted(MODEL_PRICES.items(), key=lambda kv: -len(kv[0])) if (model or "").startswith(name)), None)
+    if prices is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1e6
+
+
+class _Aggregate:
+    def __init__(self):
+        self.postings = 0
+        self.llm_calls = 0
+        self.prompt_tokens = 0.0
+        self.completion_tokens = 0.0
+        self.cost_usd = 0.0
+        self.unpriced = 0
+        self.retries = 0
+        self.json_fallbacks = 0
+        self.cached = 0
+        self.llm_skipped = 0
+        self.errors = 0
+        self.wall_ms = []
+
+    def add(self, record: dict):
+        self.postings += 1
+        self.llm_calls += record.get("llm_calls", 0)
+        self.prompt_tokens += record.get("prompt_tokens", 0)
+        self.completion_tokens += record.get("completion_tokens", 0)
+        if record.get("cost_usd") is None:
+            self.unpriced += int(record.get("llm_calls", 0) > 0)
+        else:
+            self.cost_usd += record["cost_usd"]
+        self.retries += record.get("retries", 0)
+        self.json_fallbacks += int(bool(record.get("json_fallback")))
+        self.cached += int(bool(record.get("cached")))
+        self.llm_skipped += int(bool(record.get("llm_skipped")))
+        self.errors += int(bool(record.get("error")))
+        self.wall_ms.append(record.get("wall_ms", 0.0))
+
+    def merge(self, other: "_Aggregate"):
+        for name in ("postings", "llm_calls", "prompt_tokens", "completion_tokens", "cost_usd", "unpriced",
+                     "retries", "json_fallbacks", "cached", "llm_skipped", "errors"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.wall_ms.extend(other.wall_ms)
+
+    def summary(self) -> dict:
+        wall = np.asarray(self.wall_ms, dtype=float) if self.wall_ms else np.zeros(1)
+        return {
+            "postings": self.postings,
+            "llm_calls": round(self.llm_calls, 2),
+            "prompt_tokens": int(round(self.prompt_tokens)),
+            "completion_tokens": int(round(self.completion_tokens)),
+            "cost_usd": round(self.cost_usd, 6),
+            "unpriced_postings": self.unpriced,
+            "retries": self.retries,
+            "json_fallbacks": self.json_fallbacks,
+            "cached": self.cached,
+            "llm_skipped": self.llm_skipped,
+            "errors": self.errors,
+            "wall_ms_total": float(wall.sum()),
+            "wall_ms_p50": float(np.percentile(wall, 50)),
+            "wall_ms_p95": float(np.percentile(wall, 95)),
+        }
+
+
+class MetricsSink:
+    """
+    Receives one record per extracted posting. Records are appended to a JSONL
+    file (when `path` is set) and folded into per-run and per-domain aggregates
+    kept in memory, which `report()` prints as a table.
+    """
+
+    def __init__(self, path: Optional[str] = None, run_id: Optional[str] = None):
+        self.path = path
+        self.run_id = run_id or time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        self._file = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+        self.run = _Aggregate()
+        self.domains = defaultdict(_Aggregate)
+
+    def record(self, record: dict):
+        record = {"run_id": self.run_id, "ts": round(time.time(), 3), **record}
+        with self._lock:
+            if self._file is not None:
+                self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.run.add(record)
+            self.domains[record.get("domain") or "unknown"].add(record)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "run": self.run.summary(),
+                "domains": {domain: agg.summary() for domain, agg in sorted(self.domains.items())},
+            }
+
+    def aggregates(self):
+        """Picklable copy of the in-memory aggregates, e.g. for a worker process to send back to `merge`."""
+        with self._lock:
+            return self.run, dict(self.domains)
+
+    def merge(self, aggregates):
+        """Folds in `aggregates()` of another sink (another shard of the same run)."""
+        run, domains = aggregates
+        with self._lock:
+            self.run.merge(run)
+            for domain, agg in domains.items():
+                self.domains[domain].merge(agg)
+
+    def report(self) -> str:
+        summary = self.summary()
+        header = f"{'domain':<24}{'postings':>9}{'llm':>6}{'prompt tok':>12}{'compl tok':>11}{'cost $':>10}{'p50 ms':>9}{'p95 ms':>9}{'retries':>8}{'json fb':>8}"
+        lines = [f"📊 Extraction metrics (run {summary['run_id']})", header, "-" * len(header)]
+        rows = list(summary["domains"].items()) + [("ALL", summary["run"])]
+        for domain, s in rows:
+            if domain == "ALL":
+                lines.append("-" * len(header))
+            lines.append(
+                f"{domain[:23]:<24}{s['postings']:>9}{s['llm_calls']:>6.0f}{s['prompt_tokens']:>12}{s['completion_tokens']:>11}"
+                f"{s['cost_usd']:>10.4f}{s['wall_ms_p50']:>9.0f}{s['wall_ms_p95']:>9.0f}{s['retries']:>8}{s['json_fallbacks']:>8}"
+            )
+        run = summary["run"]
+        if run["unpriced_postings"]:
+            lines.append(f"⚠️ {run['unpriced_postings']} postings used a model without a known price (not in cost)")
+        return "\n".join(lines)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,231 @@
+
+"""
+Local stand-in for an OpenAI-compatible chat completions endpoint, used to
+measure extraction throughput without paying for (or waiting on) a real LLM.
+
+Answers are deterministic for a given prompt; latency, server errors and 429s
+are drawn from a seeded random generator.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+POSTING_HEADER = re.compile(r"^### (J\d+)\n", flags=re.MULTILINE)
+CANDIDATE_WORD = re.compile(r"\w{6,}")
+
+
+def mock_skills(text: str, k: int = 5) -> List[str]:
+    """Deterministic fake skills: the k longer words of `text` with the smallest hashes, in text order."""
+    words = list(dict.fromkeys(w.lower() for w in CANDIDATE_WORD.findall(text)))
+    chosen = set(sorted(words, key=lambda w: hashlib.sha1(w.encode("utf-8")).hexdigest())[:k])
+    return [w for w in words if w in chosen]
+
+
+def mock_answer(prompt: str) -> str:
+    """JSON answer in the shape the prompt asks for: an array, or an object keyed by posting alias."""
+    if "### J" in prompt:
+        body = prompt.split("Postings:\n", 1)[-1].rsplit("\n\nJSON object:", 1)[0]
+        parts = POSTING_HEADER.split(body)
+        # parts = [preamble, alias1, text1, alias2, text2, ...]
+        answer = {alias: mock_skills(text) for alias, text in zip(parts[1::2], parts[2::2])}
+        return json.dumps(answer, ensure_ascii=False)
+    text = prompt.split("Text:\n", 1)[-1].rsplit("\n\nJSON list:", 1)[0]
+    return json.dumps(mock_skills(text), ensure_ascii=False)
+
+
+class MockLLMServer:
+    """
+    Serves POST /v1/chat/completions (and /chat/completions) on 127.0.0.1.
+
+    Latency is log-normal around `latency_ms` with shape `latency_sigma`
+    (0 = fixed), plus a `slow_rate` share of requests that take `slow_ms`.
+    `error_rate` of requests fail with HTTP 500 and `rate_limit_rate` with
+    HTTP 429 and a Retry-After of `retry_after` seconds. Connections are kept
+    alive (HTTP/1.1), like the real APIs.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 200.0,
+        latency_sigma: float = 0.5,
+        slow_rate: float = 0.0,
+        slow_ms: float = 2000.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 0.5,
+        seed: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "disconnects": 0}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _draw(self):
+        """(outcome, delay in seconds) for the next request."""
+        with self._lock:
+            self.stats["requests"] += 1
+            roll = self._rng.random()
+            if self.slow_rate and self._rng.random() < self.slow_rate:
+                delay_ms = self.slow_ms
+            elif self.latency_sigma > 0:
+                delay_ms = self._rng.lognormvariate(0.0, self.latency_sigma) * self.latency_ms
+            else:
+                delay_ms = self.latency_ms
+            if roll < self.rate_limit_rate:
+                outcome = "rate_limited"
+            elif roll < self.rate_limit_rate + self.error_rate:
+                outcome = "errors"
+            else:
+                outcome = "ok"
+            self.stats[outcome] += 1
+        return outcome, delay_ms / 1000.0
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload: dict, headers: Optional[dict] = None):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    for name, value in (headers or {}).items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up on the request (e.g. the loser of a hedged pair was cancelled)
+                    self.close_connection = True
+                    with server._lock:
+                        server.stats["disconnects"] += 1
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    return self._send(400, {"error": {"message": "invalid JSON body", "type": "invalid_request_error"}})
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    return self._send(404, {"error": {"message": f"unknown path {self.path}", "type": "invalid_request_error"}})
+
+                outcome, delay = server._draw()
+                time.sleep(delay)
+                if outcome == "rate_limited":
+                    return self._send(
+                        429,
+                        {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+                        {"Retry-After": str(server.retry_after)},
+                    )
+                if outcome == "errors":
+                    return self._send(500, {"error": {"message": "Internal server error (mock)", "type": "server_error"}})
+
+                prompt = "\n".join(str(m.get("content", "")) for m in request.get("messages", []))
+                content = mock_answer(prompt)
+                prompt_tokens, completion_tokens = max(1, len(prompt) // 4), max(1, len(content) // 4)
+                self._send(200, {
+                    "id": "mock-" + hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12],
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "mock"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                })
+
+        return Handler
+
+    def start(self) -> "MockLLMServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-llm", daemon=True)
+            self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serves on the calling thread (standalone use)."""
+        self._httpd.serve_forever()
+
+    def close(self):
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="median mock response time")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal spread of the response time (0 = fixed)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests that take --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=2000.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with HTTP 429")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def server_from_args(args, port: int = 0) -> MockLLMServer:
+    return MockLLMServer(
+        port=port,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        slow_rate=args.slow_rate,
+        slow_ms=args.slow_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible mock LLM server")
+    parser.add_argument("--port", type=int, default=8089)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args, port=args.port)
+    print(f"🧪 Mock LLM listening on {server.url} (set OPENAI_BASE_URL or MOCK_LLM_URL to use it)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        print(json.dumps(server.stats))
@@ -1,44 +1,391 @@
 
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer, util
+
+from nlp.ann_index import ANN_THRESHOLD, BruteForceIndex, HNSWIndex, IVFIndex, hnswlib
+from nlp.embedding_cache import EmbeddingCache
+from nlp.encode_pool import EncodePool
+from nlp.encoders import load_encoder
+from nlp.language import LANGUAGES
+from nlp.quantization import PRECISIONS, QuantizedMatrix, matrix_rows
+from nlp.query_cache import QueryEmbeddingCache
+from nlp.taxonomy_loader import make_skill_id
+
+DEFAULT_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+DEFAULT_CACHE_DIR = os.getenv("SKILL_EMBEDDING_CACHE", "data/embedding_cache")
+
+
+@dataclass
+class SkillMatches:
+    """Vectorized top-k matches for a batch of queries (row i belongs to queries[i])."""
+
+    queries: List[str]
+    indices: np.ndarray   # (n, k) positions in `skill_texts`, best first
+    scores: np.ndarray    # (n, k) cosine scores, best first
+    margin: np.ndarray    # (n,) top-1 minus top-2 score
+    accepted: np.ndarray  # (n,) top-1 score >= threshold
+
 
 class SkillNormalizer:
     """Matches extracted multilingual skill terms to the official Belgian taxonomy."""
 
-    def __init__(self, taxonomy_df: pd.DataFrame):
-        self.model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+    def __init__(
+        self,
+        taxonomy_df: pd.DataFrame,
+        model_name: str = DEFAULT_MODEL,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+        ann_backend: str = "auto",
+        precision: str = "float32",
+        query_cache_entries: int = 50000,
+        query_cache_mb: float = 64,
+        query_cache_path: Optional[str] = None,
+        language_margin: float = 0.1,
+        top_k: int = 1,
+        encoder_backend: str = "torch",
+        onnx_path: Optional[str] = None,
+        encode_processes: int = 0,
+    ):
+        self.model_name = model_name
+        self.encoder_backend = encoder_backend
+        self.onnx_path = onnx_path
+        self.encode_processes = encode_processes
+        # Identifies the embedding space: optimized backends drift slightly from PyTorch,
+        # so their taxonomy and query vectors are cached separately
+        self.encoder_id = model_name if encoder_backend == "torch" else f"{model_name}@{encoder_backend}"
+        self._model = None
         self.taxonomy = taxonomy_df
-        self.skill_texts = (
-            taxonomy_df["skill_nl"].fillna("").tolist()
-            + taxonomy_df["skill_fr"].fillna("").tolist()
-            + taxonomy_df["skill_en"].fillna("").tolist()
+        # Taxonomy texts laid out as one contiguous, sorted block per language (NL, FR, EN),
+        # so each language sub-matrix is a zero-copy slice of the full matrix. A label
+        # shared by several languages appears once in each of their blocks.
+        self.skill_texts = []
+        self.language_blocks = {}
+        for lang in LANGUAGES:
+            texts = sorted(set(s for s in taxonomy_df[f"skill_{lang}"].fillna("").tolist() if len(s) > 1))
+            self.language_blocks[lang] = slice(len(self.skill_texts), len(self.skill_texts) + len(texts))
+            self.skill_texts.extend(texts)
+        # Shared id per distinct label, so duplicates across language blocks can be collapsed
+        unique_texts = {text: i for i, text in enumerate(sorted(set(self.skill_texts)))}
+        self._text_ids = np.array([unique_texts[text] for text in self.skill_texts], dtype=np.int64)
+        self.language_margin = language_margin
+        self.top_k = max(1, int(top_k))
+        self.cache = EmbeddingCache(cache_dir) if cache_dir else None
+        self._cache_key = EmbeddingCache.make_key(self.encoder_id, self.skill_texts)
+        self.embeddings = self._load_embeddings()
+        self.precision = precision
+        self.matrix = self._load_matrix(precision)
+        self.index = self._load_index(ann_backend)
+        self.language_indexes = {
+            lang: self._load_index(ann_backend, lang)
+            for lang, rows in self.language_blocks.items()
+            if rows.stop > rows.start
+        }
+        self._build_row_index()
+        self.query_cache = QueryEmbeddingCache(
+            self.encoder_id,
+            max_entries=query_cache_entries,
+            max_bytes=int(query_cache_mb * 2**20),
+            persist_path=query_cache_path,
+        ) if query_cache_entries > 0 else None
+
+    @property
+    def model(self):
+        # Loaded lazily: a warm embedding cache does not need the encoder at startup.
+        # With encode_processes > 1 this is a worker pool exposing the same encode().
+        if self._model is None:
+            if self.encode_processes > 1:
+                self._model = EncodePool(self.model_name, self.encode_processes, self.encoder_backend, self.onnx_path)
+            else:
+                self._model = load_encoder(self.model_name, self.encoder_backend, self.onnx_path)
+        return self._model
+
+    def close(self):
+        """Stops the encode worker pool, if any, and persists the query cache."""
+        if isinstance(self._model, EncodePool):
+            self._model.close()
+            self._model = None
+        self.save_query_cache()
+
+    def encode(self, texts: list, batch_size: int = 64) -> np.ndarray:
+        """Encodes texts into L2-normalized float32 rows, so cosine is a dot product."""
+        return self.model.encode(texts, batch_size=batch_size)
+
+    def encode_queries(self, queries: list, batch_size: int = 64) -> np.ndarray:
+        """
+        Encodes extracted skill strings, serving repeats from the query LRU cache
+        (keyed on `query_key`) and sending only cache misses to the encoder.
+        """
+        if self.query_cache is None:
+            return self.encode(queries, batch_size=batch_size)
+
+        keys = [self.query_key(q) for q in queries]
+        cached = self.query_cache.get_many(keys)
+        missing = {}
+        for key, query in zip(keys, queries):
+            if key not in cached and key not in missing:
+                missing[key] = query
+        if missing:
+            fresh = self.encode(list(missing.values()), batch_size=batch_size)
+            for key, vector in zip(missing.keys(), fresh):
+                vector = vector.copy()
+                self.query_cache.put(key, vector)
+                cached[key] = vector
+        return np.stack([cached[key] for key in keys])
+
+    def cache_stats(self) -> dict:
+        """Hit / miss / eviction counters of the query embedding cache."""
+        return self.query_cache.stats() if self.query_cache is not None else {}
+
+    def save_query_cache(self):
+        if self.query_cache is not None:
+            self.query_cache.save()
+
+    def _encode_taxonomy(self) -> np.ndarray:
+        # Labels shared between language blocks are encoded once
+        unique = sorted(set(self.skill_texts))
+        position = {text: i for i, text in enumerate(unique)}
+        return self.encode(unique)[[position[text] for text in self.skill_texts]]
+
+    def _load_embeddings(self) -> np.ndarray:
+        if self.cache is None:
+            return self._encode_taxonomy()
+
+        cached = self.cache.load(self._cache_key, len(self.skill_texts))
+        if cached is not None:
+            return cached
+        return self.cache.save(self._cache_key, self.encoder_id, self.skill_texts, self._encode_taxonomy())
+
+    def _load_matrix(self, precision: str):
+        """
+        Returns the matrix used for scoring: the float32 embeddings themselves, or a
+        float16 / int8 (per-row scaled) copy that is cached and memory-mapped as well.
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision} (expected one of {PRECISIONS})")
+        if precision == "float32":
+            return self.embeddings
+
+        if self.cache is not None:
+            data = self.cache.load_array(self._cache_key, precision)
+            scales = self.cache.load_array(self._cache_key, "int8_scales") if precision == "int8" else None
+            if data is not None and (precision == "float16" or scales is not None):
+                return QuantizedMatrix(data, scales)
+
+        quantized = QuantizedMatrix.quantize(self.embeddings, precision)
+        if self.cache is not None:
+            quantized.data = self.cache.save_array(self._cache_key, precision, quantized.data)
+            if quantized.scales is not None:
+                quantized.scales = self.cache.save_array(self._cache_key, "int8_scales", quantized.scales)
+        return quantized
+
+    def _load_index(self, backend: str, lang: Optional[str] = None):
+        """
+        Picks the nearest-neighbour backend for the full matrix, or for one language
+        block when `lang` is given: brute force below ANN_THRESHOLD texts, otherwise
+        HNSW (if hnswlib is installed) or the numpy IVF index. ANN indexes are persisted
+        next to the embedding cache entry and reused while it is valid.
+        """
+        rows = self.language_blocks[lang] if lang else slice(0, len(self.skill_texts))
+        count = rows.stop - rows.start
+        matrix = matrix_rows(self.matrix, rows)
+        if backend == "auto":
+            if count < ANN_THRESHOLD:
+                backend = "brute"
+            else:
+                backend = "hnsw" if hnswlib is not None else "ivf"
+        if backend == "brute":
+            return BruteForceIndex(matrix)
+        if backend not in ("hnsw", "ivf"):
+            raise ValueError(f"Unknown ANN backend: {backend}")
+
+        index_cls = HNSWIndex if backend == "hnsw" else IVFIndex
+        path = None
+        if self.cache is not None:
+            tag = f".{lang}" if lang else ""
+            path = os.path.join(self.cache.cache_dir, self._cache_key + tag + index_cls.suffix)
+            if os.path.exists(path):
+                try:
+                    if backend == "hnsw":
+                        return HNSWIndex.load(path, self.embeddings.shape[1], count)
+                    return IVFIndex.load(path, matrix)
+                except Exception:
+                    pass  # stale or corrupt index: rebuild below
+
+        index = index_cls.build(self.embeddings[rows])
+        if backend == "ivf":
+            index.matrix = matrix
+        if path is not None:
+            index.save(path)
+        return index
+
+    def _build_row_index(self):
+        """
+        Maps every entry of `skill_texts` to the first taxonomy row carrying that label,
+        so a match resolves its category and skill id with one array lookup.
+        """
+        tax = self.taxonomy
+        labels = list(zip(tax["skill_nl"], tax["skill_fr"], tax["skill_en"]))
+        if "skill_id" in tax.columns:
+            skill_ids = tax["skill_id"].tolist()
+        else:
+            skill_ids = [
+                make_skill_id(category, *row_labels)
+                for category, row_labels in zip(tax["category"], labels)
+            ]
+
+        self._rows = []
+        first_row = {}
+        for pos, (category, (nl, fr, en)) in enumerate(zip(tax["category"], labels)):
+            self._rows.append({
+                "category": category,
+                "skill_nl": nl if isinstance(nl, str) else None,
+                "skill_fr": fr if isinstance(fr, str) else None,
+                "skill_en": en if isinstance(en, str) else None,
+                "skill_id": skill_ids[pos],
+            })
+            for label in (nl, fr, en):
+                if isinstance(label, str) and label not in first_row:
+                    first_row[label] = pos
+
+        self._text_rows = np.array([first_row.get(t, -1) for t in self.skill_texts], dtype=np.int64)
+
+    @staticmethod
+    def query_key(skill: str) -> str:
+        """Case-folded surface form used to de-duplicate extracted skills."""
+        return " ".join(skill.split()).casefold()
+
+    def _result(self, skill: str, text_idx: int, score: float):
+        row_pos = self._text_rows[text_idx]
+        if row_pos < 0:
+            return None
+        row = self._rows[row_pos]
+        return {
+            "original": skill,
+            "standard_skill": self.skill_texts[text_idx],
+            "category": row["category"],
+            "skill_id": row["skill_id"],
+            "score": round(score, 3),
+        }
+
+    def search(self, query_embeds: np.ndarray, language: Optional[str] = None, threshold: float = 0.65, k: int = 1):
+        """
+        Returns the (indices, scores) of the k best taxonomy texts per query.
+
+        With a `language`, queries are scored against that language block only; the
+        ones whose best in-language score is below `threshold + language_margin`
+        are re-scored against all languages and keep whichever top-1 is better.
+        """
+        index = self.language_indexes.get(language)
+        if index is None:
+            return self.index.search(query_embeds, k=k)
+
+        top_idx, top_scores = index.search(query_embeds, k=k)
+        top_idx = top_idx + self.language_blocks[language].start
+        poor = top_scores[:, 0] < threshold + self.language_margin
+        if poor.any():
+            full_idx, full_scores = self.index.search(query_embeds[poor], k=top_idx.shape[1])
+            better = full_scores[:, 0] > top_scores[poor, 0]
+            rows = np.flatnonzero(poor)[better]
+            top_idx[rows] = full_idx[better]
+            top_scores[rows] = full_scores[better]
+        return top_idx, top_scores
+
+    def _matches(self, queries: list, query_embeds: np.ndarray, language: Optional[str], threshold: float, k: int) -> SkillMatches:
+        # Fetch a runner-up plus enough slack to drop the same label repeated in other language blocks
+        top_idx, top_scores = self.search(query_embeds, language, threshold, k=max(k, 2) + len(LANGUAGES) - 1)
+        text_ids = self._text_ids[top_idx]
+        duplicate = np.tril(text_ids[:, :, None] == text_ids[:, None, :], -1).any(axis=2)
+        order = np.argsort(duplicate, axis=1, kind="stable")
+        top_idx = np.take_along_axis(top_idx, order, axis=1)
+        top_scores = np.where(
+            np.take_along_axis(duplicate, order, axis=1), -np.inf, np.take_along_axis(top_scores, order, axis=1)
+        ).astype(np.float32)
+
+        if top_scores.shape[1] > 1:
+            margin = np.where(np.isfinite(top_scores[:, 1]), top_scores[:, 0] - top_scores[:, 1], top_scores[:, 0])
+        else:
+            margin = top_scores[:, 0].copy()
+        k = min(k, top_idx.shape[1])
+        return SkillMatches(
+            queries=list(queries),
+            indices=top_idx[:, :k],
+            scores=top_scores[:, :k],
+            margin=margin,
+            accepted=top_scores[:, 0] >= threshold,
         )
-        self.skill_texts = list(set([s for s in self.skill_texts if len(s) > 1]))
-        self.embeddings = self.model.encode(self.skill_texts, convert_to_tensor=True)
 
-    def normalize(self, extracted_skills: list, threshold=0.65):
+    def match(self, queries: list, k: Optional[int] = None, threshold: float = 0.65, language: Optional[str] = None) -> SkillMatches:
+        """Scores `queries` and returns their top-k candidates, scores and margins as arrays."""
+        k = k or self.top_k
+        if not queries:
+            empty = np.zeros((0, k))
+            return SkillMatches([], empty.astype(np.int64), empty.astype(np.float32), np.zeros(0, np.float32), np.zeros(0, bool))
+        return self._matches(queries, self.encode_queries(list(queries)), language, threshold, k)
+
+    def normalize_many(self, skill_lists: list, threshold=0.65, batch_size: int = 256, languages: Optional[list] = None):
+        """
+        Normalizes the extracted skills of many jobs at once.
+
+        Surface forms are de-duplicated case-insensitively across the whole batch, so
+        each distinct skill is encoded and scored only once; results are mapped back
+        per job in the same shape as `normalize`. `languages` optionally gives each
+        job's posting language ('nl', 'fr', 'en', as from `detect_language`).
+        Every result carries the top-1/top-2 `margin`, and with `top_k` > 1 the
+        ranked `candidates` as well.
+        """
+        languages = languages or [None] * len(skill_lists)
+        positions = {}
+        queries = []
+        by_language = {}
+        for skills, lang in zip(skill_lists, languages):
+            for skill in skills or []:
+                key = self.query_key(skill)
+                if not key:
+                    continue
+                if key not in positions:
+                    positions[key] = len(queries)
+                    queries.append(skill.strip())
+                by_language.setdefault(lang, {})[key] = positions[key]
+
+        if not queries:
+            return [[] for _ in skill_lists]
+
+        query_embeds = self.encode_queries(queries, batch_size=batch_size)
+        matches = {}
+        for lang, keys in by_language.items():
+            rows = np.fromiter(keys.values(), dtype=np.int64, count=len(keys))
+            found = self._matches([queries[r] for r in rows], query_embeds[rows], lang, threshold, self.top_k)
+            for i, key in enumerate(keys):
+                matches[(lang, key)] = (found, i)
+
+        all_results = []
+        for skills, lang in zip(skill_lists, languages):
+            results = []
+            for skill in skills or []:
+                key = self.query_key(skill)
+                if not key:
+                    continue
+                found, i = matches[(lang, key)]
+                if not found.accepted[i]:
+                    continue
+                result = self._result(skill, int(found.indices[i, 0]), float(found.scores[i, 0]))
+                if result is None:
+                    continue
+                result["margin"] = round(float(found.margin[i]), 3)
+                if self.top_k > 1:
+                    result["candidates"] = [
+                        {"standard_skill": self.skill_texts[idx], "score": round(float(score), 3)}
+                        for idx, score in zip(found.indices[i].tolist(), found.scores[i].tolist())
+                        if np.isfinite(score)
+                    ]
+                results.append(result)
+            all_results.append(results)
+        return all_results
+
+    def normalize(self, extracted_skills: list, threshold=0.65, language: Optional[str] = None):
         if not extracted_skills:
             return []
-        query_embeds = self.model.encode(extracted_skills, convert_to_tensor=True)
-        cosine_scores = util.cos_sim(query_embeds, self.embeddings)
-
-        results = []
-        for i, skill in enumerate(extracted_skills):
-            best_idx = cosine_scores[i].argmax().item()
-            best_score = cosine_scores[i][best_idx].item()
-            if best_score >= threshold:
-                best_skill = self.skill_texts[best_idx]
-                # Find taxonomy row
-                row = self.taxonomy[
-                    (self.taxonomy["skill_nl"] == best_skill)
-                    | (self.taxonomy["skill_fr"] == best_skill)
-                    | (self.taxonomy["skill_en"] == best_skill)
-                ].head(1)
-                if not row.empty:
-                    results.append({
-                        "original": skill,
-                        "standard_skill": best_skill,
-                        "category": row["category"].iloc[0],
-                        "score": round(best_score, 3),
-                    })
-        return results
+        return self.normalize_many([extracted_skills], threshold=threshold, languages=[language])[0]
@@ -0,0 +1,92 @@
+
+"""Reduced-precision storage for the pre-normalized taxonomy embedding matrix."""
+
+from typing import Optional
+
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+
+
+class QuantizedMatrix:
+    """
+    Taxonomy matrix kept in float16, or in symmetric int8 with one scale per row.
+
+    Rows are L2-normalized before quantization, so a cosine score is a plain dot
+    product. Scoring dequantizes `block_rows` rows at a time into float32 and runs
+    a BLAS matmul on the block, which keeps the resident copy small without giving
+    up vectorized scoring (numpy has no fast float16/int8 GEMM on CPU).
+    """
+
+    def __init__(self, data: np.ndarray, scales: Optional[np.ndarray] = None, block_rows: int = 4096):
+        self.data = data
+        self.scales = scales
+        self.block_rows = block_rows
+        self.precision = "int8" if scales is not None else "float16"
+
+    @classmethod
+    def quantize(cls, matrix: np.ndarray, precision: str, block_rows: int = 4096):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if precision == "float16":
+            return cls(matrix.astype(np.float16), None, block_rows)
+        if precision == "int8":
+            scales = np.abs(matrix).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            data = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+            return cls(data, scales.astype(np.float32), block_rows)
+        raise ValueError(f"Unsupported precision: {precision} (expected one of {PRECISIONS})")
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0))
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def rows(self, start: int, stop: int) -> "QuantizedMatrix":
+        """Zero-copy view of a contiguous block of rows."""
+        scales = self.scales[start:stop] if self.scales is not None else None
+        return QuantizedMatrix(self.data[start:stop], scales, self.block_rows)
+
+    def __getitem__(self, rows) -> np.ndarray:
+        """Dequantized float32 rows (used by the IVF index to gather candidates)."""
+        block = self.data[rows].astype(np.float32)
+        if self.scales is not None:
+            block *= self.scales[rows][..., None]
+        return block
+
+    def dot(self, queries: np.ndarray) -> np.ndarray:
+        """Returns `queries @ matrix.T` as float32, scoring one row block at a time."""
+        queries = np.asarray(queries, dtype=np.float32)
+        out = np.empty((queries.shape[0], self.data.shape[0]), dtype=np.float32)
+        for start in range(0, self.data.shape[0], self.block_rows):
+            stop = start + self.block_rows
+            block = self.data[start:stop].astype(np.float32)
+            np.matmul(queries, block.T, out=out[:, start:stop])
+            if self.scales is not None:
+                out[:, start:stop] *= self.scales[start:stop]
+        return out
+
+
+def matrix_dot(queries: np.ndarray, matrix) -> np.ndarray:
+    """`queries @ matrix.T` for either a plain float32 array or a QuantizedMatrix."""
+    if isinstance(matrix, QuantizedMatrix):
+        return matrix.dot(queries)
+    return queries @ matrix.T
+
+
+def matrix_rows(matrix, rows: slice):
+    """Contiguous row block of a plain array or QuantizedMatrix, without copying."""
+    if isinstance(matrix, QuantizedMatrix):
+        return matrix.rows(rows.start, rows.stop)
+    return matrix[rows]
+
+
+def matrix_nbytes(matrix) -> int:
+    if isinstance(matrix, QuantizedMatrix):
+        return matrix.nbytes
+    return int(matrix.nbytes)
@@ -0,0 +1,115 @@
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings, keyed on normalized skill text.
+
+    Entries are evicted (least recently used first) once either `max_entries` or
+    `max_bytes` is exceeded. With `persist_path` set, the cache is loaded on start
+    and written back by `save()`; entries from another model are ignored.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int = 50000,
+        max_bytes: int = 64 * 2**20,
+        persist_path: Optional[str] = None,
+    ):
+        self.model_name = model_name
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self.persist_path = persist_path
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if persist_path:
+            self.load()
+
+    @staticmethod
+    def _entry_size(key: str, vector: np.ndarray) -> int:
+        return sys.getsizeof(key) + vector.nbytes
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Returns the cached vectors for `keys`, counting a hit or miss for each key."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                found[key] = vector
+        return found
+
+    def put(self, key: str, vector: np.ndarray):
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= self._entry_size(key, old)
+            self._entries[key] = vector
+            self._bytes += self._entry_size(key, vector)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                old_key, old_vector = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(old_key, old_vector)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def load(self):
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with np.load(self.persist_path, allow_pickle=False) as data:
+                if str(data["model"]) != self.model_name:
+                    return
+                keys = data["keys"].tolist()
+                vectors = data["vectors"]
+        except (OSError, ValueError, KeyError):
+            return
+        # Stored least-recent first, so re-inserting in order restores the LRU order
+        for key, vector in zip(keys, vectors):
+            self.put(key, np.array(vector))
+
+    def save(self):
+        if not self.persist_path:
+            return
+        with self._lock:
+            keys = list(self._entries.keys())
+            vectors = list(self._entries.values())
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.persist_path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                model=np.array(self.model_name),
+                keys=np.array(keys, dtype=str),
+                vectors=np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32),
+            )
+        os.replace(tmp, self.persist_path)
@@ -0,0 +1,130 @@
+
+"""Async per-provider concurrency and rate limiting for LLM calls."""
+
+import asyncio
+import time
+from typing import Optional
+
+# Rough completion size of a JSON skill list, reserved up front in the tokens/min bucket
+COMPLETION_TOKEN_ESTIMATE = 256
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for NL/FR/EN prose)."""
+    return max(1, len(text) // 4)
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    msg = str(exc).lower()
+    if getattr(exc, "status_code", None) == 429:
+        return True
+    return any(k in msg for k in ("rate", "quota", "429", "resourceexhausted", "rate_limit"))
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """Reads a Retry-After header from the HTTP response attached to an SDK exception, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate_per_minute`, holding at most one minute's worth."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class ProviderLimiter:
+    """
+    Keeps up to `max_in_flight` requests running against one provider, paced by
+    requests/min and tokens/min buckets.
+
+    Rate-limit responses shrink the in-flight limit (halving, AIMD-style) and
+    pause new requests for the server's Retry-After, or an exponential backoff
+    when there is none. Each run of successes grows the limit back by one.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.limit = self.max_in_flight
+        self.in_flight = 0
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.cooldown_until = 0.0
+        self.backoff = 1.0
+        self._successes = 0
+        self._cond = asyncio.Condition()
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0}
+
+    async def acquire(self, tokens: int = 0):
+        """Takes an in-flight slot, then waits out any cooldown and the rate buckets; pair with `release`."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        try:
+            delay = self.cooldown_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.requests is not None:
+                await self.requests.acquire(1)
+            if self.tokens is not None and tokens:
+                await self.tokens.acquire(tokens)
+        except BaseException:
+            # Cancelled while waiting (e.g. a hedged request that lost): the caller never
+            # gets to `release`, so the slot is given back here
+            async with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+            raise
+        self.stats["requests"] += 1
+
+    async def release(self, throttled: bool = False, failed: bool = False, retry_after: Optional[float] = None):
+        async with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.stats["throttled"] += 1
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+                pause = retry_after if retry_after is not None else self.backoff
+                self.cooldown_until = max(self.cooldown_until, time.monotonic() + pause)
+                self.backoff = min(self.backoff * 2, 60.0)
+            elif failed:
+                self.stats["errors"] += 1
+            else:
+                self.backoff = 1.0
+                self._successes += 1
+                if self.limit < self.max_in_flight and self._successes >= self.limit:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
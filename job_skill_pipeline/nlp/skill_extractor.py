@@ -1,16 +1,36 @@
 
 """Skill extractor using LangChain LLMs with import shims and language detection."""
 
+import asyncio
+import contextvars
 import json
 import os
+import re
+import threading
+import time
 import openai
+from collections import OrderedDict
+from contextlib import contextmanager
 from dotenv import load_dotenv
-from langdetect import detect, DetectorFactory
 from difflib import SequenceMatcher
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
-# Fix deterministic language detection results
-DetectorFactory.seed = 0
+from nlp.audience_filter import audience_filter
+from nlp.fuzzy_index import FuzzyIndex
+from nlp.gazetteer import GAZETTEER_MODES, Gazetteer
+from nlp.hedging import HedgePolicy
+from nlp.language import detect_language
+from nlp.llm_cache import LLMResponseCache
+from nlp.llm_clients import ClientPool
+from nlp.metrics import MetricsSink, estimate_cost
+from nlp.mock_llm import MockLLMServer
+from nlp.rate_limit import (
+    COMPLETION_TOKEN_ESTIMATE,
+    ProviderLimiter,
+    estimate_tokens,
+    is_rate_limit_error,
+    retry_after_seconds,
+)
 
 # --- LLM imports with backward compatibility ---
 try:
@@ -45,11 +65,55 @@ try:
 except Exception:
     genai = None
 
+# Taxonomy label lists whose fuzzy index is kept (one per language is typical)
+FUZZY_INDEX_CACHE_SIZE = 8
+
+# Model asked of a hedge provider when no hedge_model is given
+HEDGE_DEFAULT_MODELS = {"openai": "gpt-4o-mini", "gemini": "gemini-2.0-flash", "mock": "mock"}
+
+# Metrics record of the extraction running in the current thread / task (None without a sink)
+_CALL = contextvars.ContextVar("skill_extractor_call", default=None)
+
+
+def _note(**fields):
+    """Sets fields on the current extraction's metrics record."""
+    record = _CALL.get()
+    if record is not None:
+        record.update(fields)
+
+
+def _count(name: str, n: float = 1):
+    record = _CALL.get()
+    if record is not None:
+        record[name] = record.get(name, 0) + n
+
 
 class SkillExtractor:
     """Extracts and normalizes skill names from multilingual job descriptions."""
 
-    def __init__(self, provider: str = "auto", model_name: Optional[str] = None, max_retries: int = 3):
+    def __init__(
+        self,
+        provider: str = "auto",
+        model_name: Optional[str] = None,
+        max_retries: int = 3,
+        max_in_flight: int = 8,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        base_url: Optional[str] = None,
+        cache_path: Optional[str] = None,
+        cache_max_mb: float = 512,
+        refresh_cache: bool = False,
+        max_connections: int = 20,
+        client_pool: Optional[ClientPool] = None,
+        gazetteer: Optional[Gazetteer] = None,
+        gazetteer_mode: str = "off",
+        gazetteer_min_uncovered: int = 30,
+        hedge: bool = False,
+        hedge_provider: Optional[str] = None,
+        hedge_model: Optional[str] = None,
+        hedge_percentile: float = 95.0,
+        metrics: Optional[MetricsSink] = None,
+    ):
         load_dotenv()
         # allow overriding model and provider
         self.model_name = model_name or "gemini-2.0-flash"
@@ -94,6 +158,22 @@ class SkillExtractor:
             ),
         )
 
+        # Batch prompt: several postings per request, answered as one JSON object keyed by job id
+        self.batch_prompt = PromptTemplate(
+            input_variables=["postings"],
+            template=(
+                "You are an expert in multilingual job description analysis. "
+                "For EACH job posting below, extract only professional, technical, and soft skills (tools, technologies, competencies, certifications, methodologies). "
+                "Do NOT list audiences, recipient groups, departments or people groups (for example: 'production', 'management', 'customers') when they are mentioned as recipients of an action (e.g. 'communicate with production people', 'report to management'). "
+                "Respond only with a JSON object that maps every job id to a JSON array of skill names (strings) in the original language of that posting. Include every job id, using [] when a posting has no skills. Do not include any explanation or extra text.\n\n"
+                "Example:\n"
+                "### J1\nYou are an AI expert and communicate with production people\n"
+                "### J2\nResponsible for reporting to production and managing release pipelines\n"
+                "Output: {{\"J1\": [\"AI\"], \"J2\": [\"release pipelines\", \"reporting\"]}}\n\n"
+                "Postings:\n{postings}\n\nJSON object:"
+            ),
+        )
+
         if LLMChain is not None and self.use_langchain:
             self.chain = LLMChain(llm=self.llm, prompt=self.prompt)
         else:
@@ -103,7 +183,20 @@ class SkillExtractor:
         # Prefer OpenAI if the key is present in the environment
         self.openai_api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_KEY")
         self.use_openai = False
-        if self.openai_api_key:
+
+        # Mock provider: OpenAI-compatible local stand-in (MOCK_LLM_URL / base_url, or one started in-process).
+        # It has its own endpoint and no real key, also as the hedge of a real provider
+        self.mock_server = None
+        self.mock_url = None
+        if "mock" in (self.forced_provider, hedge_provider):
+            self.mock_url = (base_url if self.forced_provider == "mock" else None) or os.getenv("MOCK_LLM_URL")
+            if not self.mock_url:
+                self.mock_server = MockLLMServer().start()
+                self.mock_url = self.mock_server.url
+        if self.forced_provider == "mock":
+            base_url = None
+            self.use_openai = True
+        elif self.openai_api_key:
             try:
                 # set for older code paths
                 openai.api_key = self.openai_api_key
@@ -112,15 +205,47 @@ class SkillExtractor:
             # prefer OpenAI when a key exists
             self.use_openai = True
 
+        # Async path: per-provider in-flight / requests-per-minute / tokens-per-minute limits
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._limiters = {}
+        # Long-lived clients: keep-alive connections survive across postings and retries
+        self.clients = client_pool or ClientPool(max_connections=max_connections)
+
+        # Persistent cache of raw LLM answers; refresh_cache re-queries and overwrites entries
+        self.cache = LLMResponseCache(cache_path, int(cache_max_mb * 2**20)) if cache_path else None
+        self.refresh_cache = refresh_cache
+
+        # LRU of fuzzy indexes over the taxonomy_skills lists passed to extract, keyed by their labels
+        self._fuzzy_indexes = OrderedDict()
+        self._fuzzy_lock = threading.Lock()
+
+        # Local taxonomy matcher run before the LLM: "off", "hybrid" (LLM only for postings with
+        # at least gazetteer_min_uncovered uncovered content words) or "only" (never call the LLM)
+        if gazetteer_mode not in GAZETTEER_MODES:
+            raise ValueError(f"Unknown gazetteer mode: {gazetteer_mode} (expected one of {GAZETTEER_MODES})")
+        self.gazetteer = gazetteer
+        self.gazetteer_mode = gazetteer_mode if gazetteer is not None else "off"
+        self.gazetteer_min_uncovered = gazetteer_min_uncovered
+        self.gazetteer_stats = {"postings": 0, "llm_calls_avoided": 0, "gazetteer_skills": 0}
+
+        # Hedging: duplicate requests slower than the provider's recent p95 to a secondary
+        # provider (hedge_provider, or the other of OpenAI/Gemini) and circuit-break failing ones.
+        # The secondary is asked for hedge_model, or its own default model (see `_model_for`)
+        self.hedging = HedgePolicy(percentile=hedge_percentile) if hedge else None
+        self.hedge_provider = hedge_provider
+        self.hedge_model = hedge_model
+
+        # Per-posting metrics (provider, model, tokens, wall time, retries, JSON fallback)
+        self.metrics = metrics
+
     # ------------------------------------------------------------------
     # 🔹 Helper: Detect dominant language (NL, FR, EN)
     # ------------------------------------------------------------------
     def detect_language(self, text: str) -> str:
-        try:
-            lang = detect(text)
-            return {"nl": "nl", "fr": "fr", "en": "en"}.get(lang, "en")
-        except Exception:
-            return "en"
+        return detect_language(text)
 
     # ------------------------------------------------------------------
     # 🔹 Helper: Compute text similarity
@@ -128,29 +253,308 @@ class SkillExtractor:
     def similarity(self, a: str, b: str) -> float:
         return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
+    def _fuzzy_index(self, labels: List[str]) -> FuzzyIndex:
+        """Index over one language's taxonomy list, built once per distinct list (the last few are kept)."""
+        key = tuple(labels)
+        with self._fuzzy_lock:
+            index = self._fuzzy_indexes.get(key)
+            if index is not None:
+                self._fuzzy_indexes.move_to_end(key)
+                return index
+        index = FuzzyIndex(labels)
+        with self._fuzzy_lock:
+            self._fuzzy_indexes[key] = index
+            while len(self._fuzzy_indexes) > FUZZY_INDEX_CACHE_SIZE:
+                self._fuzzy_indexes.popitem(last=False)
+        return index
+
     # ------------------------------------------------------------------
     # 🔹 Core extractor
     # ------------------------------------------------------------------
-    def extract(self, text: str, job_title: str = "", taxonomy_skills: dict = None) -> List[str]:
-        """Extracts skills from the text, filters by language, excludes job title matches."""
+    def extract(
+        self, text: str, job_title: str = "", taxonomy_skills: dict = None, meta: Optional[dict] = None, language: Optional[str] = None
+    ) -> List[str]:
+        """
+        Extracts skills from the text, filters by language, excludes job title matches.
+        `meta` (e.g. job_id, domain) is copied into the posting's metrics record.
+        `language` is the text's language when the caller already detected it.
+        """
+        with self._metered(meta):
+            return self._extract(text, job_title, taxonomy_skills, self._gazetteer_pass(text), language)
 
-        if self.chain is not None:
-            result = self.chain.run({"text": text})
+    def _extract(
+        self, text: str, job_title: str, taxonomy_skills: dict, local: Tuple[List[str], bool], language: Optional[str] = None
+    ) -> List[str]:
+        local_skills, skip_llm = local
+        if skip_llm:
+            _note(llm_skipped=True)
+            return self._postprocess(json.dumps(local_skills, ensure_ascii=False), text, job_title, taxonomy_skills, language=language)
+
+        key, result = self._cached_response(text)
+        if result is None:
+            prompt_text = self.prompt.format(text=text)
+            if self.chain is not None:
+                result = self.chain.run({"text": text})
+                self._note_call(self._active_provider(), prompt_text, result)
+            else:
+                provider, result = self._run_llm(prompt_text)
+                key = self._response_key(text, provider=provider)
+            self._store_response(key, result)
+        else:
+            _note(cached=True)
+
+        return self._postprocess(result, text, job_title, taxonomy_skills, extra=local_skills, language=language)
+
+    async def aextract(
+        self, text: str, job_title: str = "", taxonomy_skills: dict = None, meta: Optional[dict] = None, language: Optional[str] = None
+    ) -> List[str]:
+        """Async `extract`: the LLM call runs under the provider's concurrency and rate limits."""
+        with self._metered(meta):
+            return await self._aextract(text, job_title, taxonomy_skills, self._gazetteer_pass(text), language)
+
+    async def _aextract(
+        self, text: str, job_title: str, taxonomy_skills: dict, local: Tuple[List[str], bool], language: Optional[str] = None
+    ) -> List[str]:
+        local_skills, skip_llm = local
+        if skip_llm:
+            _note(llm_skipped=True)
+            return self._postprocess(json.dumps(local_skills, ensure_ascii=False), text, job_title, taxonomy_skills, language=language)
+
+        key, result = self._cached_response(text)
+        if result is not None:
+            _note(cached=True)
         else:
             prompt_text = self.prompt.format(text=text)
-            result = self._run_llm(prompt_text)
+            if self.chain is not None:
+                _, result = await self._arun_llm(prompt_text, call=lambda: asyncio.to_thread(self.chain.run, {"text": text}))
+            else:
+                provider, result = await self._arun_llm(prompt_text)
+                key = self._response_key(text, provider=provider)
+            self._store_response(key, result)
+        return self._postprocess(result, text, job_title, taxonomy_skills, extra=local_skills, language=language)
+
+    async def aextract_many(
+        self, texts: List[str], job_titles: Optional[List[str]] = None, taxonomy_skills: dict = None, metas: Optional[List[dict]] = None
+    ) -> list:
+        """Extracts many postings concurrently; a failed posting yields its exception instead of a list."""
+        job_titles = job_titles or [""] * len(texts)
+        metas = metas or [None] * len(texts)
+        return await asyncio.gather(
+            *(self.aextract(text, title, taxonomy_skills, meta) for text, title, meta in zip(texts, job_titles, metas)),
+            return_exceptions=True,
+        )
+
+    # ------------------------------------------------------------------
+    # 🔹 Gazetteer pre-extraction
+    # ------------------------------------------------------------------
+    def _gazetteer_pass(self, text: str) -> Tuple[List[str], bool]:
+        """Returns (taxonomy labels found literally in the text, whether the LLM call can be skipped)."""
+        if self.gazetteer_mode == "off":
+            return [], False
+        coverage = self.gazetteer.coverage(text)
+        skip_llm = self.gazetteer_mode == "only" or coverage.uncovered_words < self.gazetteer_min_uncovered
+        self.gazetteer_stats["postings"] += 1
+        self.gazetteer_stats["llm_calls_avoided"] += int(skip_llm)
+        self.gazetteer_stats["gazetteer_skills"] += len(coverage.skills)
+        return coverage.skills, skip_llm
+
+    def gazetteer_report(self) -> dict:
+        """Postings seen by the gazetteer and how many of them needed no LLM call."""
+        stats = dict(self.gazetteer_stats)
+        stats["llm_calls_avoided_rate"] = stats["llm_calls_avoided"] / stats["postings"] if stats["postings"] else 0.0
+        return stats
+
+    # ------------------------------------------------------------------
+    # 🔹 Multi-posting batches
+    # ------------------------------------------------------------------
+    def _pack_batches(self, jobs: List[dict], token_budget: int, max_postings: int) -> List[List[dict]]:
+        """Greedily packs postings into batches whose estimated prompt size stays within `token_budget`."""
+        overhead = estimate_tokens(self.batch_prompt.template)
+        batches, current, used = [], [], overhead
+        for job in jobs:
+            cost = estimate_tokens(job["text"]) + 8  # posting text plus its '### Jn' header
+            if current and (used + cost > token_budget or len(current) >= max_postings):
+                batches.append(current)
+                current, used = [], overhead
+            current.append(job)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _batch_prompt_text(self, batch: List[dict]) -> str:
+        postings = "\n".join(f"### J{i + 1}\n{job['text']}" for i, job in enumerate(batch))
+        return self.batch_prompt.format(postings=postings)
+
+    @staticmethod
+    def _parse_batch_answer(result: str, batch: List[dict]) -> Dict[str, list]:
+        """Maps the answer's 'Jn' aliases back to job ids; postings missing from the answer are left out."""
+        text = (result or "").strip()
+        fenced = re.search(r"\{.*\}", text, flags=re.DOTALL)
+        try:
+            answer = json.loads(fenced.group(0) if fenced else text)
+        except Exception:
+            return {}
+        if not isinstance(answer, dict):
+            return {}
+        parsed = {}
+        for i, job in enumerate(batch):
+            skills = answer.get(f"J{i + 1}")
+            if isinstance(skills, list):
+                parsed[job["job_id"]] = skills
+        return parsed
 
+    def _batch_pending(self, jobs: List[dict], results: dict) -> List[dict]:
+        """Fills `results` from the response cache and returns the postings that still need the LLM."""
+        pending = []
+        for job in jobs:
+            with self._metered(self._job_meta(job), emit=False) as record:
+                job["gazetteer"] = self._gazetteer_pass(job["text"])
+                local_skills, skip_llm = job["gazetteer"]
+                if skip_llm:
+                    _note(llm_skipped=True)
+                    results[job["job_id"]] = self._postprocess(
+                        json.dumps(local_skills, ensure_ascii=False), job["text"], job.get("job_title", ""), job.get("taxonomy_skills"),
+                        language=job.get("language"),
+                    )
+                else:
+                    _, cached = self._cached_response(job["text"])
+                    if cached is None:
+                        _, cached = self._cached_response(job["text"], self.batch_prompt.template)
+                    if cached is not None:
+                        _note(cached=True)
+                        results[job["job_id"]] = self._postprocess(
+                            cached, job["text"], job.get("job_title", ""), job.get("taxonomy_skills"), extra=local_skills,
+                            language=job.get("language"),
+                        )
+            if skip_llm or cached is not None:
+                self._emit(record)
+            else:
+                pending.append(job)
+        return pending
+
+    def _batch_accept(
+        self, batch: List[dict], answers: Dict[str, list], results: dict, call_record: Optional[dict] = None, provider: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Stores answered postings and returns the ones the model left out. Each
+        answered posting's metrics get a share of the batch request's tokens and
+        calls proportional to its text size. Answers are cached under `provider`,
+        the provider that answered the batch.
+        """
+        missing = []
+        weights = [estimate_tokens(job["text"]) for job in batch]
+        for job, weight in zip(batch, weights):
+            skills = answers.get(job["job_id"])
+            if skills is None:
+                missing.append(job)
+                continue
+            with self._metered(self._job_meta(job), base=self._batch_share(call_record, weight / sum(weights), len(batch))):
+                raw = json.dumps(skills, ensure_ascii=False)
+                self._store_response(self._response_key(job["text"], self.batch_prompt.template, provider), raw)
+                results[job["job_id"]] = self._postprocess(
+                    raw, job["text"], job.get("job_title", ""), job.get("taxonomy_skills"), extra=job["gazetteer"][0],
+                    language=job.get("language"),
+                )
+        return missing
+
+    def extract_batch(self, jobs: List[dict], taxonomy_skills: dict = None, token_budget: int = 6000, max_postings: int = 20) -> Dict[str, List[str]]:
+        """
+        Extracts skills for many postings with few requests. `jobs` are dicts with
+        `job_id`, `text` and optionally `job_title` and `language`. Postings are packed into prompts
+        of up to `token_budget` estimated tokens; any posting whose id is missing from
+        the model's answer is re-issued on its own through `extract`.
+        """
+        jobs = [dict(job, taxonomy_skills=taxonomy_skills) for job in jobs]
+        results = {}
+        for batch in self._pack_batches(self._batch_pending(jobs, results), token_budget, max_postings):
+            if len(batch) == 1:
+                missing = batch
+            else:
+                with self._metered(emit=False) as call_record:
+                    provider, raw = self._run_llm(self._batch_prompt_text(batch))
+                missing = self._batch_accept(batch, self._parse_batch_answer(raw, batch), results, call_record, provider)
+            for job in missing:
+                with self._metered(self._job_meta(job)):
+                    results[job["job_id"]] = self._extract(job["text"], job.get("job_title", ""), taxonomy_skills, job["gazetteer"], job.get("language"))
+        return results
+
+    async def aextract_batch(self, jobs: List[dict], taxonomy_skills: dict = None, token_budget: int = 6000, max_postings: int = 20) -> Dict[str, List[str]]:
+        """Async `extract_batch`: batches are sent concurrently under the provider limits."""
+        jobs = [dict(job, taxonomy_skills=taxonomy_skills) for job in jobs]
+        results = {}
+
+        async def run(batch):
+            if len(batch) == 1:
+                missing = batch
+            else:
+                with self._metered(emit=False) as call_record:
+                    provider, raw = await self._arun_llm(self._batch_prompt_text(batch))
+                missing = self._batch_accept(batch, self._parse_batch_answer(raw, batch), results, call_record, provider)
+            for job in missing:
+                with self._metered(self._job_meta(job)):
+                    results[job["job_id"]] = await self._aextract(
+                        job["text"], job.get("job_title", ""), taxonomy_skills, job["gazetteer"], job.get("language")
+                    )
+
+        batches = self._pack_batches(self._batch_pending(jobs, results), token_budget, max_postings)
+        await asyncio.gather(*(run(batch) for batch in batches))
+        return results
+
+    # ------------------------------------------------------------------
+    # 🔹 Response cache
+    # ------------------------------------------------------------------
+    def _response_key(self, text: str, template: Optional[str] = None, provider: Optional[str] = None) -> Optional[str]:
+        """Cache key of an answer from `provider` (default: the active one); None without a cache."""
+        if self.cache is None:
+            return None
+        provider = provider or self._active_provider()
+        return LLMResponseCache.make_key(
+            template or self.prompt.template, provider, self._model_for(provider), self.temperature, text
+        )
+
+    def _cached_response(self, text: str, template: Optional[str] = None):
+        """Returns (cache key, cached raw answer or None); the key is None without a cache."""
+        key = self._response_key(text, template)
+        if key is None:
+            return None, None
+        if self.refresh_cache:
+            return key, None
+        return key, self.cache.get(key)
+
+    def _store_response(self, key: Optional[str], result):
+        if key is not None and isinstance(result, str):
+            self.cache.put(key, result)
+
+    # ------------------------------------------------------------------
+    # 🔹 Post-processing of the raw LLM answer
+    # ------------------------------------------------------------------
+    def _postprocess(
+        self,
+        result: str,
+        text: str,
+        job_title: str = "",
+        taxonomy_skills: dict = None,
+        extra: Optional[List[str]] = None,
+        language: Optional[str] = None,
+    ) -> List[str]:
         # Parse JSON safely
         try:
             skills = json.loads(result)
             extracted = [s.strip() for s in skills if isinstance(s, str)]
         except Exception:
+            _note(json_fallback=True)
             extracted = [s.strip() for s in result.split(",") if len(s.strip()) > 1]
 
+        # Taxonomy labels the gazetteer found literally in the text, unless the LLM already listed them
+        if extra:
+            seen = {s.lower() for s in extracted}
+            extracted += [s for s in extra if s.lower() not in seen]
+
         # ------------------------------------------------------------------
-        # 🧠 Detect language of the job text
+        # 🧠 Detect language of the job text (unless the caller already did)
         # ------------------------------------------------------------------
-        job_lang = self.detect_language(text)
+        job_lang = language or self.detect_language(text)
 
         # ------------------------------------------------------------------
         # 🚫 Filter out job title duplicates
@@ -165,59 +569,20 @@ class SkillExtractor:
         # If a candidate term is used as a recipient/audience in the text
         # (e.g. 'communicate with production people'), drop it as a skill.
         # ------------------------------------------------------------------
-        def is_audience_mention(term: str, full_text: str) -> bool:
-            import re
-            t = re.escape(term.lower())
-            txt = full_text.lower()
-
-            # language-specific patterns
-            lang = self.detect_language(full_text)
-            patterns = []
-            if lang == 'en':
-                patterns = [
-                    rf"\b(with|to|for|among|together with|work with|work closely with|communicat(?:e|ing|ed) with|liaise with|coordinate with|report to)\b(?:\s+\w+){{0,5}}\s+{t}\b",
-                    rf"\b{t}\b\s+(people|team|department|colleagues|stakeholders|customers|clients)\b",
-                ]
-            elif lang == 'nl':
-                # Dutch patterns: 'met', 'naar', 'voor', 'samen met', 'werken met', 'rapporteren aan', 'communiceren met', etc.
-                patterns = [
-                    rf"\b(met|naar|voor|samen met|werken met|werk samen met|communiceren met|rapporteren aan|contact met|afstemming met)\b(?:\s+\w+){{0,5}}\s+{t}\b",
-                    rf"\b{t}\b\s+(mensen|team|afdeling|collega's|belanghebbenden|klanten)\b",
-                ]
-            elif lang == 'fr':
-                # French patterns: 'avec', 'pour', 'auprès de', 'travailler avec', 'rapporter à', 'communiquer avec'
-                patterns = [
-                    rf"\b(avec|pour|auprès de|travailler avec|reporter à|communiquer avec|coordonner avec|prendre contact avec)\b(?:\s+\w+){{0,5}}\s+{t}\b",
-                    rf"\b{t}\b\s+(personnes|équipe|département|collègues|parties prenantes|clients)\b",
-                ]
-            else:
-                # fallback to English-like patterns
-                patterns = [
-                    rf"\b(with|to|for|among|together with|work with|communicat(?:e|ing|ed) with|report to)\b(?:\s+\w+){{0,5}}\s+{t}\b",
-                    rf"\b{t}\b\s+(people|team|department|colleagues|stakeholders|customers|clients)\b",
-                ]
-
-            for p in patterns:
-                if re.search(p, txt):
-                    return True
-            return False
-
-        post_filtered = [s for s in filtered if not is_audience_mention(s, text)]
+        # The language detected above is reused; the pattern bank is compiled once
+        # and the text scanned once for all candidates.
+        post_filtered = audience_filter(filtered, text, job_lang)
 
         # ------------------------------------------------------------------
         # 🎯 Match only taxonomy skills in same language
         # ------------------------------------------------------------------
         if taxonomy_skills:
             standardized = []
+            index = self._fuzzy_index(taxonomy_skills.get(job_lang, []))
             for skill in post_filtered:
-                best_match = None
-                best_score = 0
-                for tskill in taxonomy_skills.get(job_lang, []):
-                    score = self.similarity(skill, tskill)
-                    if score > best_score:
-                        best_score = score
-                        best_match = tskill
-                if best_score > 0.75:  # threshold
+                # Same best match as scoring every taxonomy skill with `similarity`
+                best_match, _ = index.best_match(skill, threshold=0.75)
+                if best_match is not None:
                     standardized.append(best_match)
                 else:
                     standardized.append(skill)  # keep as-is if not matched
@@ -228,57 +593,310 @@ class SkillExtractor:
     # ------------------------------------------------------------------
     # 🔹 Fallback LLM caller
     # ------------------------------------------------------------------
-    def _run_llm(self, prompt_text: str) -> str:
-        """Handles Gemini or OpenAI raw API calls."""
-        import time
+    def _run_llm(self, prompt_text: str) -> Tuple[str, str]:
+        """Handles Gemini or OpenAI raw API calls; returns (provider that answered, raw answer)."""
         backoff = 1.0
-        last_exc = None
         attempts = max(1, self.max_retries + 1)
+        # If OpenAI key exists prefer OpenAI; otherwise use Gemini if configured
+        if self.use_openai:
+            provider = "mock" if self.forced_provider == "mock" else "openai"
+        elif self.use_genai and genai is not None:
+            provider = "gemini"
+        else:
+            provider = "openai-legacy"
         for attempt in range(attempts):
             try:
-                # If OpenAI key exists prefer OpenAI; otherwise use Gemini if configured
-                if self.use_openai:
-                    # Use the new OpenAI client (openai.OpenAI). The legacy
-                    # `openai.ChatCompletion` API was removed in openai>=1.0.
-                    Client = getattr(openai, "OpenAI", None)
-                    if Client is None:
-                        raise RuntimeError(
-                            "OpenAI client not available: please install openai>=1.0 and set OPENAI_API_KEY, or pin to openai==0.28 to use legacy API."
-                        )
-                    client = Client(api_key=self.openai_api_key) if self.openai_api_key else Client()
-                    resp = client.chat.completions.create(
-                        model=self.model_name,
-                        messages=[{"role": "user", "content": prompt_text}],
-                        temperature=self.temperature,
+                if self.hedging is not None:
+                    # The answer stays tagged with its provider: a hedge win must not be cached as the primary's
+                    return self.hedging.call(
+                        self._hedge_providers(provider),
+                        lambda p: (p, self._call_provider(p, prompt_text)),
+                        lambda answer: self._valid_answer(answer[1]),
                     )
-                    # New client: resp.choices[0].message.content
-                    try:
-                        return resp.choices[0].message.content
-                    except Exception:
-                        # Fallback to dict-like access
-                        return getattr(resp.choices[0].message, "content", str(resp))
-                elif self.use_genai and genai is not None:
-                    model = genai.GenerativeModel(self.model_name)
-                    resp = model.generate_content(prompt_text)
-                    if hasattr(resp, "text") and resp.text:
-                        return resp.text
-                    if getattr(resp, "candidates", None):
-                        first = resp.candidates[0]
-                        return getattr(first, "content", None) or getattr(first, "message", None) or str(first)
-                    return str(resp)
-                else:
-                    resp = openai.ChatCompletion.create(
-                        model=self.model_name,
-                        messages=[{"role": "user", "content": prompt_text}],
-                        temperature=self.temperature,
-                    )
-                    return resp["choices"][0]["message"]["content"]
+                return provider, self._call_provider(provider, prompt_text)
             except Exception as e:
-                last_exc = e
-                msg = str(e).lower()
-                is_transient = any(k in msg for k in ("rate", "quota", "429", "resourceexhausted", "rate_limit"))
+                is_transient = is_rate_limit_error(e)
                 if attempt < attempts - 1 and is_transient:
                     time.sleep(backoff)
                     backoff *= 2
+                    _count("retries")
+                    continue
+                raise RuntimeError(f"LLM request failed: {e}")
+
+    def _call_provider(self, provider: str, prompt_text: str) -> str:
+        """One blocking request to `provider`."""
+        if provider in ("openai", "mock"):
+            # Use the new OpenAI client (openai.OpenAI). The legacy
+            # `openai.ChatCompletion` API was removed in openai>=1.0.
+            client = self.clients.openai(*self._openai_endpoint(provider))
+            resp = client.chat.completions.create(
+                model=self._model_for(provider),
+                messages=[{"role": "user", "content": prompt_text}],
+                temperature=self.temperature,
+            )
+            return self._note_call(provider, prompt_text, self._openai_text(resp), resp)
+        if provider == "gemini":
+            model = self.clients.gemini(self._model_for(provider))
+            resp = model.generate_content(prompt_text)
+            return self._note_call(provider, prompt_text, self._genai_text(resp), resp)
+        resp = openai.ChatCompletion.create(
+            model=self._model_for(provider),
+            messages=[{"role": "user", "content": prompt_text}],
+            temperature=self.temperature,
+        )
+        return self._note_call(provider, prompt_text, resp["choices"][0]["message"]["content"], resp)
+
+    def _openai_endpoint(self, provider: str) -> Tuple[Optional[str], Optional[str]]:
+        """(api key, base url) of an OpenAI-compatible provider: the mock never gets the real key or endpoint."""
+        if provider == "mock":
+            return "mock", self.mock_url
+        return self.openai_api_key, self.base_url
+
+    @staticmethod
+    def _openai_text(resp) -> str:
+        # New client: resp.choices[0].message.content
+        try:
+            return resp.choices[0].message.content
+        except Exception:
+            # Fallback to dict-like access
+            return getattr(resp.choices[0].message, "content", str(resp))
+
+    @staticmethod
+    def _genai_text(resp) -> str:
+        if hasattr(resp, "text") and resp.text:
+            return resp.text
+        if getattr(resp, "candidates", None):
+            first = resp.candidates[0]
+            return getattr(first, "content", None) or getattr(first, "message", None) or str(first)
+        return str(resp)
+
+    def connection_stats(self) -> dict:
+        """Client reuse counters: requests, clients created, TCP connects and TLS handshakes."""
+        return self.clients.stats()
+
+    # ------------------------------------------------------------------
+    # 🔹 Async LLM caller (concurrent, rate limited)
+    # ------------------------------------------------------------------
+    def _active_provider(self) -> str:
+        """Provider used for raw API calls, in the same order of preference as `_run_llm`."""
+        if self.forced_provider == "mock":
+            return "mock"
+        if self.use_openai or self.chain is not None:
+            return "openai"
+        if self.use_genai and genai is not None:
+            return "gemini"
+        return "openai-legacy"
+
+    def _limiter(self, provider: str) -> ProviderLimiter:
+        # The limiter's asyncio primitives are bound to the event loop that first waits on them,
+        # so every loop (one per asyncio.run) gets its own, keyed on the loop as ClientPool does
+        key = (provider, asyncio.get_running_loop())
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = ProviderLimiter(self.max_in_flight, self.requests_per_minute, self.tokens_per_minute)
+            self._limiters[key] = limiter
+        return limiter
+
+    def limiter_stats(self, provider: str) -> Optional[dict]:
+        """Counters of the limiter `provider` used on the most recent event loop, if any."""
+        limiters = [limiter for (name, _), limiter in self._limiters.items() if name == provider]
+        return limiters[-1].stats if limiters else None
+
+    async def _acall_provider(self, provider: str, prompt_text: str) -> str:
+        if provider in ("openai", "mock"):
+            client = self.clients.async_openai(*self._openai_endpoint(provider))
+            resp = await client.chat.completions.create(
+                model=self._model_for(provider),
+                messages=[{"role": "user", "content": prompt_text}],
+                temperature=self.temperature,
+            )
+            return self._note_call(provider, prompt_text, self._openai_text(resp), resp)
+        if provider == "gemini":
+            model = self.clients.gemini(self._model_for(provider))
+            resp = await model.generate_content_async(prompt_text)
+            return self._note_call(provider, prompt_text, self._genai_text(resp), resp)
+        # Legacy client has no async API: run the blocking call off the event loop
+        # (the single request only; retries are left to `_arun_llm`)
+        return await asyncio.to_thread(self._call_provider, provider, prompt_text)
+
+    async def _acall_limited(self, provider: str, prompt_text: str, tokens: int, call=None, on_start=None) -> str:
+        """One request to `provider` holding a slot of its limiter, released even when cancelled (also while still waiting for it)."""
+        limiter = self._limiter(provider)
+        await limiter.acquire(tokens)
+        if on_start is not None:
+            on_start()
+        throttled, failed, retry_after = False, False, None
+        try:
+            if call is not None:
+                return self._note_call(provider, prompt_text, await call())
+            return await self._acall_provider(provider, prompt_text)
+        except Exception as e:
+            throttled = is_rate_limit_error(e)
+            failed = not throttled
+            retry_after = retry_after_seconds(e)
+            raise
+        finally:
+            await limiter.release(throttled=throttled, failed=failed, retry_after=retry_after)
+
+    async def _arun_llm(self, prompt_text: str, call=None) -> Tuple[str, str]:
+        """
+        Runs one LLM request under the provider limiter and returns (provider that
+        answered, raw answer). Rate-limit errors are retried after the limiter's
+        adaptive pause (Retry-After or exponential backoff) instead of a fixed sleep;
+        other errors fail immediately.
+        """
+        provider = self._active_provider()
+        tokens = estimate_tokens(prompt_text) + COMPLETION_TOKEN_ESTIMATE
+        attempts = max(1, self.max_retries + 1)
+
+        async def answer(p, on_start):
+            return p, await self._acall_limited(p, prompt_text, tokens, on_start=on_start)
+
+        for attempt in range(attempts):
+            try:
+                if self.hedging is not None and call is None:
+                    return await self.hedging.acall(
+                        self._hedge_providers(provider), answer, lambda a: self._valid_answer(a[1])
+                    )
+                return provider, await self._acall_limited(provider, prompt_text, tokens, call)
+            except Exception as e:
+                if is_rate_limit_error(e) and attempt < attempts - 1:
+                    _count("retries")
                     continue
                 raise RuntimeError(f"LLM request failed: {e}")
+
+    # ------------------------------------------------------------------
+    # 🔹 Hedging / failover
+    # ------------------------------------------------------------------
+    def _hedge_providers(self, primary: str) -> List[str]:
+        """Primary provider first, then the one a slow or failing request is duplicated to."""
+        secondary = self.hedge_provider
+        if secondary is None:
+            if primary == "openai" and self.use_genai and genai is not None:
+                secondary = "gemini"
+            elif primary == "gemini" and self.openai_api_key:
+                secondary = "openai"
+        return [primary, secondary] if secondary else [primary]
+
+    def _model_for(self, provider: str) -> str:
+        """Model asked of `provider`: `model_name` for the primary, else `hedge_model` or the provider's default."""
+        if provider == self._active_provider():
+            return self.model_name
+        return self.hedge_model or HEDGE_DEFAULT_MODELS.get(provider, self.model_name)
+
+    @staticmethod
+    def _valid_answer(result) -> bool:
+        """True when the answer holds the JSON the prompts ask for (an array, or an object for batches)."""
+        if not isinstance(result, str):
+            return False
+        match = re.search(r"[\[{].*[\]}]", result, flags=re.DOTALL)
+        try:
+            return isinstance(json.loads(match.group(0) if match else result), (list, dict))
+        except Exception:
+            return False
+
+    def hedging_stats(self) -> dict:
+        if self.hedging is None:
+            return {}
+        return {**self.hedging.stats, "breakers": self.hedging.breaker_states()}
+
+    # ------------------------------------------------------------------
+    # 🔹 Metrics
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _job_meta(job: dict) -> dict:
+        return {k: job[k] for k in ("job_id", "domain") if job.get(k) is not None}
+
+    @contextmanager
+    def _metered(self, meta: Optional[dict] = None, emit: bool = True, base: Optional[dict] = None):
+        """
+        Collects the metrics of one extraction: LLM calls made inside the block
+        (in this thread or task) add their tokens to the record, which is sent to
+        `self.metrics` on exit. Yields None when no sink is configured.
+        """
+        if self.metrics is None:
+            yield None
+            return
+        record = {
+            "provider": self._active_provider(),
+            "model": self.model_name,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "tokens_estimated": False,
+            "llm_calls": 0,
+            "retries": 0,
+            "cached": False,
+            "llm_skipped": False,
+            "json_fallback": False,
+            **(base or {}),
+            **(meta or {}),
+        }
+        token = _CALL.set(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _CALL.reset(token)
+            record.setdefault("wall_ms", round((time.perf_counter() - start) * 1000, 1))
+            if emit:
+                self._emit(record)
+
+    def _emit(self, record: Optional[dict]):
+        if self.metrics is None or record is None:
+            return
+        # The mock server is free whatever model name it is asked for
+        pricing_model = "mock" if record["provider"] == "mock" else record["model"]
+        cost = estimate_cost(pricing_model, record["prompt_tokens"], record["completion_tokens"])
+        record["cost_usd"] = None if cost is None else round(cost, 8)
+        self.metrics.record(record)
+
+    @staticmethod
+    def _batch_share(call_record: Optional[dict], share: float, batch_size: int) -> Optional[dict]:
+        """A posting's part of a batched request: tokens and calls split by `share`, the wall time and retries shared."""
+        if call_record is None:
+            return None
+        return {
+            "provider": call_record["provider"],
+            "model": call_record["model"],
+            "prompt_tokens": round(call_record["prompt_tokens"] * share, 1),
+            "completion_tokens": round(call_record["completion_tokens"] * share, 1),
+            "tokens_estimated": call_record["tokens_estimated"],
+            "llm_calls": round(call_record["llm_calls"] * share, 3),
+            "retries": call_record["retries"],
+            "wall_ms": call_record["wall_ms"],
+            "batch_size": batch_size,
+        }
+
+    @staticmethod
+    def _usage(resp) -> Optional[Tuple[int, int]]:
+        """(prompt, completion) tokens as reported by the API, when it reports them."""
+        usage = resp.get("usage") if isinstance(resp, dict) else getattr(resp, "usage", None)
+        if usage is not None:
+            get = usage.get if isinstance(usage, dict) else (lambda name: getattr(usage, name, None))
+            if get("prompt_tokens") is not None:
+                return int(get("prompt_tokens")), int(get("completion_tokens") or 0)
+        usage = getattr(resp, "usage_metadata", None)
+        if usage is not None and getattr(usage, "prompt_token_count", None) is not None:
+            return int(usage.prompt_token_count), int(getattr(usage, "candidates_token_count", 0) or 0)
+        return None
+
+    def _note_call(self, provider: str, prompt_text: str, answer, resp=None):
+        """Adds one completed LLM call to the current metrics record and returns `answer`."""
+        record = _CALL.get()
+        if record is not None:
+            usage = self._usage(resp) if resp is not None else None
+            if usage is None:
+                usage = (estimate_tokens(prompt_text), estimate_tokens(str(answer or "")))
+                record["tokens_estimated"] = True
+            record["provider"] = provider
+            record["model"] = self._model_for(provider)
+            record["llm_calls"] += 1
+            record["prompt_tokens"] += usage[0]
+            record["completion_tokens"] += usage[1]
+        return answer
+
+    def metrics_report(self) -> str:
+        return self.metrics.report() if self.metrics is not None else ""
@@ -1,7 +1,15 @@
 
+import hashlib
 import pandas as pd
 import os
 
+
+def make_skill_id(category, skill_nl, skill_fr, skill_en) -> str:
+    """Stable identifier for a taxonomy row, derived from its category and labels."""
+    parts = ["" if pd.isna(v) else str(v).strip() for v in (category, skill_nl, skill_fr, skill_en)]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
 class TaxonomyLoader:
     """
     Loads and merges multilingual Belgian skill taxonomies
@@ -27,6 +35,10 @@ class TaxonomyLoader:
         taxonomy_df = pd.concat(taxonomy_frames, ignore_index=True)
         taxonomy_df = taxonomy_df.drop_duplicates(subset=["skill_nl", "skill_fr", "skill_en"])
         taxonomy_df = taxonomy_df.dropna(subset=["skill_nl", "skill_fr"], how="all")
+        taxonomy_df["skill_id"] = [
+            make_skill_id(*row)
+            for row in taxonomy_df[["category", "skill_nl", "skill_fr", "skill_en"]].itertuples(index=False)
+        ]
 
         print(f"✅ Loaded taxonomy: {len(taxonomy_df)} total standardized skills from {len(xls.sheet_names)} sheets.")
         return taxonomy_df
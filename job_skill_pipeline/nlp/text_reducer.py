@@ -0,0 +1,189 @@
+
+"""Pre-LLM reduction of a scraped VDAB posting to its skill-bearing text, within a token budget."""
+
+import hashlib
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+from nlp.rate_limit import estimate_tokens
+
+# Skill-bearing sections, in the order they are kept when the budget runs out
+SKILL_SECTIONS = ("profiel", "professionele_vaardigheden", "functieomschrijving")
+
+# VDAB site chrome and application boilerplate found in scraped texts
+BOILERPLATE_PATTERNS = [
+    r"Ga naar de inhoud",
+    r"Vind een (?:job|opleiding)",
+    r"Log (?:in|uit)",
+    r"Ingelogd als Gebruikersnaam",
+    r"Solliciteer nu",
+    r"Bewaard Bewaar",
+    r"Meer info over dit bedrijf",
+    r"Bedrijfswebsite\s+\S+",
+    r"Online sinds:?\s*(?:\d+\s+dagen|\d{2}-\d{2}-\d{4}|gisteren|vandaag)",
+    r"Solliciteren tot en met:?\s*\d{1,2}\s+\w+\.?\s+\d{4}",
+    r"VDAB-vacaturenummer:?\s*\d+",
+    r"VDAB-beroep:?[^.]*?(?=\s+Online sinds|\.|$)",
+    r"(?:\S+\s+){0,8}?\S*\.pdf\s+PDF",
+    r"Deze functie staat open voor iedereen, ongeacht leeftijd of gender\.",
+    r"Niet alle vacatures zijn nagekeken door VDAB\.\s*VDAB is niet aansprakelijk voor de inhoud van de niet-nagekeken vacatures\.",
+    r"Rapporteer vacature",
+    r"Zit deze vacature meerdere keren in onze jobdatabank, is ze intussen ingevuld, bevat ze onjuiste info\? Laat het ons weten\.",
+    r"Cookies",
+    r"Other languages",
+    r"Co-Browse sessie starten",
+]
+# Case-sensitive on purpose: the chrome is capitalized, while 'cookies' or 'log in' may be real job content
+BOILERPLATE = re.compile("|".join(rf"\b(?:{p})" for p in BOILERPLATE_PATTERNS))
+
+# In a full page dump the posting sits between the save button and the application details
+PAGE_START = re.compile(r"Solliciteer nu\s+Bewaard\s+Bewaar", flags=re.IGNORECASE)
+PAGE_END = re.compile(r"\b(?:Aanbod|Plaats tewerkstelling|Hoe solliciteren\?|Mogelijk ook interessant)\b")
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+|\n+")
+# Sentences this long that name the company are treated as company presentation
+COMPANY_SENTENCE_WORDS = 8
+
+
+@dataclass
+class ReducedText:
+    text: str
+    tokens_before: int
+    tokens_after: int
+    sections: List[str]
+    dropped_sentences: int = 0
+    truncated: bool = False
+
+
+def _fingerprint(sentence: str) -> str:
+    normalized = " ".join(re.findall(r"\w+", sentence.lower()))
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def clean_company(company: Optional[str]) -> str:
+    """Company name without the 'Meer info over dit bedrijf…' link text glued to it by the scraper."""
+    company = str(company or "")
+    company = re.split(r"Meer info|Bedrijfswebsite", company)[0]
+    return " ".join(company.split())
+
+
+class TextReducer:
+    """
+    Builds the text sent to the LLM for a posting:
+
+    - only the skill-bearing sections (`profiel`, `professionele_vaardigheden`,
+      `functieomschrijving`), falling back to the posting part of
+      `full_description` when none of them was scraped;
+    - known VDAB chrome and application boilerplate removed;
+    - sentences repeated within the posting dropped, and so are company
+      presentation sentences (long sentences naming the company) that an
+      earlier posting of the same company already sent;
+    - cut at a sentence boundary once `max_tokens` estimated tokens are used.
+
+    Token counts before (the whole description) and after reduction are kept
+    per posting and summed in `stats`.
+    """
+
+    def __init__(self, max_tokens: int = 1000, sections=SKILL_SECTIONS):
+        self.max_tokens = max_tokens
+        self.sections = tuple(sections)
+        self._company_seen: Dict[str, Set[str]] = defaultdict(set)
+        self.stats = {"postings": 0, "tokens_before": 0, "tokens_after": 0, "truncated": 0, "dropped_sentences": 0}
+
+    @staticmethod
+    def strip_boilerplate(text: str) -> str:
+        text = BOILERPLATE.sub(" ", text or "")
+        return re.sub(r"[ \t]+", " ", text).strip()
+
+    def _page_body(self, full_description: str) -> str:
+        start = PAGE_START.search(full_description)
+        body = full_description[start.end():] if start else full_description
+        end = PAGE_END.search(body)
+        return body[:end.start()] if end else body
+
+    def original_text(self, job: dict) -> str:
+        """What extraction used to send: the whole scraped description."""
+        if job.get("full_description"):
+            return str(job["full_description"])
+        return "\n".join(str(job[s]) for s in self.sections if job.get(s))
+
+    def _reduce(self, job: dict) -> ReducedText:
+        tokens_before = estimate_tokens(self.original_text(job))
+        sections = [s for s in self.sections if str(job.get(s) or "").strip()]
+        if sections:
+            parts = [(s, str(job[s])) for s in sections]
+        else:
+            parts = [("full_description", self._page_body(str(job.get("full_description") or "")))]
+
+        company = clean_company(job.get("company")).lower()
+        company_seen = self._company_seen[company] if company else set()
+        new_company_sentences = set()
+        seen, kept_sections, dropped = set(), [], 0
+        # Characters of the text as it will be joined: at estimate_tokens' 4 characters per token,
+        # the reduced text's estimate then never exceeds max_tokens
+        used, truncated = 0, False
+        for name, raw in parts:
+            kept = []
+            for sentence in SENTENCE_SPLIT.split(self.strip_boilerplate(raw)):
+                sentence = sentence.strip()
+                if not sentence:
+                    continue
+                fingerprint = _fingerprint(sentence)
+                is_company = bool(company) and company in sentence.lower() and len(sentence.split()) >= COMPANY_SENTENCE_WORDS
+                if fingerprint in seen or (is_company and fingerprint in company_seen):
+                    dropped += 1
+                    continue
+                separator = 0 if not used else 1 if kept else 2
+                if self.max_tokens and (used + separator + len(sentence)) // 4 > self.max_tokens:
+                    truncated = True
+                    if used == 0:
+                        # A single sentence larger than the budget is cut rather than lost
+                        sentence = sentence[:4 * self.max_tokens]
+                        kept.append(sentence)
+                        used += len(sentence)
+                    break
+                seen.add(fingerprint)
+                if is_company:
+                    new_company_sentences.add(fingerprint)
+                kept.append(sentence)
+                used += separator + len(sentence)
+            if kept:
+                kept_sections.append((name, " ".join(kept)))
+            if truncated:
+                break
+        if company:
+            company_seen.update(new_company_sentences)
+
+        text = "\n\n".join(body for _, body in kept_sections)
+        return ReducedText(
+            text=text,
+            tokens_before=tokens_before,
+            tokens_after=estimate_tokens(text) if text else 0,
+            sections=[name for name, _ in kept_sections],
+            dropped_sentences=dropped,
+            truncated=truncated,
+        )
+
+    def reduce(self, job: dict) -> ReducedText:
+        reduced = self._reduce(job)
+        self.stats["postings"] += 1
+        self.stats["tokens_before"] += reduced.tokens_before
+        self.stats["tokens_after"] += reduced.tokens_after
+        self.stats["truncated"] += int(reduced.truncated)
+        self.stats["dropped_sentences"] += reduced.dropped_sentences
+        return reduced
+
+    def observe(self, job: dict):
+        """Remembers the company sentences of a posting reduced elsewhere (another shard, an earlier run), without counting it."""
+        self._reduce(job)
+
+    def summary(self) -> str:
+        before, after = self.stats["tokens_before"], self.stats["tokens_after"]
+        saved = 1 - after / before if before else 0.0
+        return (
+            f"✂️ LLM input reduced from ~{before} to ~{after} tokens ({saved:.0%} saved) over "
+            f"{self.stats['postings']} postings; {self.stats['truncated']} cut at the {self.max_tokens}-token budget, "
+            f"{self.stats['dropped_sentences']} duplicate sentences dropped."
+        )
@@ -0,0 +1,119 @@
+
+"""Durable record of the postings a pipeline run has written, so an interrupted run can resume."""
+
+import json
+import os
+import time
+from typing import Dict, Optional, Set
+
+from pipeline.json_stream import JsonlWriter, iter_jsonl
+
+
+class Checkpoint:
+    """
+    Two files next to the JSONL output:
+
+    - `<path>.ids`: append-only JSONL of written job ids, loaded into a set on
+      resume so every already processed posting is skipped with one lookup;
+    - `<path>`: small JSON state, replaced atomically, holding the input byte
+      offset up to which every posting has been written. A resumed run seeks
+      there instead of re-reading the input from the start.
+
+    Postings may finish out of order (concurrent extraction), so each one is
+    reported with its input sequence number and end offset; the offset only
+    advances over a gap-free prefix. A failed posting stops it for the rest of
+    the run and is retried on resume, while later written postings are
+    skipped through the id set.
+
+    `commit()` is meant to run right after the output file is fsynced: ids
+    only become durable once their records are, so a crash can duplicate a
+    record in the output (compaction keeps the last one) but never lose one.
+    """
+
+    def __init__(self, path: str, input_path: str, resume: bool = False):
+        self.path = path
+        self.ids_path = path + ".ids"
+        self.input_path = input_path
+        self.done: Set[str] = set()
+        self.offset = 0
+        self.resumed = False
+        if resume:
+            self._load()
+        else:
+            for p in (self.path, self.ids_path):
+                if os.path.exists(p):
+                    os.remove(p)
+        self.start_offset = self.offset
+        self._ids = JsonlWriter(self.ids_path, fsync_every=2**31, fsync_interval=float("inf"))
+        self._pending = []  # ids written since the last commit, held back until their records are durable
+        self._next_seq = 0
+        self._finished: Dict[int, int] = {}
+        self._stop = float("inf")  # first failed sequence number
+        self.stats = {"commits": 0}
+
+    def _input_identity(self) -> dict:
+        st = os.stat(self.input_path)
+        return {"input": os.path.abspath(self.input_path), "input_size": st.st_size, "input_mtime": st.st_mtime}
+
+    def _load(self):
+        self.done = {r["job_id"] for r in iter_jsonl(self.ids_path)}
+        self.resumed = bool(self.done)
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        identity = self._input_identity()
+        if all(state.get(k) == v for k, v in identity.items()):
+            self.offset = int(state.get("offset", 0))
+        elif self.done:
+            # The input changed: its offsets mean nothing now, but job ids still identify postings
+            print(f"⚠️ {self.input_path} changed since the checkpoint; re-reading it from the start (known jobs are still skipped)")
+
+    def is_done(self, job_id: str) -> bool:
+        return job_id in self.done
+
+    def written(self, job_id: str, seq: int, end_offset: int):
+        """Posting `seq` of this run (ending at `end_offset` in the input) was written to the output."""
+        self.done.add(job_id)
+        self._pending.append(job_id)
+        self._finished[seq] = end_offset
+
+    def skipped(self, seq: int, end_offset: int):
+        """Posting `seq` needed no work (already in the output)."""
+        self._finished[seq] = end_offset
+
+    def failed(self, seq: int):
+        """Posting `seq` was not written; the offset stays before it so a resumed run retries it."""
+        self._stop = min(self._stop, seq)
+
+    def _advance(self):
+        while self._next_seq < self._stop and self._next_seq in self._finished:
+            self.offset = self._finished.pop(self._next_seq)
+            self._next_seq += 1
+        if self._stop != float("inf"):
+            self._finished = {seq: end for seq, end in self._finished.items() if seq < self._stop}
+
+    def commit(self):
+        """Makes the ids and offset recorded so far durable."""
+        for job_id in self._pending:
+            self._ids.write({"job_id": job_id})
+        self._pending = []
+        self._ids.sync()
+        self._advance()
+        state = {**self._input_identity(), "offset": self.offset, "processed": len(self.done), "updated": time.time()}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.stats["commits"] += 1
+
+    def close(self):
+        self.commit()
+        self._ids.close()
+
+    def summary(self) -> Optional[str]:
+        if not self.resumed:
+            return None
+        return f"⏩ Resumed from checkpoint: {len(self.done)} jobs already written, input read from byte {self.start_offset}"
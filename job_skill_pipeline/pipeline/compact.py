@@ -0,0 +1,92 @@
+
+"""
+Compacts the pipeline's append-only JSONL output into the final dataset.
+
+    python -m pipeline.compact data/vdab_jobs_with_skills1.jsonl data/vdab_jobs_with_skills1.json
+    python -m pipeline.compact data/vdab_jobs_with_skills1.jsonl data/vdab_jobs_with_skills1.parquet
+
+A job written more than once (a re-run, or a retry after a crash) keeps only
+its last record. Records are written in input order (by their `_input_offset`,
+which is dropped from the dataset), also when a resumed run appended the
+postings it retried after the others.
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import pandas as pd
+
+from pipeline.json_stream import INPUT_OFFSET, iter_jsonl_positions
+
+COMPACT_FORMATS = ("json", "parquet")
+
+
+def _latest_records(jsonl_path: str, key: str):
+    """
+    Yields the last record of every `key`, ordered by input offset, or in file
+    order when some records have none (output of an older pipeline version).
+    Only keys, offsets and line positions are kept in memory; the records
+    themselves are read back one at a time.
+    """
+    last = {}
+    for line_no, (position, record) in enumerate(iter_jsonl_positions(jsonl_path)):
+        last[record.get(key, line_no)] = (record.get(INPUT_OFFSET), line_no, position)
+    entries = list(last.values())
+    if all(offset is not None for offset, _, _ in entries):
+        entries.sort()
+    else:
+        entries.sort(key=lambda entry: entry[1])
+    with open(jsonl_path, "rb") as f:
+        for _, _, position in entries:
+            f.seek(position)
+            record = json.loads(f.readline())
+            record.pop(INPUT_OFFSET, None)
+            yield record
+
+
+def compact(jsonl_path: str, output_path: str, fmt: str = None, key: str = "job_id") -> int:
+    """Writes the de-duplicated records of `jsonl_path` as a JSON array or a Parquet file; returns the record count."""
+    fmt = fmt or ("parquet" if output_path.endswith(".parquet") else "json")
+    if fmt not in COMPACT_FORMATS:
+        raise ValueError(f"Unknown output format: {fmt} (expected one of {COMPACT_FORMATS})")
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = output_path + ".tmp"
+    count = 0
+    if fmt == "json":
+        # Streamed element by element, so the output never has to fit in memory
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            out.write("[")
+            for record in _latest_records(jsonl_path, key):
+                out.write(",\n" if count else "\n")
+                out.write(json.dumps(record, ensure_ascii=False, indent=2, default=str))
+                count += 1
+            out.write("\n]\n" if count else "]\n")
+    else:
+        records = list(_latest_records(jsonl_path, key))
+        count = len(records)
+        # Needs pyarrow (or fastparquet); nested skill lists are stored as Parquet lists/structs
+        pd.DataFrame.from_records(records).to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact the pipeline's JSONL output into JSON or Parquet")
+    parser.add_argument("jsonl", help="append-only JSONL written by the pipeline")
+    parser.add_argument("output", help="final dataset (.json or .parquet)")
+    parser.add_argument("--format", choices=COMPACT_FORMATS, default=None, help="default: from the output extension")
+    parser.add_argument("--key", default="job_id", help="field identifying a job; its last record wins")
+    args = parser.parse_args()
+
+    n = compact(args.jsonl, args.output, args.format, args.key)
+    print(f"🗜️ Compacted {n} records from {args.jsonl} into {args.output}")
@@ -0,0 +1,215 @@
+
+"""
+Incremental JSON input and append-only JSONL output for the streaming pipeline.
+
+Postings are read one at a time from a JSON array (or a JSONL file) without
+loading the whole document, and results are appended as one JSON line each,
+fsynced in batches rather than rewriting the output after every job.
+"""
+
+import codecs
+import json
+import os
+import time
+from typing import Callable, Iterator, Optional, Tuple
+
+READ_CHUNK = 1 << 16
+WHITESPACE = " \t\r\n"
+# Field of pipeline output records holding the posting's end offset in the input;
+# compaction orders records by it, so the final dataset follows the input order
+INPUT_OFFSET = "_input_offset"
+
+
+def iter_json_records(path: str, chunk_size: int = READ_CHUNK, start: int = 0) -> Iterator[Tuple[int, dict]]:
+    """
+    Yields (byte offset just past the record, record) for every element of a
+    top-level JSON array, or for every line of a JSONL file. Only a chunk of
+    the file and the current record are held in memory. `start` is an offset
+    previously yielded by this function to continue reading from.
+    """
+    with open(path, "rb") as f:
+        head = f.read(64).lstrip(codecs.BOM_UTF8).lstrip()
+        f.seek(0)
+        if head[:1] == b"[":
+            yield from _iter_array(f, chunk_size, start)
+        else:
+            yield from _iter_lines(f, start)
+
+
+def _iter_lines(f, start: int = 0) -> Iterator[Tuple[int, dict]]:
+    f.seek(start)
+    offset = start
+    for line in f:
+        offset += len(line)
+        line = line.strip()
+        if line:
+            yield offset, json.loads(line.decode("utf-8-sig"))
+
+
+def _iter_array(f, chunk_size: int, start: int = 0) -> Iterator[Tuple[int, dict]]:
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    # `base` is the byte offset of buf[0]; a BOM is skipped but still occupies bytes on disk
+    if start:
+        base = start
+    else:
+        base = len(codecs.BOM_UTF8) if f.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8 else 0
+    f.seek(base)
+    buf, eof = "", False
+
+    def fill():
+        nonlocal buf, eof
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buf += utf8.decode(chunk, final=eof)
+
+    def consume(n: int):
+        nonlocal buf, base
+        base += len(buf[:n].encode("utf-8"))
+        buf = buf[n:]
+
+    fill()
+    # Resuming right after an element: a ',' or the closing ']' comes next
+    need_comma = bool(start)
+    if not start:
+        first = len(buf) - len(buf.lstrip(WHITESPACE))
+        if buf[first:first + 1] != "[":
+            raise ValueError(f"Expected a JSON array in {f.name}")
+        consume(first + 1)
+
+    while True:
+        pos = len(buf) - len(buf.lstrip(WHITESPACE))
+        if pos == len(buf):
+            if eof:
+                raise ValueError(f"Unterminated JSON array in {f.name}")
+            consume(pos)
+            fill()
+            continue
+        if buf[pos] == "]":
+            return
+        if need_comma:
+            if buf[pos] != ",":
+                raise ValueError(f"Missing ',' between array elements in {f.name} at byte {base + len(buf[:pos].encode('utf-8'))}")
+            consume(pos + 1)
+            need_comma = False
+            continue
+        try:
+            record, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        if not eof and (end == len(buf) or buf[end] not in WHITESPACE + ",]"):
+            # A number cut by the chunk boundary ('4500.' of '4500.0') decodes as a shorter one
+            fill()
+            continue
+        consume(end)
+        need_comma = True
+        yield base, record
+
+
+def iter_jsonl(path: str) -> Iterator[dict]:
+    """Records of a JSONL file; a torn last line (interrupted write) is skipped."""
+    for _, record in iter_jsonl_positions(path):
+        yield record
+
+
+def iter_jsonl_positions(path: str) -> Iterator[Tuple[int, dict]]:
+    """(byte position of the line, record) for every record of a JSONL file, e.g. to seek back to it later."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        position = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            if line.strip():
+                yield position, json.loads(line.decode("utf-8"))
+            position += len(line)
+
+
+class JsonlWriter:
+    """
+    Appends one JSON line per record. Lines are handed to the OS as they are
+    written; `os.fsync` runs every `fsync_every` records or `fsync_interval`
+    seconds, whichever comes first, so a crash loses at most that batch;
+    `on_sync` runs after each fsync. A line torn by an earlier crash is cut
+    off when the file is reopened, and `truncate` starts the file over.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fsync_every: int = 50,
+        fsync_interval: float = 2.0,
+        on_sync: Optional[Callable[[], None]] = None,
+        truncate: bool = False,
+    ):
+        self.path = path
+        self.fsync_every = max(1, int(fsync_every))
+        self.fsync_interval = fsync_interval
+        self.on_sync = on_sync
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if truncate:
+            open(path, "wb").close()
+        self._repair_tail()
+        self._file = open(path, "ab")
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self.stats = {"records": 0, "fsyncs": 0}
+
+    def _repair_tail(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            # Walk back to the last complete line
+            end = size
+            while end > 0:
+                step = min(READ_CHUNK, end)
+                f.seek(end - step)
+                cut = f.read(step).rfind(b"\n")
+                if cut >= 0:
+                    end = end - step + cut + 1
+                    break
+                end -= step
+            f.truncate(max(end, 0))
+
+    def write(self, record: dict):
+        self._file.write((json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+        self._file.flush()
+        self._pending += 1
+        self.stats["records"] += 1
+        if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self._file is None or self._pending == 0:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self.stats["fsyncs"] += 1
+        if self.on_sync is not None:
+            self.on_sync()
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,66 @@
+
+"""
+Partitioning of the input postings across pipeline processes, and the
+deterministic merge of their outputs.
+
+Every shard reads the whole input but only processes the postings whose job
+id hashes to it. Like every pipeline record, each record it writes holds the
+posting's byte offset in the input (`INPUT_OFFSET`). Merging the shard
+outputs by that offset restores the input order, so the merged output does
+not depend on the number of shards.
+"""
+
+import os
+import zlib
+from typing import List
+
+from pipeline.json_stream import INPUT_OFFSET, iter_jsonl_positions
+
+
+def shard_of(job_id: str, shards: int) -> int:
+    """Shard owning `job_id`. A stable hash (unlike `hash()`, which is salted per process)."""
+    return zlib.crc32(job_id.encode("utf-8")) % shards
+
+
+def shard_path(path: str, shard: int, shards: int) -> str:
+    """Per-shard variant of an output path: out.jsonl -> out.shard-1-of-4.jsonl"""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.shard-{shard}-of-{shards}{ext}"
+
+
+def _index_lines(path: str, shard: int):
+    """(input offset, shard, byte position) of every complete line of a shard output."""
+    for position, record in iter_jsonl_positions(path):
+        yield record[INPUT_OFFSET], shard, position
+
+
+def merge_shards(paths: List[str], output_path: str) -> int:
+    """
+    Writes the records of the shard outputs `paths` to the JSONL file
+    `output_path` in input order; returns the record count. The result is
+    the JSONL output a single process would have written. Only the (offset,
+    position) index of the records is held in memory. A job written twice by
+    a shard keeps both records, in the order written, so compaction still
+    keeps the last one.
+    """
+    index = sorted(entry for shard, path in enumerate(paths) for entry in _index_lines(path, shard))
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = output_path + ".tmp"
+    files = [open(path, "rb") if os.path.exists(path) else None for path in paths]
+    try:
+        with open(tmp_path, "wb") as out:
+            for _, shard, position in index:
+                f = files[shard]
+                f.seek(position)
+                out.write(f.readline())
+            out.flush()
+            os.fsync(out.fileno())
+    finally:
+        for f in files:
+            if f is not None:
+                f.close()
+    os.replace(tmp_path, output_path)
+    return len(index)
@@ -0,0 +1,559 @@
+
+"""
+Streaming skill extraction and normalization pipeline.
+
+Postings are read incrementally from the input JSON, extracted and normalized
+by overlapping stages, and appended to a JSONL file one line per job (fsynced
+in batches). The final JSON / Parquet dataset is produced from that file by
+compaction.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+from nlp.gazetteer import Gazetteer
+from nlp.language import LANGUAGES
+from nlp.metrics import MetricsSink
+from nlp.normalize_skills import SkillNormalizer
+from nlp.skill_extractor import SkillExtractor
+from nlp.taxonomy_loader import TaxonomyLoader
+from nlp.text_reducer import TextReducer
+from pipeline.checkpoint import Checkpoint
+from pipeline.compact import compact
+from pipeline.json_stream import INPUT_OFFSET, JsonlWriter, iter_json_records
+from pipeline.shards import merge_shards, shard_of, shard_path
+from pipeline.stages import (
+    DONE,
+    Busy,
+    ReorderBuffer,
+    StageStats,
+    get,
+    put,
+    put_threadsafe,
+    utilization_report,
+    utilization_summary,
+)
+
+
+class SkillPipeline:
+    """
+    Extracts skills from the postings in `input_path` with `SkillExtractor`,
+    maps them to the taxonomy with `SkillNormalizer` and streams one output
+    record per job to `jsonl_path` (default: `output_path` with a .jsonl
+    suffix). With `compact_output`, `output_path` (.json or .parquet) is
+    rebuilt from the JSONL file at the end of the run.
+
+    The work runs as four stages connected by bounded queues, so the network
+    bound LLM calls and the CPU bound normalization overlap:
+
+    - reader (thread): parses postings and reduces their text;
+    - extractors (`max_in_flight` coroutines): call the LLM, one posting per
+      request (`per_request_delay` apart when there is a single extractor), or
+      up to `batch_max_postings` per prompt when `batch_token_budget` > 0;
+    - normalizer (thread): micro-batches extracted postings and normalizes
+      them together once `normalize_batch_skills` skills are waiting or
+      `normalize_batch_ms` passed since the first one arrived;
+    - writer (thread): appends records in input order, fsyncing every
+      `save_every` jobs.
+
+    Each queue holds at most `queue_size` items; a full queue pauses the stage
+    feeding it (back-pressure). Postings finished out of order wait in a
+    reorder buffer before the writer, and the reader pauses while it is
+    `reorder_window` postings ahead of the oldest one not yet written. Per-stage
+    utilization is in `stage_stats`.
+
+    Progress is checkpointed next to the JSONL output (see `Checkpoint`).
+    With `resume`, postings already written are skipped and the input is read
+    from the checkpointed offset; otherwise the JSONL output starts over.
+
+    With `shard=(index, count)` only the postings whose job id hashes to
+    `index` are processed. Records carry their input offset, by which
+    compaction (and `ShardedPipeline`'s merge of the shard outputs) orders
+    them, so the output follows the input order even after a resume.
+    """
+
+    def __init__(
+        self,
+        input_path: str,
+        taxonomy_path: str,
+        output_path: str,
+        per_request_delay: float = 0.5,
+        save_every: int = 50,
+        provider: str = "auto",
+        model_name: Optional[str] = None,
+        max_retries: int = 3,
+        max_in_flight: int = 1,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        batch_token_budget: int = 0,
+        batch_max_postings: int = 20,
+        cache_path: Optional[str] = None,
+        cache_max_mb: float = 512,
+        refresh_cache: bool = False,
+        max_connections: int = 20,
+        hedge: bool = False,
+        hedge_provider: Optional[str] = None,
+        hedge_model: Optional[str] = None,
+        hedge_percentile: float = 95.0,
+        reduce_text: bool = True,
+        token_budget: int = 1000,
+        gazetteer_mode: str = "off",
+        gazetteer_min_uncovered: int = 30,
+        metrics_path: Optional[str] = None,
+        jsonl_path: Optional[str] = None,
+        compact_output: bool = True,
+        normalize_threshold: float = 0.65,
+        queue_size: int = 64,
+        normalize_batch_skills: int = 256,
+        normalize_batch_ms: float = 200.0,
+        resume: bool = False,
+        checkpoint_path: Optional[str] = None,
+        shard: Optional[Tuple[int, int]] = None,
+        run_id: Optional[str] = None,
+    ):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.jsonl_path = jsonl_path or os.path.splitext(output_path)[0] + ".jsonl"
+        self.compact_output = compact_output
+        self.resume = resume
+        self.checkpoint_path = checkpoint_path or self.jsonl_path + ".ckpt"
+        self.checkpoint = None
+        self.per_request_delay = per_request_delay
+        self.save_every = save_every
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.batch_token_budget = batch_token_budget
+        self.batch_max_postings = batch_max_postings
+        self.reduce_text = reduce_text
+        self.normalize_threshold = normalize_threshold
+        self.queue_size = max(1, int(queue_size))
+        self.normalize_batch_skills = max(1, int(normalize_batch_skills))
+        self.normalize_batch_ms = normalize_batch_ms
+        self.shard = shard
+        # Room for every posting the queues and extractors can hold at once, so that
+        # the reorder window only binds when one posting is much slower than the rest
+        self.reorder_window = 4 * self.queue_size + self.max_in_flight * (batch_max_postings if batch_token_budget > 0 else 1)
+
+        self.taxonomy = TaxonomyLoader(taxonomy_path).load_all()
+        # Per-language label lists the extractor standardizes its answers against
+        self.taxonomy_skills = {
+            lang: [str(s).strip() for s in self.taxonomy[f"skill_{lang}"].dropna() if str(s).strip()]
+            for lang in LANGUAGES
+        }
+        self.normalizer = SkillNormalizer(self.taxonomy)
+        self.reducer = TextReducer(max_tokens=token_budget)
+        self.metrics = MetricsSink(metrics_path, run_id=run_id)
+        gazetteer = Gazetteer.from_taxonomy(self.taxonomy) if gazetteer_mode != "off" else None
+        self.extractor = SkillExtractor(
+            provider=provider,
+            model_name=model_name,
+            max_retries=max_retries,
+            max_in_flight=self.max_in_flight,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            cache_path=cache_path,
+            cache_max_mb=cache_max_mb,
+            refresh_cache=refresh_cache,
+            max_connections=max_connections,
+            gazetteer=gazetteer,
+            gazetteer_mode=gazetteer_mode,
+            gazetteer_min_uncovered=gazetteer_min_uncovered,
+            hedge=hedge,
+            hedge_provider=hedge_provider,
+            hedge_model=hedge_model,
+            hedge_percentile=hedge_percentile,
+            metrics=self.metrics,
+        )
+        self.stats = {"read": 0, "skipped": 0, "written": 0, "failed": 0, "other_shards": 0}
+        self.stage_stats = []
+        self.wall_time = 0.0
+
+    # ------------------------------------------------------------------
+    # 🔹 Reader stage (thread)
+    # ------------------------------------------------------------------
+    def _prepare(self, job: dict, job_id: str, seq: int, end_offset: int) -> dict:
+        """The posting plus the text sent to the LLM and its place in the input."""
+        text = self.reducer.reduce(job).text if self.reduce_text else self.reducer.original_text(job)
+        return {
+            "job": job,
+            "job_id": job_id,
+            "seq": seq,
+            "end_offset": end_offset,
+            "text": text,
+            # Detected once: the extractor's filters and the normalizer both use it
+            "language": self.extractor.detect_language(text),
+            "job_title": job.get("title", ""),
+            "domain": job.get("domain"),
+        }
+
+    def _read(
+        self,
+        out: asyncio.Queue,
+        skips: asyncio.Queue,
+        loop: asyncio.AbstractEventLoop,
+        stats: StageStats,
+        stop: threading.Event,
+        reorder: ReorderBuffer,
+    ):
+        """Feeds postings still to process to `out`, from the checkpointed input offset on."""
+        if self.reduce_text and self.checkpoint.offset:
+            with Busy(stats):
+                self._replay_reducer(self.checkpoint.offset)
+        records = iter_json_records(self.input_path, start=self.checkpoint.offset)
+        for seq, (end_offset, job) in enumerate(records):
+            if not reorder.wait_window(seq, stats, stop):
+                return
+            with Busy(stats):
+                self.stats["read"] += 1
+                # Postings without an id are identified by their position in the input
+                job_id = str(job.get("job_id") or f"@{end_offset}")
+                if self.shard is not None and shard_of(job_id, self.shard[1]) != self.shard[0]:
+                    self.stats["other_shards"] += 1
+                    if self.reduce_text:
+                        # Keeps the reducer's per-company history, and so the text sent, independent of the shard count
+                        self.reducer.observe(job)
+                    queue, item = skips, [{"seq": seq, "end_offset": end_offset, "other_shard": True}]
+                elif self.checkpoint.is_done(job_id):
+                    # Already written: bypasses extraction, the writer only advances the checkpoint over it
+                    if self.reduce_text:
+                        self.reducer.observe(job)
+                    queue, item = skips, [{"seq": seq, "end_offset": end_offset, "skipped": True}]
+                else:
+                    queue, item = out, self._prepare(job, job_id, seq, end_offset)
+            stats.items += 1
+            if not put_threadsafe(queue, item, loop, stats, stop):
+                return
+        put_threadsafe(out, DONE, loop, stats, stop)
+
+    def _replay_reducer(self, offset: int):
+        """
+        Shows the reducer the postings before input `offset`, written by an
+        earlier run, so a resumed run reduces the remaining ones exactly as
+        an uninterrupted run would.
+        """
+        for end_offset, job in iter_json_records(self.input_path):
+            if end_offset > offset:
+                return
+            self.reducer.observe(job)
+
+    # ------------------------------------------------------------------
+    # 🔹 Extractor stage (coroutines)
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _meta(posting: dict) -> dict:
+        return {"job_id": posting["job_id"], "domain": posting["domain"]}
+
+    async def _extract_one(self, posting: dict):
+        try:
+            posting["skills"] = await self.extractor.aextract(
+                posting["text"], posting["job_title"], self.taxonomy_skills, meta=self._meta(posting), language=posting["language"]
+            )
+        except Exception as e:
+            posting["error"] = e
+        if self.max_in_flight == 1 and self.per_request_delay:
+            await asyncio.sleep(self.per_request_delay)
+
+    async def _extract_batch(self, postings: List[dict]):
+        jobs = [{k: p[k] for k in ("job_id", "text", "job_title", "domain", "language")} for p in postings]
+        try:
+            found = await self.extractor.aextract_batch(jobs, self.taxonomy_skills, self.batch_token_budget, self.batch_max_postings)
+        except Exception as e:
+            found = {}
+            for p in postings:
+                p["error"] = e
+        for p in postings:
+            if p["job_id"] in found:
+                p["skills"] = found[p["job_id"]]
+            elif "error" not in p:
+                p["error"] = RuntimeError("no answer for posting")
+
+    async def _extract(self, inp: asyncio.Queue, out: asyncio.Queue, stats: StageStats, finished: list):
+        while True:
+            posting = await get(inp, stats)
+            if posting is DONE:
+                # Let the sibling extractors see the end too; the last one to stop tells the normalizer
+                await inp.put(DONE)
+                finished.append(True)
+                if len(finished) == stats.workers:
+                    await put(out, DONE, stats)
+                return
+            postings = [posting]
+            if self.batch_token_budget > 0:
+                # Take whatever else is already waiting, up to one prompt's worth
+                while len(postings) < self.batch_max_postings and not inp.empty():
+                    nxt = inp.get_nowait()
+                    if nxt is DONE:
+                        inp.put_nowait(DONE)
+                        break
+                    postings.append(nxt)
+            with Busy(stats):
+                if len(postings) > 1:
+                    await self._extract_batch(postings)
+                else:
+                    await self._extract_one(posting)
+            stats.items += len(postings)
+            for p in postings:
+                await put(out, p, stats)
+
+    # ------------------------------------------------------------------
+    # 🔹 Normalizer stage (micro-batches on a thread)
+    # ------------------------------------------------------------------
+    def _normalize_batch(self, batch: List[dict], stats: StageStats) -> List[dict]:
+        with Busy(stats):
+            ok = [p for p in batch if "error" not in p]
+            languages = [p["language"] for p in ok]
+            normalized = self.normalizer.normalize_many(
+                [p["skills"] for p in ok], threshold=self.normalize_threshold, languages=languages
+            )
+            for p, lang, norm in zip(ok, languages, normalized):
+                p["record"] = {**p["job"], "language": lang, "extracted_skills": p["skills"], "normalized_skills": norm}
+                p["record"][INPUT_OFFSET] = p["end_offset"]
+        stats.items += len(batch)
+        return batch
+
+    async def _normalize(self, inp: asyncio.Queue, out: asyncio.Queue, stats: StageStats, cpu: ThreadPoolExecutor):
+        loop = asyncio.get_running_loop()
+        batch, skills, deadline = [], 0, None
+        while True:
+            timeout = None if not batch else max(0.0, deadline - loop.time())
+            start = time.perf_counter()
+            try:
+                posting = await asyncio.wait_for(inp.get(), timeout)
+            except asyncio.TimeoutError:
+                posting = None
+            stats.starved += time.perf_counter() - start
+            if posting is not None and posting is not DONE:
+                batch.append(posting)
+                skills += len(posting.get("skills") or [])
+                if len(batch) == 1:
+                    deadline = loop.time() + self.normalize_batch_ms / 1000.0
+            flush = posting is None or posting is DONE or skills >= self.normalize_batch_skills
+            if flush and batch:
+                await put(out, await loop.run_in_executor(cpu, self._normalize_batch, batch, stats), stats)
+                batch, skills = [], 0
+            if posting is DONE:
+                await put(out, DONE, stats)
+                return
+
+    # ------------------------------------------------------------------
+    # 🔹 Writer stage (thread)
+    # ------------------------------------------------------------------
+    def _write_batch(self, writer: JsonlWriter, batch: List[dict], stats: StageStats):
+        with Busy(stats):
+            for posting in batch:
+                if posting.get("skipped") or posting.get("other_shard"):
+                    self.stats["skipped"] += int(bool(posting.get("skipped")))
+                    self.checkpoint.skipped(posting["seq"], posting["end_offset"])
+                elif "error" in posting:
+                    # Not written, so a resumed run picks the posting up again
+                    self.stats["failed"] += 1
+                    self.checkpoint.failed(posting["seq"])
+                    print(f"⚠️ Extraction failed for {posting['job_id']}: {posting['error']}")
+                else:
+                    writer.write(posting["record"])
+                    self.checkpoint.written(posting["job_id"], posting["seq"], posting["end_offset"])
+                    self.stats["written"] += 1
+            stats.items += len(batch)
+
+    async def _write(self, inp: asyncio.Queue, writer: JsonlWriter, stats: StageStats, io: ThreadPoolExecutor, reorder: ReorderBuffer):
+        loop = asyncio.get_running_loop()
+        last_report = time.perf_counter()
+        while True:
+            batch = await get(inp, stats)
+            if batch is DONE:
+                return
+            ready = [p for posting in batch for p in reorder.add(posting["seq"], posting)]
+            if ready:
+                await loop.run_in_executor(io, self._write_batch, writer, ready, stats)
+            if time.perf_counter() - last_report >= 10:
+                last_report = time.perf_counter()
+                print(f"✅ {self.stats['written']} jobs written ({self.stats['failed']} failed, {self.stats['skipped']} skipped)")
+
+    # ------------------------------------------------------------------
+    # 🔹 Run
+    # ------------------------------------------------------------------
+    async def _run(self, writer: JsonlWriter):
+        loop = asyncio.get_running_loop()
+        postings = asyncio.Queue(self.queue_size)
+        extracted = asyncio.Queue(self.queue_size)
+        to_write = asyncio.Queue(self.queue_size)
+        reader = StageStats("reader")
+        extract = StageStats("extract", workers=self.max_in_flight)
+        normalize = StageStats("normalize")
+        write = StageStats("writer")
+        self.stage_stats = [reader, extract, normalize, write]
+
+        stop = threading.Event()
+        reorder = ReorderBuffer(self.reorder_window)
+        with ThreadPoolExecutor(1, thread_name_prefix="pipeline-read") as read_pool, \
+                ThreadPoolExecutor(1, thread_name_prefix="pipeline-normalize") as cpu, \
+                ThreadPoolExecutor(1, thread_name_prefix="pipeline-write") as io:
+            finished = []
+            tasks = [
+                # Skipped postings go straight to the writer, ahead of the reader's DONE travelling down the stages
+                loop.run_in_executor(read_pool, self._read, postings, to_write, loop, reader, stop, reorder),
+                *(asyncio.ensure_future(self._extract(postings, extracted, extract, finished)) for _ in range(self.max_in_flight)),
+                asyncio.ensure_future(self._normalize(extracted, to_write, normalize, cpu)),
+                asyncio.ensure_future(self._write(to_write, writer, write, io, reorder)),
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                # A failing stage must not leave the others blocked on its queues
+                stop.set()
+                for task in tasks:
+                    task.cancel()
+                raise
+
+    def process_jobs(self):
+        start = time.perf_counter()
+        self.checkpoint = Checkpoint(self.checkpoint_path, self.input_path, resume=self.resume)
+        if self.checkpoint.summary():
+            print(self.checkpoint.summary())
+        writer = JsonlWriter(
+            self.jsonl_path, fsync_every=self.save_every, on_sync=self.checkpoint.commit, truncate=not self.resume
+        )
+        try:
+            with writer:
+                asyncio.run(self._run(writer))
+        finally:
+            self.checkpoint.close()
+            self.normalizer.close()
+            self.metrics.close()
+        self.wall_time = time.perf_counter() - start
+
+        print(f"✅ {self.stats['written']} jobs written ({self.stats['failed']} failed, {self.wall_time:.1f}s)")
+        print(self.reducer.summary())
+        print(utilization_report(self.stage_stats, self.wall_time))
+        if self.extractor.gazetteer_mode != "off":
+            print(f"📚 Gazetteer: {self.extractor.gazetteer_report()}")
+        if self.extractor.hedging is not None:
+            print(f"🪁 Hedging: {self.extractor.hedging_stats()}")
+        print(f"💾 {writer.stats['records']} records appended to {self.jsonl_path} ({writer.stats['fsyncs']} fsyncs)")
+        if self.stats["skipped"]:
+            print(f"⏩ {self.stats['skipped']} postings skipped as already written")
+        if self.compact_output:
+            count = compact(self.jsonl_path, self.output_path)
+            print(f"🗜️ Compacted {count} records into {self.output_path}")
+
+    def stage_report(self) -> dict:
+        """Per-stage items, utilization and the shares of time spent starved (no input) or blocked (back-pressure)."""
+        return utilization_summary(self.stage_stats, self.wall_time)
+
+
+# ----------------------------------------------------------------------
+# 🔹 Multi-process execution
+# ----------------------------------------------------------------------
+def _run_shard(kwargs: dict) -> dict:
+    """Worker process entry point: runs one shard and returns what the parent reports on."""
+    pipeline = SkillPipeline(**kwargs)
+    pipeline.process_jobs()
+    return {
+        "stats": pipeline.stats,
+        "stages": pipeline.stage_report(),
+        "metrics": pipeline.metrics.aggregates(),
+        "wall_time": pipeline.wall_time,
+    }
+
+
+class ShardedPipeline:
+    """
+    Runs `shards` SkillPipeline processes over the same input, shard i
+    processing the postings whose job id hashes to i (see `shard_of`). Every
+    shard has its own SkillExtractor: `max_in_flight` applies per shard, while
+    the provider rate limits are split evenly between them. The taxonomy is
+    encoded once into the on-disk embedding cache before the shards start, and
+    each shard's SkillNormalizer memory-maps that file, so all processes share
+    one copy of the matrix through the page cache.
+
+    Each shard appends to its own JSONL output and checkpoint (`shard_path`
+    of `jsonl_path`). Once all are done, they are merged into `jsonl_path` in
+    input order, so the output is the same for any number of shards, and
+    compacted into `output_path`. With `resume`, every shard resumes from its
+    own checkpoint; this needs the same number of shards as the interrupted run.
+    """
+
+    def __init__(
+        self,
+        shards: int,
+        input_path: str,
+        taxonomy_path: str,
+        output_path: str,
+        jsonl_path: Optional[str] = None,
+        compact_output: bool = True,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        checkpoint_path: Optional[str] = None,
+        **kwargs,
+    ):
+        self.shards = max(1, int(shards))
+        self.taxonomy_path = taxonomy_path
+        self.output_path = output_path
+        self.jsonl_path = jsonl_path or os.path.splitext(output_path)[0] + ".jsonl"
+        self.compact_output = compact_output
+        # In memory only: the shards append the per-posting records themselves, under this run id
+        self.metrics = MetricsSink()
+        self.shard_kwargs = [
+            dict(
+                kwargs,
+                input_path=input_path,
+                taxonomy_path=taxonomy_path,
+                output_path=output_path,
+                jsonl_path=shard_path(self.jsonl_path, i, self.shards),
+                checkpoint_path=shard_path(checkpoint_path, i, self.shards) if checkpoint_path else None,
+                compact_output=False,
+                requests_per_minute=requests_per_minute / self.shards if requests_per_minute else None,
+                tokens_per_minute=tokens_per_minute / self.shards if tokens_per_minute else None,
+                shard=(i, self.shards),
+                run_id=self.metrics.run_id,
+            )
+            for i in range(self.shards)
+        ]
+        self.stats = {"skipped": 0, "written": 0, "failed": 0}
+        self.shard_results = {}
+        self.wall_time = 0.0
+
+    def _warm_normalizer(self):
+        # Otherwise every shard would miss the embedding cache at once and encode the taxonomy itself
+        SkillNormalizer(TaxonomyLoader(self.taxonomy_path).load_all()).close()
+
+    def process_jobs(self):
+        start = time.perf_counter()
+        self._warm_normalizer()
+        print(f"🧩 Running {self.shards} shards in parallel processes")
+        errors = {}
+        # spawn: forking would copy this process's threads' locks mid-use into the children
+        with ProcessPoolExecutor(self.shards, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {pool.submit(_run_shard, kwargs): i for i, kwargs in enumerate(self.shard_kwargs)}
+            for future in as_completed(futures):
+                try:
+                    self.shard_results[futures[future]] = future.result()
+                except Exception as e:
+                    errors[futures[future]] = e
+        self.wall_time = time.perf_counter() - start
+
+        for i, result in sorted(self.shard_results.items()):
+            for key in self.stats:
+                self.stats[key] += result["stats"][key]
+            self.metrics.merge(result["metrics"])
+            extract = result["stages"]["extract"]
+            print(
+                f"   shard {i}: {result['stats']['written']} written, {result['stats']['failed']} failed, "
+                f"extract {extract['utilization']:.0%} busy ({result['wall_time']:.1f}s)"
+            )
+        if errors:
+            for i, e in sorted(errors.items()):
+                print(f"⚠️ Shard {i} failed: {e}")
+            # The shard outputs are checkpointed: rerun with --resume and the same --shards
+            raise RuntimeError(f"{len(errors)} of {self.shards} shards failed") from errors[min(errors)]
+
+        print(f"✅ {self.stats['written']} jobs written ({self.stats['failed']} failed, {self.wall_time:.1f}s)")
+        count = merge_shards([kwargs["jsonl_path"] for kwargs in self.shard_kwargs], self.jsonl_path)
+        print(f"🔀 Merged {count} records from {self.shards} shards into {self.jsonl_path} in input order")
+        if self.compact_output:
+            count = compact(self.jsonl_path, self.output_path)
+            print(f"🗜️ Compacted {count} records into {self.output_path}")
@@ -0,0 +1,139 @@
+
+"""Bounded queues between pipeline stages, with per-stage busy / waiting time accounting."""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+# Marks the end of a stream on a stage queue
+DONE = object()
+
+
+@dataclass
+class StageStats:
+    """
+    Where a stage's workers spend their time: doing work (`busy`), waiting
+    for input (`starved`), or blocked on a full output queue (`blocked`,
+    i.e. back-pressure from the next stage).
+    """
+    name: str
+    workers: int = 1
+    items: int = 0
+    busy: float = 0.0
+    starved: float = 0.0
+    blocked: float = 0.0
+
+    def utilization(self, wall: float) -> float:
+        return self.busy / (wall * self.workers) if wall > 0 else 0.0
+
+    def summary(self, wall: float) -> dict:
+        capacity = wall * self.workers if wall > 0 else 1.0
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "utilization": round(self.utilization(wall), 3),
+            "starved": round(self.starved / capacity, 3),
+            "blocked": round(self.blocked / capacity, 3),
+        }
+
+
+class Busy:
+    """Context manager adding the time spent in its block to `stats.busy`."""
+
+    def __init__(self, stats: StageStats):
+        self.stats = stats
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.busy += time.perf_counter() - self._start
+
+
+async def get(queue: asyncio.Queue, stats: StageStats):
+    start = time.perf_counter()
+    item = await queue.get()
+    stats.starved += time.perf_counter() - start
+    return item
+
+
+async def put(queue: asyncio.Queue, item, stats: StageStats):
+    start = time.perf_counter()
+    await queue.put(item)
+    stats.blocked += time.perf_counter() - start
+
+
+def put_threadsafe(queue: asyncio.Queue, item, loop: asyncio.AbstractEventLoop, stats: StageStats, stop: threading.Event) -> bool:
+    """
+    `put` from a worker thread: blocks the thread while the queue is full.
+    Gives up (returning False) once `stop` is set, e.g. when a later stage failed.
+    """
+    start = time.perf_counter()
+    future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+    try:
+        while True:
+            try:
+                future.result(timeout=0.2)
+                return True
+            except concurrent.futures.TimeoutError:
+                if stop.is_set():
+                    future.cancel()
+                    return False
+    finally:
+        stats.blocked += time.perf_counter() - start
+
+
+class ReorderBuffer:
+    """
+    Puts items that finish out of order (concurrent extraction) back in input
+    order: `add(seq, item)` returns the items that became ready, in sequence.
+    The producer calls `wait_window(seq)` before sending item `seq`; it blocks
+    while `seq` is `window` or more ahead of the next item due, so a slow item
+    holds back at most `window` others instead of the buffer growing unbounded.
+    """
+
+    def __init__(self, window: int):
+        self.window = max(1, int(window))
+        self._next = 0
+        self._pending: Dict[int, object] = {}
+        self._cond = threading.Condition()
+
+    def wait_window(self, seq: int, stats: StageStats, stop: threading.Event) -> bool:
+        """Blocks (counted as `blocked`) until `seq` fits the window; False once `stop` is set."""
+        start = time.perf_counter()
+        try:
+            with self._cond:
+                while seq >= self._next + self.window:
+                    if stop.is_set():
+                        return False
+                    self._cond.wait(0.2)
+            return True
+        finally:
+            stats.blocked += time.perf_counter() - start
+
+    def add(self, seq: int, item) -> list:
+        with self._cond:
+            self._pending[seq] = item
+            ready = []
+            while self._next in self._pending:
+                ready.append(self._pending.pop(self._next))
+                self._next += 1
+            if ready:
+                self._cond.notify_all()
+        return ready
+
+
+def utilization_report(stages: List[StageStats], wall: float) -> str:
+    parts = []
+    for stage in stages:
+        workers = f" ×{stage.workers}" if stage.workers > 1 else ""
+        parts.append(f"{stage.name}{workers} {stage.utilization(wall):.0%}")
+    return "⏱️ Stage utilization: " + " | ".join(parts)
+
+
+def utilization_summary(stages: List[StageStats], wall: float) -> Dict[str, dict]:
+    return {stage.name: stage.summary(wall) for stage in stages}
@@ -7,25 +7,54 @@ PROJECT_ROOT = Path(__file__).resolve().parent
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from pipeline.skill_pipeline import SkillPipeline
+from pipeline.skill_pipeline import ShardedPipeline, SkillPipeline
 import argparse
+from functools import partial
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run the skill extraction pipeline")
     parser.add_argument("--input", default="data/vdab_jobs_aiohttp_full_recent.json")
     parser.add_argument("--taxonomy", default="data/SkillsFramework.xlsx")
-    parser.add_argument("--output", default="data/vdab_jobs_with_skills1.json")
+    parser.add_argument("--output", default="data/vdab_jobs_with_skills1.json", help="final dataset (.json or .parquet), compacted from the JSONL output")
+    parser.add_argument("--jsonl-path", default=None, help="append-only per-job output (default: --output with a .jsonl suffix)")
+    parser.add_argument("--no-compact", action="store_true", help="only append to the JSONL output; compact later with `python -m pipeline.compact`")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run: skip postings already in the JSONL output (per its checkpoint) instead of starting over")
     parser.add_argument("--delay", type=float, default=0.5, help="seconds to sleep after each LLM request")
-    parser.add_argument("--save-every", type=int, default=1, help="save output after this many processed jobs")
-    parser.add_argument("--provider", choices=["auto", "openai", "gemini"], default="auto", help="force LLM provider (auto = prefer OpenAI if key present)")
+    parser.add_argument("--save-every", type=int, default=50, help="fsync the JSONL output after this many written jobs")
+    parser.add_argument("--provider", choices=["auto", "openai", "gemini", "mock"], default="auto", help="force LLM provider (auto = prefer OpenAI if key present; mock = local stand-in server, see nlp/mock_llm.py)")
     parser.add_argument("--model", default=None, help="override model name to use for LLM calls (e.g. gpt-3.5-turbo, gemini-1)")
     parser.add_argument("--retries", type=int, default=3, help="number of retries for transient LLM errors (exponential backoff)")
+    parser.add_argument("--concurrency", type=int, default=1, help="LLM requests kept in flight per provider (>1 enables async extraction; --delay is then ignored)")
+    parser.add_argument("--rpm", type=float, default=None, help="requests-per-minute limit per provider (async extraction)")
+    parser.add_argument("--tpm", type=float, default=None, help="tokens-per-minute limit per provider (async extraction)")
+    parser.add_argument("--batch-tokens", type=int, default=0, help="pack several postings into one LLM request up to this many estimated tokens (0 = one posting per request)")
+    parser.add_argument("--batch-postings", type=int, default=20, help="maximum postings per batched LLM request")
+    parser.add_argument("--cache-path", default="data/llm_cache.sqlite", help="persistent cache of raw LLM answers")
+    parser.add_argument("--cache-max-mb", type=float, default=512, help="size limit of the LLM answer cache (least recently used entries are evicted)")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the LLM answer cache")
+    parser.add_argument("--refresh-cache", action="store_true", help="re-query the LLM and overwrite cached answers")
+    parser.add_argument("--token-budget", type=int, default=1000, help="estimated input tokens per posting after reduction to its skill-bearing sections (0 = no limit)")
+    parser.add_argument("--no-reduce", action="store_true", help="send the whole scraped description to the LLM instead of the reduced text")
+    parser.add_argument("--hedge", action="store_true", help="duplicate LLM requests slower than the provider's recent p95 to a secondary provider; circuit-break failing providers")
+    parser.add_argument("--hedge-provider", choices=["openai", "gemini", "mock"], default=None, help="secondary provider for hedged requests (default: the other of OpenAI/Gemini when both are configured)")
+    parser.add_argument("--hedge-model", default=None, help="model asked of the hedge provider (default: gpt-4o-mini for OpenAI, gemini-2.0-flash for Gemini)")
+    parser.add_argument("--hedge-percentile", type=float, default=95.0, help="latency percentile used as the hedging deadline")
+    parser.add_argument("--max-connections", type=int, default=20, help="size of the shared keep-alive HTTP connection pool per LLM client")
+    parser.add_argument("--gazetteer", choices=["off", "hybrid", "only"], default="off", help="match taxonomy labels locally before the LLM (hybrid = call the LLM only for postings with enough uncovered text)")
+    parser.add_argument("--gazetteer-min-uncovered", type=int, default=30, help="hybrid mode: uncovered content words that still require an LLM call")
+    parser.add_argument("--queue-size", type=int, default=64, help="capacity of each queue between pipeline stages; a full queue pauses the stage feeding it")
+    parser.add_argument("--normalize-batch-skills", type=int, default=256, help="normalize as soon as this many extracted skills are waiting")
+    parser.add_argument("--normalize-batch-ms", type=float, default=200.0, help="... or once the oldest waiting posting is this old")
+    parser.add_argument("--shards", type=int, default=0, help="split postings by job id hash over this many processes and merge their outputs in input order (0 = single process; --concurrency is per shard, --rpm/--tpm are shared)")
+    parser.add_argument("--metrics-path", default="data/extraction_metrics.jsonl", help="append one JSON metrics record per posting here ('' = in-process summary only)")
 
     args = parser.parse_args()
 
     print("🚀 Starting Skill Extraction and Normalization Pipeline...\n")
-    pipeline = SkillPipeline(
+    # The same output for any shard count; --resume needs the shard count of the interrupted run
+    make_pipeline = partial(ShardedPipeline, args.shards) if args.shards > 0 else SkillPipeline
+    pipeline = make_pipeline(
         args.input,
         args.taxonomy,
         args.output,
@@ -34,6 +63,32 @@ if __name__ == "__main__":
         provider=args.provider,
         model_name=args.model,
         max_retries=args.retries,
+        max_in_flight=args.concurrency,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        batch_token_budget=args.batch_tokens,
+        batch_max_postings=args.batch_postings,
+        cache_path=None if args.no_cache else args.cache_path,
+        cache_max_mb=args.cache_max_mb,
+        refresh_cache=args.refresh_cache,
+        max_connections=args.max_connections,
+        hedge=args.hedge,
+        hedge_provider=args.hedge_provider,
+        hedge_model=args.hedge_model,
+        hedge_percentile=args.hedge_percentile,
+        reduce_text=not args.no_reduce,
+        token_budget=args.token_budget,
+        gazetteer_mode=args.gazetteer,
+        gazetteer_min_uncovered=args.gazetteer_min_uncovered,
+        metrics_path=args.metrics_path or None,
+        jsonl_path=args.jsonl_path,
+        compact_output=not args.no_compact,
+        resume=args.resume,
+        queue_size=args.queue_size,
+        normalize_batch_skills=args.normalize_batch_skills,
+        normalize_batch_ms=args.normalize_batch_ms,
     )
     pipeline.process_jobs()
+    # Per-domain and per-run aggregates of the per-posting extraction metrics
+    print("\n" + pipeline.metrics.report())
     print("\n🎯 Done — standardized multilingual skills dataset ready.")
\ No newline at end of file
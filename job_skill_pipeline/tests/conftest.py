@@ -0,0 +1,80 @@
+
+"""Shared fixtures: a small trilingual taxonomy and a deterministic stand-in for the sentence encoder."""
+
+import zlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import nlp.normalize_skills as normalize_skills
+from nlp.mock_llm import MockLLMServer
+
+TAXONOMY_ROWS = [
+    # category, skill_nl, skill_fr, skill_en
+    ("digital", "Microsoft Excel", "Microsoft Excel", "Microsoft Excel"),
+    ("digital", "Python programmeren", "programmation Python", "Python programming"),
+    ("digital", "SQL databanken", "bases de données SQL", "SQL databases"),
+    ("soft", "communicatie", "communication", "communication"),
+    ("soft", "teamwerk", "travail d'équipe", "teamwork"),
+    ("soft", "klantvriendelijkheid", "orientation client", "customer orientation"),
+    ("technical", "heftruck rijden", "conduite de chariot élévateur", "forklift driving"),
+    ("technical", "lassen", "soudage", "welding"),
+    ("technical", "boekhouding", "comptabilité", "accounting"),
+    ("technical", "projectbeheer", "gestion de projet", "project management"),
+]
+
+
+class HashEncoder:
+    """
+    Embeds a text as L2-normalized counts of its hashed character trigrams, so
+    texts sharing most of their characters score close to 1. Counts its calls.
+    """
+
+    backend = "hash"
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.calls = 0
+        self.texts = 0
+
+    def vector(self, text: str) -> np.ndarray:
+        v = np.zeros(self.dim, dtype=np.float32)
+        padded = f"  {text.lower()} "
+        for i in range(len(padded) - 2):
+            v[zlib.crc32(padded[i:i + 3].encode("utf-8")) % self.dim] += 1
+        return v / max(float(np.linalg.norm(v)), 1e-12)
+
+    def encode(self, texts, batch_size: int = 64) -> np.ndarray:
+        self.calls += 1
+        self.texts += len(texts)
+        return np.stack([self.vector(t) for t in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
+
+
+@pytest.fixture
+def taxonomy_df():
+    return pd.DataFrame(TAXONOMY_ROWS, columns=["category", "skill_nl", "skill_fr", "skill_en"])
+
+
+@pytest.fixture
+def encoder(monkeypatch):
+    """The encoder every SkillNormalizer built in the test loads."""
+    encoder = HashEncoder()
+    monkeypatch.setattr(normalize_skills, "load_encoder", lambda *args, **kwargs: encoder)
+    return encoder
+
+
+@pytest.fixture
+def make_normalizer(taxonomy_df, encoder, tmp_path):
+    """Builds SkillNormalizers on the test taxonomy, with the embedding cache in a temporary directory."""
+    def make(**kwargs):
+        kwargs.setdefault("cache_dir", str(tmp_path / "embedding_cache"))
+        return normalize_skills.SkillNormalizer(kwargs.pop("taxonomy", taxonomy_df), **kwargs)
+    return make
+
+
+@pytest.fixture
+def mock_server():
+    """An in-process OpenAI-compatible mock LLM answering every request after a fixed 20 ms."""
+    with MockLLMServer(latency_ms=20, latency_sigma=0) as server:
+        yield server
@@ -0,0 +1,74 @@
+
+"""ANN backends: recall against exact brute force, and persisted indexes."""
+
+import numpy as np
+import pytest
+
+from nlp.ann_index import BruteForceIndex, HNSWIndex, IVFIndex, hnswlib, recall_report
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.fixture
+def data():
+    """Clustered unit vectors (like a taxonomy's synonyms) and queries perturbed from random rows."""
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((40, 32))
+    matrix = _normalize(centers[rng.integers(0, 40, 2000)] + 0.3 * rng.standard_normal((2000, 32)))
+    queries = _normalize(matrix[rng.integers(0, 2000, 200)] + 0.05 * rng.standard_normal((200, 32)))
+    return matrix, queries
+
+
+def test_brute_force_is_exact(data):
+    matrix, queries = data
+    idx, scores = BruteForceIndex(matrix, chunk_size=64).search(queries, k=5)
+
+    full = queries @ matrix.T
+    np.testing.assert_array_equal(idx[:, 0], full.argmax(axis=1))
+    np.testing.assert_allclose(scores, np.take_along_axis(full, idx, axis=1), rtol=1e-5)
+    assert (np.diff(scores, axis=1) <= 0).all()
+
+
+def test_ivf_recall_against_brute_force(data):
+    matrix, queries = data
+    index = IVFIndex.build(matrix, nprobe=8)
+
+    report = recall_report(index, matrix, queries, k=5)
+    assert report["recall@5"] >= 0.95
+    assert report["top1_agreement"] >= 0.9
+
+    index.nprobe = index.centroids.shape[0]  # probing every cluster is exhaustive
+    assert recall_report(index, matrix, queries, k=1)["recall@1"] == 1.0
+
+
+def test_ivf_save_load_round_trip(data, tmp_path):
+    matrix, queries = data
+    index = IVFIndex.build(matrix, nlist=16)
+    path = str(tmp_path / f"taxonomy{IVFIndex.suffix}")
+
+    index.save(path)
+    loaded = IVFIndex.load(path, matrix, nprobe=index.nprobe)
+
+    for a, b in zip(index.search(queries, k=3), loaded.search(queries, k=3)):
+        np.testing.assert_array_equal(a, b)
+
+
+@pytest.mark.skipif(hnswlib is None, reason="hnswlib is not installed")
+def test_hnsw_recall_against_brute_force(data, tmp_path):
+    matrix, queries = data
+    index = HNSWIndex.build(matrix)
+    assert recall_report(index, matrix, queries, k=5)["recall@5"] >= 0.95
+
+    path = str(tmp_path / f"taxonomy{HNSWIndex.suffix}")
+    index.save(path)
+    loaded = HNSWIndex.load(path, matrix.shape[1], matrix.shape[0])
+    np.testing.assert_array_equal(loaded.search(queries, k=1)[0], index.search(queries, k=1)[0])
+
+
+@pytest.mark.parametrize("backend", ["brute", "ivf"])
+def test_normalizer_backends_agree(make_normalizer, backend):
+    normalizer = make_normalizer(ann_backend=backend)
+    skills = ["Python programming", "teamwork skills", "projectmanagement", "lasser"]
+    assert normalizer.normalize(skills) == make_normalizer(cache_dir=None, ann_backend="brute").normalize(skills)
@@ -0,0 +1,99 @@
+
+"""Async extraction: one retry layer per request, concurrency under the provider limiter."""
+
+import asyncio
+
+import openai
+import pytest
+
+import nlp.skill_extractor as skill_extractor
+from nlp.skill_extractor import SkillExtractor
+
+
+class _Response:
+    headers = {"retry-after": "0"}
+
+
+class _RateLimited(Exception):
+    status_code = 429
+    response = _Response()
+
+
+@pytest.fixture
+def legacy_extractor(monkeypatch):
+    """An extractor on the pre-1.0 `openai.ChatCompletion` API, which has no async client."""
+    calls = []
+
+    class ChatCompletion:
+        @staticmethod
+        def create(**kwargs):
+            calls.append(kwargs)
+            raise _RateLimited("429 rate limit")
+
+    monkeypatch.setattr(openai, "ChatCompletion", ChatCompletion, raising=False)
+    extractor = SkillExtractor(provider="openai-legacy", max_retries=2)
+    extractor.chain, extractor.use_openai, extractor.use_genai = None, False, False
+    assert extractor._active_provider() == "openai-legacy"
+    return extractor, calls
+
+
+def test_legacy_async_path_retries_once_per_attempt(legacy_extractor):
+    extractor, calls = legacy_extractor
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(extractor.aextract("Python developer"))
+
+    assert len(calls) == extractor.max_retries + 1
+
+
+POSTINGS = [f"Posting {i}: experienced welder, forklift certificate and accounting knowledge {i}" for i in range(12)]
+
+
+def test_aextract_many_matches_sync_under_the_in_flight_limit(mock_server, monkeypatch):
+    extractor = SkillExtractor(provider="mock", base_url=mock_server.url, max_in_flight=3)
+    in_flight, peak = 0, 0
+    call_provider = extractor._acall_provider
+
+    async def counting(provider, prompt_text):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            return await call_provider(provider, prompt_text)
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(extractor, "_acall_provider", counting)
+    results = asyncio.run(extractor.aextract_many(POSTINGS))
+
+    assert results == [extractor.extract(text) for text in POSTINGS]
+    assert peak == 3
+    assert extractor.limiter_stats("mock")["requests"] == len(POSTINGS)
+
+
+def test_aextract_many_returns_failures_in_place(mock_server, monkeypatch):
+    extractor = SkillExtractor(provider="mock", base_url=mock_server.url)
+    call_provider = extractor._acall_provider
+
+    async def failing(provider, prompt_text):
+        if "Posting 1:" in prompt_text:
+            raise ValueError("bad answer")
+        return await call_provider(provider, prompt_text)
+
+    monkeypatch.setattr(extractor, "_acall_provider", failing)
+    results = asyncio.run(extractor.aextract_many(POSTINGS[:3]))
+
+    assert isinstance(results[1], RuntimeError)
+    assert all(isinstance(r, list) and r for r in (results[0], results[2]))
+
+
+def test_every_event_loop_gets_its_own_limiter(mock_server, monkeypatch):
+    extractor = SkillExtractor(provider="mock", base_url=mock_server.url, max_in_flight=1)
+    # Every loop at the same address, as when a new loop reuses the memory of a collected one
+    monkeypatch.setattr(skill_extractor, "id", lambda obj: 1, raising=False)
+
+    for _ in range(2):
+        assert all(isinstance(r, list) for r in asyncio.run(extractor.aextract_many(POSTINGS[:3])))
+
+    assert len(extractor._limiters) == 2
+    assert extractor.limiter_stats("mock")["requests"] == 3
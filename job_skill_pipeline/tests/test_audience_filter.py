@@ -0,0 +1,52 @@
+
+"""audience_filter: the one-pass scanner flags exactly the terms the former per-term regexes did."""
+
+import random
+import re
+
+import pytest
+
+from nlp.audience_filter import AUDIENCE_PATTERNS, audience_filter, audience_mentions
+
+
+def _regex_is_audience(term: str, text: str, lang) -> bool:
+    """The per-term search the scanner replaced."""
+    triggers, nouns = AUDIENCE_PATTERNS.get(lang, AUDIENCE_PATTERNS[None])
+    t = re.escape(term.lower())
+    txt = text.lower()
+    patterns = [rf"\b({triggers})\b(?:\s+\w+){{0,5}}\s+{t}\b", rf"\b{t}\b\s+({nouns})\b"]
+    return any(re.search(p, txt) for p in patterns)
+
+
+VOCAB = {
+    "en": "with to for among together work closely communicate communicating liaise coordinate report people team "
+          "department colleagues stakeholders customers clients production management excel sql c++ .net the a and , . ( ) - ai data",
+    "nl": "met naar voor samen werken werk communiceren rapporteren aan contact afstemming mensen team afdeling "
+          "collega's belanghebbenden klanten productie excel sql c++ de het en , . ( ) - ai data",
+    "fr": "avec pour auprès de travailler reporter à communiquer coordonner prendre contact personnes équipe "
+          "département collègues parties prenantes clients production excel sql c++ le la , . ( ) - ai",
+    "de": "with to for among work communicate report people team clients mit und excel sql c++ , .",
+}
+
+
+@pytest.mark.parametrize("lang", sorted(VOCAB))
+def test_matches_per_term_regexes(lang):
+    rng = random.Random(lang)
+    vocab = VOCAB[lang].split()
+    for _ in range(500):
+        words = [rng.choice(vocab) for _ in range(rng.randint(1, 25))]
+        text = "".join(w + rng.choice([" ", "  ", "\n", "\t"]) for w in words)
+        terms = {" ".join(rng.choice(vocab) for _ in range(rng.randint(1, 2))) for _ in range(6)}
+        terms = sorted(t.strip() for t in terms if t.strip())
+
+        expected = [t for t in terms if not _regex_is_audience(t, text, lang)]
+
+        assert audience_filter(terms, text, lang) == expected, (text, terms)
+
+
+def test_examples():
+    text = "You will communicate with production people and report to the Finance team. Strong Excel skills."
+    assert audience_mentions(["Production", "finance", "Excel"], text, "en") == {"production", "finance"}
+    assert audience_filter(["Excel", "Finance"], text, "en") == ["Excel"]
+    assert audience_filter(["klanten", "SAP"], "Kennis van SAP. Je werkt samen met onze klanten.", "nl") == ["SAP"]
+    assert audience_filter(["Excel"], "", "en") == ["Excel"]
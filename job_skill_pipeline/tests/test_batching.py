@@ -0,0 +1,70 @@
+
+"""Multi-posting prompts: packing within the token budget, alias mapping and re-issuing left-out postings."""
+
+import asyncio
+import json
+
+import pytest
+
+import nlp.mock_llm as mock_llm
+from nlp.rate_limit import estimate_tokens
+from nlp.skill_extractor import SkillExtractor
+
+JOBS = [
+    {"job_id": f"job-{i}", "text": f"Posting {i}: experienced welder, forklift certificate and accounting knowledge " * (1 + i % 3)}
+    for i in range(7)
+]
+
+
+@pytest.fixture
+def extractor(mock_server):
+    return SkillExtractor(provider="mock", base_url=mock_server.url)
+
+
+def test_pack_batches_respects_budget_and_posting_limit(extractor):
+    overhead = estimate_tokens(extractor.batch_prompt.template)
+    budget = overhead + 120
+
+    batches = extractor._pack_batches(JOBS, token_budget=budget, max_postings=3)
+
+    assert [job for batch in batches for job in batch] == JOBS
+    for batch in batches:
+        assert len(batch) <= 3
+        assert len(batch) == 1 or overhead + sum(estimate_tokens(j["text"]) + 8 for j in batch) <= budget
+    # A posting larger than the whole budget still gets a batch of its own
+    assert extractor._pack_batches(JOBS[:2], token_budget=1, max_postings=20) == [[JOBS[0]], [JOBS[1]]]
+
+
+def test_parse_batch_answer_maps_aliases_to_job_ids():
+    batch = JOBS[:3]
+    answer = 'Sure:\n```json\n{"J1": ["lassen"], "J3": [], "J2": "not a list", "J9": ["Excel"]}\n```'
+
+    assert SkillExtractor._parse_batch_answer(answer, batch) == {"job-0": ["lassen"], "job-2": []}
+    assert SkillExtractor._parse_batch_answer("no JSON here", batch) == {}
+    assert SkillExtractor._parse_batch_answer('["lassen"]', batch) == {}
+
+
+def test_extract_batch_matches_single_extraction(extractor, mock_server):
+    results = extractor.extract_batch(JOBS, token_budget=400, max_postings=4)
+
+    batches = extractor._pack_batches(JOBS, 400, 4)
+    assert mock_server.stats["requests"] == len(batches) < len(JOBS)
+    assert results == {job["job_id"]: extractor.extract(job["text"]) for job in JOBS}
+    assert asyncio.run(extractor.aextract_batch(JOBS, token_budget=400, max_postings=4)) == results
+
+
+def test_postings_left_out_of_the_answer_are_reissued(extractor, mock_server, monkeypatch):
+    answer = mock_llm.mock_answer
+
+    def forgetful(prompt):
+        parsed = json.loads(answer(prompt))
+        if isinstance(parsed, dict):
+            parsed.pop("J2", None)
+        return json.dumps(parsed)
+
+    monkeypatch.setattr(mock_llm, "mock_answer", forgetful)
+    results = extractor.extract_batch(JOBS[:3])
+
+    assert mock_server.stats["requests"] == 2  # the batch, then job-1 on its own
+    assert set(results) == {"job-0", "job-1", "job-2"}
+    assert results["job-1"] == extractor.extract(JOBS[1]["text"])
@@ -0,0 +1,73 @@
+
+"""Checkpoint: the input offset only advances over a gap-free prefix of finished postings."""
+
+import pytest
+
+from pipeline.checkpoint import Checkpoint
+
+
+@pytest.fixture
+def paths(tmp_path):
+    input_path = tmp_path / "jobs.json"
+    input_path.write_text("[]")
+    return str(tmp_path / "out.jsonl.ckpt"), str(input_path)
+
+
+def test_offset_waits_for_gaps(paths):
+    checkpoint = Checkpoint(*paths)
+    checkpoint.written("b", seq=1, end_offset=20)
+    checkpoint.skipped(seq=2, end_offset=30)
+    checkpoint.commit()
+    assert checkpoint.offset == 0  # posting 0 still in flight
+
+    checkpoint.written("a", seq=0, end_offset=10)
+    checkpoint.commit()
+    assert checkpoint.offset == 30
+
+    checkpoint.written("d", seq=3, end_offset=40)
+    checkpoint.close()
+    assert checkpoint.offset == 40
+
+
+def test_failure_stops_offset_but_not_ids(paths):
+    checkpoint = Checkpoint(*paths)
+    checkpoint.written("a", seq=0, end_offset=10)
+    checkpoint.failed(seq=1)
+    checkpoint.written("c", seq=2, end_offset=30)
+    checkpoint.close()
+    assert checkpoint.offset == 10
+
+    resumed = Checkpoint(*paths, resume=True)
+    assert resumed.offset == 10
+    assert resumed.is_done("a") and resumed.is_done("c") and not resumed.is_done("b")
+    assert resumed.summary() is not None
+    resumed.close()
+
+
+def test_ids_only_durable_after_commit(paths):
+    checkpoint = Checkpoint(*paths)
+    checkpoint.written("a", seq=0, end_offset=10)
+    checkpoint.commit()
+    checkpoint.written("b", seq=1, end_offset=20)  # record not fsynced yet: crash before the next commit
+
+    resumed = Checkpoint(*paths, resume=True)
+    assert resumed.is_done("a") and not resumed.is_done("b")
+    assert resumed.offset == 10
+
+
+def test_fresh_run_and_changed_input(paths):
+    ckpt_path, input_path = paths
+    checkpoint = Checkpoint(*paths)
+    checkpoint.written("a", seq=0, end_offset=10)
+    checkpoint.close()
+
+    assert Checkpoint(*paths).done == set()  # without resume the run starts over
+
+    checkpoint = Checkpoint(*paths)
+    checkpoint.written("a", seq=0, end_offset=10)
+    checkpoint.close()
+    with open(input_path, "w") as f:
+        f.write('[{"job_id": "a"}]')
+    resumed = Checkpoint(*paths, resume=True)
+    assert resumed.offset == 0  # offsets of another file mean nothing
+    assert resumed.is_done("a")
@@ -0,0 +1,62 @@
+
+"""EmbeddingCache: taxonomy embeddings written once and memory-mapped on every later load."""
+
+import numpy as np
+
+from nlp.embedding_cache import EmbeddingCache
+
+
+def test_round_trip_is_memory_mapped(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    texts = ["Python", "Excel", "lassen"]
+    matrix = np.random.default_rng(0).standard_normal((3, 8)).astype(np.float32)
+    key = EmbeddingCache.make_key("model-a", texts)
+
+    assert cache.load(key, len(texts)) is None
+    saved = cache.save(key, "model-a", texts, matrix)
+    loaded = cache.load(key, len(texts))
+
+    assert isinstance(saved, np.memmap) and isinstance(loaded, np.memmap)
+    np.testing.assert_array_equal(loaded, matrix)
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_key_covers_model_and_text_order():
+    texts = ["Python", "Excel"]
+    key = EmbeddingCache.make_key("model-a", texts)
+    assert key == EmbeddingCache.make_key("model-a", list(texts))
+    assert key != EmbeddingCache.make_key("model-b", texts)
+    assert key != EmbeddingCache.make_key("model-a", texts[::-1])
+    assert EmbeddingCache.make_key("m", ["ab", "c"]) != EmbeddingCache.make_key("m", ["a", "bc"])
+
+
+def test_wrong_count_or_corrupt_entry_is_a_miss(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    key = EmbeddingCache.make_key("m", ["a", "b"])
+    cache.save(key, "m", ["a", "b"], np.ones((2, 4), dtype=np.float32))
+
+    assert cache.load(key, 3) is None
+    npy_path, _ = cache.paths(key)
+    with open(npy_path, "wb") as f:
+        f.write(b"not a numpy file")
+    assert cache.load(key, 2) is None
+
+
+def test_derived_arrays(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    assert cache.load_array("k", "float16") is None
+    stored = cache.save_array("k", "float16", np.ones((2, 3), dtype=np.float16))
+    np.testing.assert_array_equal(cache.load_array("k", "float16"), stored)
+
+
+def test_normalizer_encodes_taxonomy_once(make_normalizer, encoder):
+    first = make_normalizer()
+    encoded = encoder.texts
+    assert encoded > 0
+
+    second = make_normalizer()
+
+    assert encoder.texts == encoded  # served from the cache, not re-encoded
+    assert isinstance(second.embeddings, np.memmap)
+    np.testing.assert_array_equal(second.embeddings, first.embeddings)
+    assert second.normalize(["Python programming"]) == first.normalize(["Python programming"])
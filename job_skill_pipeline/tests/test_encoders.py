@@ -0,0 +1,75 @@
+
+"""Encoder backends: fallback to PyTorch, one embedding space per backend, and the worker pool keeping input order."""
+
+import multiprocessing.dummy
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import nlp.encode_pool as encode_pool
+import nlp.encoders as encoders
+
+
+class _FakeTorchEncoder:
+    def __init__(self, model_name: str, quantize: bool = False):
+        self.model_name = model_name
+        self.backend = "quantized" if quantize else "torch"
+
+
+@pytest.fixture
+def torch_encoder(monkeypatch):
+    monkeypatch.setattr(encoders, "TorchEncoder", _FakeTorchEncoder)
+
+
+def test_onnx_falls_back_to_pytorch(torch_encoder, tmp_path):
+    encoder = encoders.load_encoder("model-a", "onnx", str(tmp_path / "missing.onnx"))
+    assert (type(encoder), encoder.backend) == (_FakeTorchEncoder, "torch")
+
+
+def test_backend_selection(torch_encoder):
+    assert encoders.load_encoder("model-a", "quantized").backend == "quantized"
+    assert encoders.load_encoder("model-a").backend == "torch"
+    with pytest.raises(ValueError):
+        encoders.load_encoder("model-a", "tensorrt")
+
+
+def test_backends_cache_separately(make_normalizer):
+    torch_normalizer = make_normalizer(model_name="model-a")
+    onnx_normalizer = make_normalizer(model_name="model-a", encoder_backend="onnx")
+
+    assert (torch_normalizer.encoder_id, onnx_normalizer.encoder_id) == ("model-a", "model-a@onnx")
+    assert onnx_normalizer._cache_key != torch_normalizer._cache_key
+
+
+@pytest.fixture
+def thread_pool(monkeypatch, encoder):
+    """EncodePool on threads instead of spawned processes, every worker sharing the test encoder."""
+    context = SimpleNamespace(Pool=multiprocessing.dummy.Pool)
+    monkeypatch.setattr(encode_pool, "multiprocessing", SimpleNamespace(get_context=lambda method: context))
+    monkeypatch.setattr(encode_pool, "load_encoder", lambda *args, **kwargs: encoder)
+    monkeypatch.setattr(encode_pool, "_worker_encoder", None)
+    monkeypatch.setenv("OMP_NUM_THREADS", "1")
+    return encoder
+
+
+def test_pool_keeps_input_order(thread_pool):
+    texts = [f"skill {i}" for i in range(103)]
+    with encode_pool.EncodePool("model-a", processes=3, chunk_size=10) as pool:
+        chunks = list(pool.imap_encode(texts))
+        encoded = pool.encode(texts)
+        assert pool.encode([]).shape == (0, 0)
+
+    assert [len(c) for c in chunks] == [10] * 10 + [3]
+    np.testing.assert_array_equal(encoded, np.stack([thread_pool.vector(t) for t in texts]))
+    assert pool.pool is None
+
+
+def test_normalizer_encodes_through_the_pool(thread_pool, make_normalizer):
+    normalizer = make_normalizer(cache_dir=None, encode_processes=2)
+    single = make_normalizer(cache_dir=None)
+
+    assert isinstance(normalizer.model, encode_pool.EncodePool)
+    np.testing.assert_array_equal(normalizer.embeddings, single.embeddings)
+    normalizer.close()
+    assert normalizer._model is None
@@ -0,0 +1,68 @@
+
+"""FuzzyIndex: same best match (and tie-break) as scanning every label with difflib."""
+
+import random
+from difflib import SequenceMatcher
+
+import pytest
+
+from nlp.fuzzy_index import FuzzyIndex
+from nlp.skill_extractor import FUZZY_INDEX_CACHE_SIZE, SkillExtractor
+
+
+def _scan(query, labels, threshold):
+    """The full difflib scan FuzzyIndex replaces: first label with the highest ratio above `threshold`."""
+    best, best_score = None, 0.0
+    for label in labels:
+        score = SequenceMatcher(None, query.lower(), label.lower()).ratio()
+        if score > best_score:
+            best, best_score = label, score
+    return (best, best_score) if best_score > threshold else (None, 0.0)
+
+
+@pytest.mark.parametrize("threshold", [0.0, 0.5, 0.75, 0.9])
+def test_matches_full_scan(threshold):
+    rng = random.Random(threshold)
+    alphabet = "abcdeéfghij klmn"
+
+    def word():
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 14)))
+
+    for _ in range(300):
+        labels = [word() for _ in range(rng.randint(0, 40))]
+        labels += [label.upper() for label in labels[:3]]  # case-only duplicates exercise the tie-break
+        index = FuzzyIndex(labels)
+        for _ in range(5):
+            query = word() if rng.random() < 0.5 or not labels else rng.choice(labels)[:-1]
+            assert index.best_match(query, threshold) == _scan(query, labels, threshold), (query, labels)
+
+
+def test_upper_bounds_never_below_ratio():
+    labels = ["Microsoft Excel", "excel", "Python", "project management", ""]
+    index = FuzzyIndex(labels)
+    for query in ["excell", "pyton", "management", ""]:
+        bounds = index.upper_bounds(query)
+        for label, bound in zip(labels, bounds):
+            assert bound >= SequenceMatcher(None, query, label.lower()).ratio()
+
+
+def test_examples():
+    index = FuzzyIndex(["Microsoft Excel", "Python", "Project management"])
+    assert index.best_match("pyton")[0] == "Python"
+    assert index.best_match("javascript") == (None, 0.0)
+    assert FuzzyIndex([]).best_match("excel") == (None, 0.0)
+    assert len(index) == 3
+
+
+def test_extractor_keeps_a_bounded_index_cache_keyed_by_labels():
+    extractor = SkillExtractor(provider="mock")
+    labels = ["Python", "Excel"]
+    index = extractor._fuzzy_index(labels)
+    assert extractor._fuzzy_index(list(labels)) is index  # same labels, another list object
+
+    labels.append("SQL")  # edited in place: must not reuse the stale index
+    assert extractor._fuzzy_index(labels).best_match("sql")[0] == "SQL"
+
+    for i in range(3 * FUZZY_INDEX_CACHE_SIZE):
+        extractor._fuzzy_index([f"skill {i}"])
+    assert len(extractor._fuzzy_indexes) == FUZZY_INDEX_CACHE_SIZE
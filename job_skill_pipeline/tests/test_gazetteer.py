@@ -0,0 +1,80 @@
+
+"""Gazetteer: Aho-Corasick label hits agree with a regex scan; coverage drives hybrid extraction."""
+
+import random
+import re
+
+import pytest
+
+from nlp.gazetteer import AhoCorasick, Gazetteer
+from nlp.skill_extractor import SkillExtractor
+
+VOCABULARY = ["python", "excel", "sql", "rijbewijs", "b", "project", "management", "gestion", "de", "projet", "team"]
+
+
+def _regex_scan(labels, text):
+    """Leftmost-longest, whole-word, case-insensitive hits of `labels`: what the automaton replaces."""
+    alternatives = sorted((r"\s+".join(map(re.escape, label.split())) for label in labels), key=len, reverse=True)
+    pattern = re.compile(r"(?<!\w)(?:" + "|".join(alternatives) + r")(?!\w)", flags=re.IGNORECASE)
+    return [(m.start(), m.end()) for m in pattern.finditer(text)]
+
+
+def test_automaton_reports_every_occurrence():
+    rng = random.Random(0)
+    for _ in range(200):
+        patterns = list({tuple(rng.choices(VOCABULARY[:5], k=rng.randint(1, 3))) for _ in range(rng.randint(1, 8))})
+        tokens = rng.choices(VOCABULARY[:5], k=rng.randint(0, 30))
+        expected = {
+            (i, i + len(p), pid)
+            for pid, p in enumerate(patterns)
+            for i in range(len(tokens) - len(p) + 1)
+            if tuple(tokens[i:i + len(p)]) == p
+        }
+        assert set(AhoCorasick(patterns).iter_matches(tokens)) == expected
+
+
+def test_find_matches_regex_scan():
+    rng = random.Random(1)
+    for _ in range(200):
+        labels = list({" ".join(rng.choices(VOCABULARY, k=rng.randint(1, 3))) for _ in range(rng.randint(1, 10))})
+        labels = [label for label in labels if len(label) >= 3]
+        if not labels:
+            continue
+        words = [rng.choice(VOCABULARY + ["excellent", "Python", "SQL,"]) for _ in range(rng.randint(0, 40))]
+        text = " ".join(words)
+        gazetteer = Gazetteer({"en": labels})
+
+        assert [(m.start, m.end) for m in gazetteer.find(text)] == _regex_scan(labels, text), (labels, text)
+
+
+def test_labels_are_merged_across_languages():
+    gazetteer = Gazetteer({"nl": ["Microsoft Excel", "rijbewijs", "rijbewijs B"], "fr": ["Microsoft  Excel"], "en": ["AI"]})
+
+    matches = gazetteer.find("Rijbewijs B en microsoft excel vereist, excellent Frans.")
+
+    assert [(m.label, m.languages) for m in matches] == [("rijbewijs B", ("nl",)), ("Microsoft Excel", ("nl", "fr"))]
+    assert len(gazetteer) == 3  # "AI" is shorter than min_chars
+
+
+def test_coverage_counts_words_of_segments_without_hits():
+    gazetteer = Gazetteer({"en": ["Python", "project management"]})
+
+    coverage = gazetteer.coverage("Python, project management. You enjoy working outdoors with animals")
+
+    assert coverage.skills == ["Python", "project management"]
+    assert (coverage.uncovered_words, coverage.total_words) == (6, 9)
+
+
+@pytest.mark.parametrize("mode, requests", [("only", 0), ("hybrid", 1)])
+def test_extractor_skips_the_llm_for_covered_postings(mock_server, mode, requests):
+    gazetteer = Gazetteer({"en": ["Python", "SQL", "project management"]})
+    extractor = SkillExtractor(
+        provider="mock", base_url=mock_server.url, gazetteer=gazetteer, gazetteer_mode=mode, gazetteer_min_uncovered=5
+    )
+
+    covered = extractor.extract("Python, SQL, project management.")
+    extractor.extract("Python. You will coordinate warehouse logistics and supervise seasonal staff")
+
+    assert covered == ["Python", "SQL", "project management"]
+    assert mock_server.stats["requests"] == requests
+    assert extractor.gazetteer_report()["llm_calls_avoided"] == 2 - requests
@@ -0,0 +1,181 @@
+
+"""Hedged requests: duplicates past the deadline, circuit breaker transitions, and the hedge provider's own endpoint and model."""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from nlp.hedging import CircuitBreaker, HedgePolicy
+from nlp.metrics import MetricsSink
+from nlp.mock_llm import MockLLMServer
+from nlp.skill_extractor import SkillExtractor
+
+
+class _ServerError(Exception):
+    status_code = 500
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+
+def _open(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def _expire(breaker: CircuitBreaker):
+    breaker.opened_at -= breaker.reset_after
+
+
+def test_breaker_opens_half_opens_and_closes():
+    breaker = CircuitBreaker(failure_threshold=3, reset_after=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    _expire(breaker)
+    assert breaker.state == "half_open"
+    assert breaker.allow() and not breaker.allow()  # a single trial call
+    breaker.record_success()
+    assert (breaker.state, breaker.failures, breaker.times_opened) == ("closed", 0, 1)
+
+
+def test_failed_trial_reopens_and_abandoned_trial_is_retried():
+    breaker = CircuitBreaker(failure_threshold=2, reset_after=30)
+    _open(breaker)
+    _expire(breaker)
+
+    assert breaker.allow()
+    breaker.release_trial()  # e.g. the trial was a cancelled hedge loser
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert (breaker.state, breaker.times_opened) == ("open", 2)
+
+
+def test_rate_limits_do_not_trip_the_breaker():
+    policy = HedgePolicy(failure_threshold=1)
+    policy._record("openai", 0.1, _RateLimited("429"))
+    assert policy.breaker_states() == {"openai": "closed"}
+    policy._record("openai", 0.1, _ServerError("500"))
+    assert policy.breaker_states() == {"openai": "open"}
+
+
+def test_deadline_follows_the_latency_percentile():
+    policy = HedgePolicy(percentile=50, min_samples=3, initial_deadline=7, min_deadline=0.5, max_deadline=2)
+    assert policy.deadline("openai") == 7
+    for seconds in (0.9, 1.0, 1.1):
+        policy._record("openai", seconds, None)
+    assert policy.deadline("openai") == pytest.approx(1.0)
+    for seconds in (5, 5, 5, 5):
+        policy._record("openai", seconds, None)
+    assert policy.deadline("openai") == 2
+
+
+def _slow_primary(provider: str) -> str:
+    time.sleep(0.5 if provider == "openai" else 0.01)
+    return f'["{provider}"]'
+
+
+def test_slow_primary_is_hedged():
+    policy = HedgePolicy(initial_deadline=0.05)
+
+    assert policy.call(["openai", "gemini"], _slow_primary, lambda a: True) == '["gemini"]'
+    assert (policy.stats["hedged"], policy.stats["hedge_wins"]) == (1, 1)
+
+    fast = HedgePolicy(initial_deadline=1.0)
+    assert fast.call(["gemini", "openai"], _slow_primary, lambda a: True) == '["gemini"]'
+    assert fast.stats["hedged"] == 0
+
+
+def test_slow_primary_is_hedged_and_cancelled_async():
+    cancelled = []
+
+    async def call(provider, on_start):
+        on_start()
+        try:
+            await asyncio.sleep(0.5 if provider == "openai" else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(provider)
+            raise
+        return f'["{provider}"]'
+
+    policy = HedgePolicy(initial_deadline=0.05)
+    assert asyncio.run(policy.acall(["openai", "gemini"], call, lambda a: True)) == '["gemini"]'
+    assert cancelled == ["openai"]
+    assert policy.stats["hedge_wins"] == 1
+
+
+def test_invalid_or_failed_answers_go_to_the_secondary_at_once():
+    policy = HedgePolicy(initial_deadline=10)
+
+    def call(provider):
+        if provider == "openai":
+            return "Sorry, I cannot help with that."
+        return '["lassen"]'
+
+    start = time.monotonic()
+    assert policy.call(["openai", "gemini"], call, SkillExtractor._valid_answer) == '["lassen"]'
+    assert time.monotonic() - start < 1
+    assert policy.stats["invalid_answers"] == 1
+
+    def failing(provider):
+        raise _ServerError(f"{provider} down")
+
+    with pytest.raises(_ServerError, match="gemini down"):
+        policy.call(["openai", "gemini"], failing, lambda a: True)
+
+
+def test_open_breaker_fails_over_to_the_secondary():
+    policy = HedgePolicy(failure_threshold=1)
+    policy._record("openai", 0.1, _ServerError("500"))
+
+    assert policy.call(["openai", "gemini"], lambda p: p, lambda a: True) == "gemini"
+    assert policy.stats["failovers"] == 1
+
+
+@pytest.fixture
+def openai_extractor(monkeypatch, mock_server, tmp_path):
+    """An OpenAI extractor hedged to the mock: the primary is a slow mock standing in for the real API."""
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("MOCK_LLM_URL", mock_server.url)
+    with MockLLMServer(latency_ms=2000, latency_sigma=0) as slow:
+        extractor = SkillExtractor(
+            provider="openai", model_name="gpt-4o", base_url=slow.url, hedge=True, hedge_provider="mock",
+            metrics=MetricsSink(str(tmp_path / "metrics.jsonl")),
+        )
+        extractor.chain = None
+        extractor.hedging.initial_deadline = 0.1
+        yield extractor
+
+
+def test_hedge_provider_gets_its_own_endpoint_and_model(openai_extractor, mock_server):
+    extractor = openai_extractor
+    assert extractor._hedge_providers("openai") == ["openai", "mock"]
+    assert extractor._openai_endpoint("openai") == ("sk-test", extractor.base_url)
+    assert extractor._openai_endpoint("mock") == ("mock", mock_server.url)
+    assert (extractor._model_for("openai"), extractor._model_for("mock"), extractor._model_for("gemini")) == (
+        "gpt-4o", "mock", "gemini-2.0-flash"
+    )
+    extractor.hedge_model = "mock-large"
+    assert extractor._model_for("mock") == "mock-large"
+
+
+@pytest.mark.parametrize("run", ["sync", "async"])
+def test_extractor_answer_comes_from_the_hedge(openai_extractor, mock_server, run):
+    extractor = openai_extractor
+    text = "Experienced welder with a forklift certificate"
+
+    skills = extractor.extract(text) if run == "sync" else asyncio.run(extractor.aextract(text))
+
+    assert skills and mock_server.stats["requests"] == 1
+    extractor.metrics.close()
+    [record] = [json.loads(line) for line in open(extractor.metrics.path, encoding="utf-8")]
+    assert (record["provider"], record["model"]) == ("mock", "mock")
+    assert extractor.hedging_stats()["hedge_wins"] == 1
@@ -0,0 +1,83 @@
+
+"""Incremental JSON reading (resume offsets) and the append-only JSONL writer."""
+
+import codecs
+import json
+
+import pytest
+
+from pipeline.json_stream import JsonlWriter, iter_json_records, iter_jsonl, iter_jsonl_positions
+
+RECORDS = [
+    {"job_id": "1", "title": "Data engineer", "description": "SQL, Python [required] {nice}"},
+    {"job_id": "2", "title": "Boekhouder", "description": "Kennis van Exact \"Online\" \\ Excel"},
+    {"job_id": "3", "title": "Comptable", "description": "Maîtrise d'Excel — 日本語 ok"},
+    {"job_id": "4", "title": "", "description": ""},
+]
+
+
+def _write_array(path, bom=False):
+    body = "[\n" + ",\n  ".join(json.dumps(r, ensure_ascii=False) for r in RECORDS) + "\n]\n"
+    path.write_bytes((codecs.BOM_UTF8 if bom else b"") + body.encode("utf-8"))
+    return path
+
+
+def _write_lines(path):
+    path.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n\n" for r in RECORDS), encoding="utf-8")
+    return path
+
+
+@pytest.fixture(params=["array", "array_bom", "jsonl"])
+def input_path(request, tmp_path):
+    if request.param == "jsonl":
+        return _write_lines(tmp_path / "jobs.jsonl")
+    return _write_array(tmp_path / "jobs.json", bom=request.param == "array_bom")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_reads_every_record(input_path, chunk_size):
+    found = list(iter_json_records(str(input_path), chunk_size=chunk_size))
+    assert [record for _, record in found] == RECORDS
+    offsets = [offset for offset, _ in found]
+    assert offsets == sorted(offsets) and offsets[-1] <= input_path.stat().st_size
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_resumes_from_every_offset(input_path, chunk_size):
+    offsets = [offset for offset, _ in iter_json_records(str(input_path))]
+    for i, offset in enumerate(offsets):
+        rest = list(iter_json_records(str(input_path), chunk_size=chunk_size, start=offset))
+        assert [record for _, record in rest] == RECORDS[i + 1:]
+        assert [o for o, _ in rest] == offsets[i + 1:]
+
+
+def test_writer_repairs_torn_tail(tmp_path):
+    path = tmp_path / "out" / "out.jsonl"
+    writer = JsonlWriter(str(path), fsync_every=2)
+    for record in RECORDS[:2]:
+        writer.write(record)
+    writer.close()
+    with open(path, "ab") as f:
+        f.write(b'{"job_id": "3", "tit')  # crash mid-line
+
+    assert list(iter_jsonl(str(path))) == RECORDS[:2]
+    writer = JsonlWriter(str(path))
+    writer.write(RECORDS[2])
+    writer.close()
+
+    assert list(iter_jsonl(str(path))) == RECORDS[:3]
+    positions = [position for position, _ in iter_jsonl_positions(str(path))]
+    with open(path, "rb") as f:
+        for position, record in zip(positions, RECORDS):
+            f.seek(position)
+            assert json.loads(f.readline()) == record
+
+
+def test_writer_truncate_starts_over(tmp_path):
+    path = tmp_path / "out.jsonl"
+    for truncate in (False, True):
+        writer = JsonlWriter(str(path), truncate=truncate)
+        writer.write(RECORDS[0])
+        writer.close()
+    assert list(iter_jsonl(str(path))) == RECORDS[:1]
+    assert list(iter_jsonl(str(tmp_path / "missing.jsonl"))) == []
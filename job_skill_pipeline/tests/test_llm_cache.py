@@ -0,0 +1,67 @@
+
+"""LLMResponseCache: content-addressed answers, LRU eviction, and extractions served without a request."""
+
+import asyncio
+
+from nlp.llm_cache import LLMResponseCache
+from nlp.skill_extractor import SkillExtractor
+
+TEXT = "Experienced welder with a forklift certificate and accounting knowledge"
+
+
+def test_key_covers_every_input():
+    base = ("template", "openai", "gpt-4o-mini", 0, "text")
+    key = LLMResponseCache.make_key(*base)
+    assert key == LLMResponseCache.make_key(*base)
+    for i, changed in enumerate(["other template", "gemini", "gpt-4o", 0.7, "other text"]):
+        assert LLMResponseCache.make_key(*base[:i], changed, *base[i + 1:]) != key
+
+
+def test_round_trip_persists_across_reopen(tmp_path):
+    path = str(tmp_path / "cache" / "llm.sqlite")
+    cache = LLMResponseCache(path)
+    assert cache.get("k") is None
+    cache.put("k", '["lassen"]')
+    assert cache.get("k") == '["lassen"]'
+    cache.close()
+
+    reopened = LLMResponseCache(path)
+    assert reopened.get("k") == '["lassen"]'
+    assert reopened.stats()["bytes"] == len('["lassen"]')
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"), max_bytes=300)
+    for key in "abc":
+        cache.put(key, key * 80)
+    cache._conn.execute("UPDATE responses SET accessed = 0 WHERE key = 'b'")  # "b" is the oldest read
+
+    cache.put("d", "d" * 80)
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) for key in "acd")
+    assert cache.stats()["evictions"] == 1 and cache.stats()["bytes"] == 240
+
+
+def test_extractor_serves_repeats_from_the_cache(mock_server, tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    extractor = SkillExtractor(provider="mock", base_url=mock_server.url, cache_path=path)
+
+    first = extractor.extract(TEXT)
+    assert extractor.extract(TEXT) == first
+    assert asyncio.run(extractor.aextract(TEXT)) == first
+    assert mock_server.stats["requests"] == 1
+    assert extractor.cache.stats()["hits"] == 2
+
+    # A new extractor on the same file is warm; refresh_cache re-queries and overwrites
+    assert SkillExtractor(provider="mock", base_url=mock_server.url, cache_path=path).extract(TEXT) == first
+    assert mock_server.stats["requests"] == 1
+    SkillExtractor(provider="mock", base_url=mock_server.url, cache_path=path, refresh_cache=True).extract(TEXT)
+    assert mock_server.stats["requests"] == 2
+
+
+def test_model_is_part_of_the_key(mock_server, tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    SkillExtractor(provider="mock", base_url=mock_server.url, cache_path=path, model_name="model-a").extract(TEXT)
+    SkillExtractor(provider="mock", base_url=mock_server.url, cache_path=path, model_name="model-b").extract(TEXT)
+    assert mock_server.stats["requests"] == 2
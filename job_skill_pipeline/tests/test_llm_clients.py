@@ -0,0 +1,54 @@
+
+"""ClientPool: one long-lived client per endpoint (and event loop), reused by every request."""
+
+import asyncio
+
+import pytest
+
+import nlp.llm_clients as llm_clients
+from nlp.llm_clients import ClientPool, httpx
+from nlp.skill_extractor import SkillExtractor
+
+
+def test_clients_are_cached_per_endpoint():
+    pool = ClientPool()
+    client = pool.openai("key", "http://127.0.0.1:1/v1")
+
+    assert pool.openai("key", "http://127.0.0.1:1/v1") is client
+    assert pool.openai("key", "http://127.0.0.1:2/v1") is not client
+    assert pool.stats()["clients_created"] == 2
+
+
+def test_async_clients_are_cached_per_event_loop(monkeypatch):
+    pool = ClientPool()
+    # Every loop at the same address, as when a new loop reuses the memory of a collected one
+    monkeypatch.setattr(llm_clients, "id", lambda obj: 1, raising=False)
+
+    async def lookup():
+        client = pool.async_openai("key", "http://127.0.0.1:1/v1")
+        assert pool.async_openai("key", "http://127.0.0.1:1/v1") is client
+        return client
+
+    first = asyncio.run(lookup())
+    assert asyncio.run(lookup()) is not first  # a new loop cannot reuse the old loop's connections
+    assert pool.stats()["clients_created"] == 2
+
+
+def test_extractor_reuses_one_client_for_every_request(mock_server):
+    extractor = SkillExtractor(provider="mock", base_url=mock_server.url)
+    for i in range(5):
+        extractor.extract(f"Posting {i}: experienced welder with accounting knowledge")
+
+    assert extractor.connection_stats()["clients_created"] == 1
+    assert mock_server.stats["requests"] == 5
+
+
+@pytest.mark.skipif(httpx is None, reason="httpx is not installed")
+def test_keep_alive_connections_are_reused(mock_server):
+    extractor = SkillExtractor(provider="mock", base_url=mock_server.url)
+    for i in range(5):
+        extractor.extract(f"Posting {i}: experienced welder with accounting knowledge")
+
+    stats = extractor.connection_stats()
+    assert stats["requests"] == 5
+    assert stats["tcp_connects"] == 1 and stats["connection_reuse_rate"] == pytest.approx(0.8)
@@ -0,0 +1,90 @@
+
+"""Per-posting metrics: one isolated record per posting, also under concurrency and batching, and their aggregates."""
+
+import asyncio
+import json
+
+import pytest
+
+from nlp.metrics import MetricsSink, estimate_cost
+from nlp.skill_extractor import SkillExtractor
+
+TEXTS = [f"Posting {i}: experienced welder, forklift certificate " + "and accounting knowledge " * i for i in range(8)]
+
+
+def _records(sink: MetricsSink) -> list:
+    sink.close()
+    with open(sink.path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def extractor(mock_server, tmp_path):
+    return SkillExtractor(provider="mock", base_url=mock_server.url, metrics=MetricsSink(str(tmp_path / "metrics.jsonl")))
+
+
+def test_estimate_cost():
+    assert estimate_cost("gpt-4o-mini", 1_000_000, 1_000_000) == pytest.approx(0.75)
+    assert estimate_cost("gpt-4o-mini-2024-07-18", 1_000_000, 0) == pytest.approx(0.15)  # priced as its base model
+    assert estimate_cost("gpt-4o-2024-08-06", 0, 1_000_000) == pytest.approx(10.0)
+    assert estimate_cost("some-local-model", 10, 10) is None
+
+
+def test_concurrent_postings_get_isolated_records(extractor):
+    metas = [{"job_id": f"job-{i}", "domain": "logistics" if i % 2 else "finance"} for i in range(len(TEXTS))]
+
+    asyncio.run(extractor.aextract_many(TEXTS, metas=metas))
+
+    records = {r["job_id"]: r for r in _records(extractor.metrics)}
+    assert set(records) == {m["job_id"] for m in metas}
+    for meta, text in zip(metas, TEXTS):
+        record = records[meta["job_id"]]
+        # Its own request only: the mock reports ~4 characters per prompt token
+        assert record["llm_calls"] == 1 and record["retries"] == 0
+        assert record["prompt_tokens"] == len(extractor.prompt.format(text=text)) // 4
+        assert (record["domain"], record["provider"], record["cost_usd"]) == (meta["domain"], "mock", 0.0)
+        assert not record["tokens_estimated"]
+
+    summary = extractor.metrics.summary()
+    assert summary["run"]["postings"] == summary["run"]["llm_calls"] == len(TEXTS)
+    assert {d: s["postings"] for d, s in summary["domains"].items()} == {"finance": 4, "logistics": 4}
+
+
+def test_cached_postings_record_no_call(mock_server, tmp_path):
+    sink = MetricsSink(str(tmp_path / "metrics.jsonl"))
+    extractor = SkillExtractor(provider="mock", base_url=mock_server.url, metrics=sink, cache_path=str(tmp_path / "llm.sqlite"))
+
+    extractor.extract(TEXTS[0], meta={"job_id": "first"})
+    extractor.extract(TEXTS[0], meta={"job_id": "again"})
+
+    first, again = _records(sink)
+    assert (first["llm_calls"], first["cached"]) == (1, False)
+    assert (again["llm_calls"], again["prompt_tokens"], again["cached"]) == (0, 0, True)
+
+
+def test_batched_postings_share_the_request(extractor, mock_server):
+    jobs = [{"job_id": f"job-{i}", "text": text} for i, text in enumerate(TEXTS[:4])]
+
+    extractor.extract_batch(jobs)
+
+    records = _records(extractor.metrics)
+    assert mock_server.stats["requests"] == 1
+    assert sorted(r["job_id"] for r in records) == [job["job_id"] for job in jobs]
+    assert sum(r["llm_calls"] for r in records) == pytest.approx(1, abs=0.01)
+    assert all(r["batch_size"] == 4 for r in records)
+    # Longer postings carry a larger share of the tokens
+    by_id = {r["job_id"]: r for r in records}
+    assert by_id["job-0"]["prompt_tokens"] < by_id["job-3"]["prompt_tokens"]
+
+
+def test_merge_folds_in_another_shard():
+    shard, run = MetricsSink(), MetricsSink()
+    for sink, domain in ((shard, "finance"), (run, "logistics")):
+        sink.record({"domain": domain, "llm_calls": 1, "prompt_tokens": 100, "completion_tokens": 10, "cost_usd": 0.5, "wall_ms": 20})
+
+    run.merge(shard.aggregates())
+
+    summary = run.summary()
+    assert (summary["run"]["postings"], summary["run"]["cost_usd"], summary["run"]["prompt_tokens"]) == (2, 1.0, 200)
+    assert set(summary["domains"]) == {"finance", "logistics"}
+    assert "ALL" in run.report()
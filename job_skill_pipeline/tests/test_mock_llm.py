@@ -0,0 +1,51 @@
+
+"""MockLLMServer: deterministic OpenAI-compatible answers, injected failures, and retries against them."""
+
+import asyncio
+import json
+
+import pytest
+
+from nlp.mock_llm import MockLLMServer, mock_answer, mock_skills
+from nlp.skill_extractor import SkillExtractor
+
+TEXT = "Experienced welder with a forklift certificate and accounting knowledge"
+
+
+def test_answers_are_deterministic_in_the_prompt_shape():
+    assert mock_skills(TEXT) == mock_skills(TEXT.upper())
+    assert len(mock_skills(TEXT, k=2)) == 2
+    assert set(mock_skills(TEXT)) <= {"experienced", "welder", "forklift", "certificate", "accounting", "knowledge"}
+
+    assert json.loads(mock_answer(f"Extract.\n\nText:\n{TEXT}\n\nJSON list:")) == mock_skills(TEXT)
+    batch = mock_answer(f"Extract.\n\nPostings:\n### J1\n{TEXT}\n### J2\nshort\n\nJSON object:")
+    assert json.loads(batch) == {"J1": mock_skills(TEXT), "J2": []}
+
+
+def test_extractor_against_the_mock(mock_server):
+    extractor = SkillExtractor(provider="mock", base_url=mock_server.url)
+
+    assert extractor.extract(TEXT) == asyncio.run(extractor.aextract(TEXT))
+    assert mock_server.stats == {"requests": 2, "ok": 2, "errors": 0, "rate_limited": 0, "disconnects": 0}
+
+
+def test_rate_limits_are_retried_after_retry_after():
+    with MockLLMServer(latency_ms=1, latency_sigma=0, rate_limit_rate=0.5, retry_after=0, seed=3) as server:
+        extractor = SkillExtractor(provider="mock", base_url=server.url, max_retries=10)
+        texts = [f"{TEXT} {i}" for i in range(8)]
+
+        results = asyncio.run(extractor.aextract_many(texts))
+
+    assert all(isinstance(r, list) for r in results)
+    assert server.stats["rate_limited"] > 0
+    assert server.stats["requests"] == server.stats["ok"] + server.stats["rate_limited"] == len(texts) + server.stats["rate_limited"]
+    assert extractor.limiter_stats("mock")["throttled"] == server.stats["rate_limited"]
+
+
+def test_server_errors_fail_the_posting():
+    with MockLLMServer(latency_ms=1, latency_sigma=0, error_rate=1.0) as server:
+        extractor = SkillExtractor(provider="mock", base_url=server.url, max_retries=3)
+        with pytest.raises(RuntimeError):
+            extractor.extract(TEXT)
+
+    assert server.stats["requests"] == server.stats["errors"] == 1  # a 500 is not retried
@@ -0,0 +1,121 @@
+
+"""SkillNormalizer: matches resolved to taxonomy rows, batch normalization, language blocks, top-k."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nlp.taxonomy_loader import make_skill_id
+
+
+def _first_row(taxonomy: pd.DataFrame, label: str) -> pd.Series:
+    """What the row index replaced: a scan for the first row carrying `label` in any language."""
+    hit = (taxonomy["skill_nl"] == label) | (taxonomy["skill_fr"] == label) | (taxonomy["skill_en"] == label)
+    return taxonomy[hit].iloc[0]
+
+
+def test_row_index_matches_dataframe_lookup(make_normalizer, taxonomy_df):
+    # A label shared by two rows resolves to the first one
+    taxonomy = pd.concat(
+        [taxonomy_df, pd.DataFrame([("extra", "communicatie", None, "internal communication")], columns=taxonomy_df.columns)],
+        ignore_index=True,
+    )
+    normalizer = make_normalizer(taxonomy=taxonomy, cache_dir=None)
+
+    for i, text in enumerate(normalizer.skill_texts):
+        result = normalizer._result(text, i, 1.0)
+        row = _first_row(taxonomy, text)
+        assert result["category"] == row["category"]
+        assert result["skill_id"] == make_skill_id(row["category"], row["skill_nl"], row["skill_fr"], row["skill_en"])
+
+
+def test_row_index_uses_skill_id_column(make_normalizer, taxonomy_df):
+    taxonomy = taxonomy_df.assign(skill_id=[f"id-{i}" for i in range(len(taxonomy_df))])
+    normalizer = make_normalizer(taxonomy=taxonomy, cache_dir=None)
+
+    [result] = normalizer.normalize(["welding"], language="en")
+
+    assert (result["standard_skill"], result["category"], result["skill_id"]) == ("welding", "technical", "id-7")
+
+
+JOBS = [
+    ["Python programming", "Excel", "teamwork"],
+    [],
+    ["python programming", "  Python   Programming ", "lassen", "soudage"],
+    None,
+    ["", "accounting", "TEAMWORK"],
+]
+
+
+def test_normalize_many_matches_per_job_normalize(make_normalizer):
+    normalizer = make_normalizer(cache_dir=None)
+    languages = ["en", None, "nl", "fr", "en"]
+
+    batch = normalizer.normalize_many(JOBS, languages=languages)
+
+    assert batch == [normalizer.normalize(skills, language=lang) for skills, lang in zip(JOBS, languages)]
+    assert [r["original"] for r in batch[2]][:2] == ["python programming", "  Python   Programming "]
+
+
+def test_normalize_many_encodes_each_distinct_skill_once(make_normalizer, encoder):
+    normalizer = make_normalizer(cache_dir=None, query_cache_entries=0)
+    encoder.calls = encoder.texts = 0
+
+    normalizer.normalize_many(JOBS)
+
+    distinct = {" ".join(s.split()).casefold() for skills in JOBS for s in skills or [] if s.strip()}
+    assert (encoder.calls, encoder.texts) == (1, len(distinct))
+    assert normalizer.normalize_many([[], None]) == [[], []]
+
+
+def test_language_block_restricts_matches(make_normalizer):
+    normalizer = make_normalizer(cache_dir=None)
+    fr = normalizer.language_blocks["fr"]
+
+    idx, _ = normalizer.search(normalizer.encode_queries(["communicatie", "Microsoft Excel"]), language="fr", k=3)
+
+    assert ((idx >= fr.start) & (idx < fr.stop)).all()
+    assert normalizer.skill_texts[idx[0, 0]] == "communication"
+    # Without a language the exact Dutch label wins
+    assert normalizer.normalize(["communicatie"])[0]["standard_skill"] == "communicatie"
+    assert normalizer.normalize(["communicatie"], language="fr")[0]["standard_skill"] == "communication"
+
+
+def test_language_block_falls_back_to_all_languages(make_normalizer):
+    normalizer = make_normalizer(cache_dir=None)
+    nl = normalizer.language_blocks["nl"]
+    query = normalizer.encode_queries(["welding"])
+
+    _, block_scores = normalizer.language_indexes["nl"].search(query, k=1)
+    assert block_scores[0, 0] < 0.65 + normalizer.language_margin
+
+    idx, scores = normalizer.search(query, language="nl", k=1)
+
+    assert not nl.start <= idx[0, 0] < nl.stop
+    assert (normalizer.skill_texts[idx[0, 0]], float(scores[0, 0])) == ("welding", pytest.approx(1.0))
+    assert normalizer.normalize(["welding"], language="nl")[0]["standard_skill"] == "welding"
+
+
+def test_top_k_candidates_collapse_labels_shared_by_languages(make_normalizer):
+    normalizer = make_normalizer(cache_dir=None, top_k=3)
+
+    [result] = normalizer.normalize(["Microsoft Excel"])
+
+    names = [c["standard_skill"] for c in result["candidates"]]
+    scores = [c["score"] for c in result["candidates"]]
+    assert names[0] == "Microsoft Excel" and len(set(names)) == len(names) == 3
+    assert scores == sorted(scores, reverse=True)
+    # The same label in the other two language blocks is not a runner-up
+    assert result["margin"] == pytest.approx(scores[0] - scores[1], abs=1e-3)
+
+
+def test_match_returns_margins_and_acceptance(make_normalizer):
+    normalizer = make_normalizer(cache_dir=None)
+
+    found = normalizer.match(["communicatie", "Excel"], k=2)
+
+    assert found.indices.shape == found.scores.shape == (2, 2)
+    np.testing.assert_allclose(found.margin, found.scores[:, 0] - found.scores[:, 1], rtol=1e-6)
+    assert found.accepted.tolist() == [True, False]
+    assert "candidates" not in normalizer.normalize(["communicatie"])[0]
+    assert normalizer.match([]).indices.shape == (0, 1)
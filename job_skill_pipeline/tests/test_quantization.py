@@ -0,0 +1,67 @@
+
+"""QuantizedMatrix: scores close to float32, same best match, independent of the block size."""
+
+import numpy as np
+import pytest
+
+from nlp.quantization import QuantizedMatrix, matrix_dot, matrix_rows
+
+
+def _unit_rows(rng, n, dim):
+    m = rng.standard_normal((n, dim)).astype(np.float32)
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def taxonomy():
+    rng = np.random.default_rng(0)
+    matrix = _unit_rows(rng, 1000, 64)
+    # Queries near known rows, as a skill phrase near its taxonomy label
+    targets = rng.choice(len(matrix), 200, replace=False)
+    queries = matrix[targets] + 0.3 * _unit_rows(rng, len(targets), 64)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return matrix, queries
+
+
+@pytest.mark.parametrize("precision, atol", [("float16", 2e-3), ("int8", 2e-2)])
+def test_scores_close_and_argmax_stable(taxonomy, precision, atol):
+    matrix, queries = taxonomy
+    exact = queries @ matrix.T
+    quantized = QuantizedMatrix.quantize(matrix, precision, block_rows=128)
+
+    scores = matrix_dot(queries, quantized)
+
+    assert scores.dtype == np.float32
+    np.testing.assert_allclose(scores, exact, atol=atol)
+    # Where the best row clearly wins, quantization must not change it
+    top2 = np.sort(exact, axis=1)[:, -2:]
+    clear = top2[:, 1] - top2[:, 0] > 2 * atol
+    assert clear.sum() > len(queries) // 2
+    np.testing.assert_array_equal(scores.argmax(axis=1)[clear], exact.argmax(axis=1)[clear])
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_block_size_does_not_change_scores(taxonomy, precision):
+    matrix, queries = taxonomy
+    whole = QuantizedMatrix.quantize(matrix, precision, block_rows=len(matrix)).dot(queries)
+    for block_rows in (1, 37, 4096):
+        blocked = QuantizedMatrix.quantize(matrix, precision, block_rows=block_rows).dot(queries)
+        np.testing.assert_allclose(blocked, whole, rtol=1e-6, atol=1e-6)
+
+
+def test_rows_and_getitem_match_full_matrix(taxonomy):
+    matrix, queries = taxonomy
+    quantized = QuantizedMatrix.quantize(matrix, "int8")
+
+    block = matrix_rows(quantized, slice(100, 300))
+
+    assert len(block) == 200
+    np.testing.assert_allclose(block.dot(queries), quantized.dot(queries)[:, 100:300], rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(quantized[[5, 7]], matrix[[5, 7]], atol=1e-2)
+
+
+def test_zero_row_and_unknown_precision():
+    quantized = QuantizedMatrix.quantize(np.zeros((2, 4)), "int8")
+    assert np.all(quantized.dot(np.ones((1, 4))) == 0)
+    with pytest.raises(ValueError):
+        QuantizedMatrix.quantize(np.zeros((2, 4)), "int4")
@@ -0,0 +1,69 @@
+
+"""QueryEmbeddingCache: LRU hits and bounds, persistence, and the normalizer serving repeats from it."""
+
+import numpy as np
+
+from nlp.query_cache import QueryEmbeddingCache
+
+
+def _vector(seed: int, dim: int = 8) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+
+def test_hits_and_misses():
+    cache = QueryEmbeddingCache("m")
+    cache.put("python", _vector(0))
+
+    found = cache.get_many(["python", "excel", "python"])
+
+    assert list(found) == ["python"]
+    np.testing.assert_array_equal(found["python"], _vector(0))
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (2, 1)
+
+
+def test_evicts_least_recently_used_by_entries_and_bytes():
+    cache = QueryEmbeddingCache("m", max_entries=2)
+    cache.put("a", _vector(0))
+    cache.put("b", _vector(1))
+    cache.get_many(["a"])  # "b" is now the least recently used
+    cache.put("c", _vector(2))
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+    assert cache.stats()["evictions"] == 1
+
+    entry = QueryEmbeddingCache._entry_size("a", _vector(0))
+    by_size = QueryEmbeddingCache("m", max_bytes=2 * entry)
+    for key in "abc":
+        by_size.put(key, _vector(0))
+    assert set(by_size.get_many("abc")) == {"b", "c"}
+    assert by_size.stats()["bytes"] <= 2 * entry
+
+    disabled = QueryEmbeddingCache("m", max_entries=0)
+    disabled.put("a", _vector(0))
+    assert disabled.get_many(["a"]) == {}
+
+
+def test_persist_round_trip_keeps_lru_order(tmp_path):
+    path = str(tmp_path / "queries.npz")
+    cache = QueryEmbeddingCache("m", persist_path=path)
+    for i, key in enumerate("abc"):
+        cache.put(key, _vector(i))
+    cache.get_many(["a"])
+    cache.save()
+
+    reloaded = QueryEmbeddingCache("m", max_entries=2, persist_path=path)
+    assert set(reloaded._entries) == {"c", "a"}
+    np.testing.assert_array_equal(reloaded.get_many(["a"])["a"], _vector(0))
+
+    assert QueryEmbeddingCache("other-model", persist_path=path).stats()["entries"] == 0
+
+
+def test_normalizer_encodes_repeats_once(make_normalizer, encoder):
+    normalizer = make_normalizer(cache_dir=None)
+    first = normalizer.encode_queries(["Python", "Excel", "python "])
+    encoded = encoder.texts
+
+    second = normalizer.encode_queries(["excel", "PYTHON", "SQL"])
+
+    assert encoder.texts == encoded + 1  # only "SQL" reached the encoder
+    np.testing.assert_array_equal(second[:2], first[[1, 0]])
+    assert normalizer.cache_stats()["hits"] >= 2
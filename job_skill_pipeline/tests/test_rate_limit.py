@@ -0,0 +1,92 @@
+
+"""ProviderLimiter: in-flight slots, 429 cooldowns and rate buckets."""
+
+import asyncio
+import time
+
+from nlp.rate_limit import ProviderLimiter, TokenBucket
+
+
+def test_cancel_during_cooldown_returns_slot():
+    async def scenario():
+        limiter = ProviderLimiter(max_in_flight=2)
+        await limiter.acquire()
+        await limiter.release(throttled=True, retry_after=5)
+        assert limiter.limit == 1
+
+        waiting = asyncio.ensure_future(limiter.acquire())  # holds the only slot, sleeping out the cooldown
+        await asyncio.sleep(0.05)
+        assert limiter.in_flight == 1
+        waiting.cancel()  # as HedgePolicy.acall cancels a losing request
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert limiter.in_flight == 0
+
+        limiter.cooldown_until = 0.0
+        await asyncio.wait_for(limiter.acquire(), timeout=1)
+        assert limiter.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancel_during_rate_wait_returns_slot():
+    async def scenario():
+        limiter = ProviderLimiter(max_in_flight=1, requests_per_minute=1)
+        await limiter.acquire()  # takes the bucket's only request
+        await limiter.release()
+
+        waiting = asyncio.ensure_future(limiter.acquire())  # waits ~60 s for the next one
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+
+        assert limiter.in_flight == 0
+        assert limiter.stats["requests"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_throttling_halves_the_limit_and_successes_grow_it_back():
+    async def scenario():
+        limiter = ProviderLimiter(max_in_flight=8)
+        await limiter.acquire()
+        await limiter.release(throttled=True)  # no Retry-After: exponential backoff
+        assert (limiter.limit, limiter.backoff) == (4, 2.0)
+        assert limiter.cooldown_until > 0
+
+        limiter.cooldown_until = 0.0
+        for _ in range(4):  # a run of `limit` successes adds one slot
+            await limiter.acquire()
+            await limiter.release()
+        assert (limiter.limit, limiter.backoff) == (5, 1.0)
+        assert limiter.stats == {"requests": 5, "throttled": 1, "errors": 0}
+
+    asyncio.run(scenario())
+
+
+def test_in_flight_never_exceeds_limit():
+    async def scenario():
+        limiter = ProviderLimiter(max_in_flight=3)
+        peak = 0
+
+        async def request():
+            nonlocal peak
+            await limiter.acquire()
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+            await limiter.release()
+
+        await asyncio.gather(*(request() for _ in range(20)))
+        return peak
+
+    assert asyncio.run(scenario()) == 3
+
+
+def test_token_bucket_paces_requests():
+    async def scenario():
+        bucket = TokenBucket(rate_per_minute=600, capacity=2)  # 10 per second after a burst of 2
+        start = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    assert 0.15 <= asyncio.run(scenario()) < 1.0
@@ -0,0 +1,97 @@
+
+"""Sharded runs: job assignment, the offset-ordered merge and compaction, and the reducer's shared history."""
+
+import json
+import random
+
+from nlp.text_reducer import TextReducer
+from pipeline.compact import compact
+from pipeline.json_stream import INPUT_OFFSET, JsonlWriter, iter_jsonl
+from pipeline.shards import merge_shards, shard_of, shard_path
+
+
+def _write(path, records):
+    with JsonlWriter(str(path)) as writer:
+        for record in records:
+            writer.write(record)
+    return str(path)
+
+
+def _records(n):
+    return [{"job_id": f"job-{i}", INPUT_OFFSET: 100 * (i + 1), "skills": [i]} for i in range(n)]
+
+
+def test_shard_of_is_stable_and_spread():
+    ids = [f"job-{i}" for i in range(1000)]
+    owners = [shard_of(job_id, 4) for job_id in ids]
+    assert owners == [shard_of(job_id, 4) for job_id in ids]
+    assert all(owners.count(shard) > 150 for shard in range(4))
+    assert shard_of("12345", 3) == 0  # crc32, not the per-process salted hash()
+    assert shard_path("data/out.jsonl", 1, 4) == "data/out.shard-1-of-4.jsonl"
+
+
+def test_merge_restores_input_order(tmp_path):
+    records = _records(60)
+    # Each shard writes its postings out of input order (concurrent extraction)
+    rng = random.Random(0)
+    paths = []
+    for shard in range(3):
+        own = [r for r in records if shard_of(r["job_id"], 3) == shard]
+        rng.shuffle(own)
+        paths.append(_write(tmp_path / f"out.shard-{shard}-of-3.jsonl", own))
+    paths.append(str(tmp_path / "missing.jsonl"))  # a shard that wrote nothing
+
+    merged = tmp_path / "out.jsonl"
+    assert merge_shards(paths, str(merged)) == 60
+    assert list(iter_jsonl(str(merged))) == sorted(records, key=lambda r: r[INPUT_OFFSET])
+
+
+def test_merge_keeps_rewritten_jobs_in_write_order(tmp_path):
+    first, second = _records(2)
+    retried = {**first, "skills": ["retry"]}
+    path = _write(tmp_path / "out.shard-0-of-1.jsonl", [first, second, retried])
+
+    merged = tmp_path / "out.jsonl"
+    merge_shards([path], str(merged))
+
+    assert list(iter_jsonl(str(merged))) == [first, retried, second]
+
+
+def test_compact_orders_by_offset_and_keeps_last(tmp_path):
+    records = _records(5)
+    # A resumed run appends the retried posting 1 after the others, then rewrites posting 3
+    path = _write(tmp_path / "out.jsonl", [records[0], records[2], records[3], records[4], records[1], {**records[3], "skills": ["new"]}])
+
+    out = tmp_path / "out.json"
+    assert compact(path, str(out)) == 5
+
+    with open(out, encoding="utf-8") as f:
+        compacted = json.load(f)
+    assert [r["job_id"] for r in compacted] == [f"job-{i}" for i in range(5)]
+    assert compacted[3]["skills"] == ["new"]
+    assert all(INPUT_OFFSET not in r for r in compacted)
+
+
+def test_compact_keeps_file_order_without_offsets(tmp_path):
+    path = _write(tmp_path / "out.jsonl", [{"job_id": "b"}, {"job_id": "a"}, {"job_id": "b", "v": 2}])
+    out = tmp_path / "out.json"
+    compact(path, str(out))
+    with open(out, encoding="utf-8") as f:
+        assert json.load(f) == [{"job_id": "a"}, {"job_id": "b", "v": 2}]
+
+
+def test_observe_shares_company_history():
+    intro = "Acme Solutions is a leading provider of industrial automation systems in Flanders."
+    jobs = [
+        {"company": "Acme Solutions", "profiel": f"{intro} You know PLC programming."},
+        {"company": "Acme Solutions", "profiel": f"{intro} You know SQL and Python."},
+    ]
+
+    fresh = TextReducer()
+    expected = [fresh.reduce(job).text for job in jobs]
+    resumed = TextReducer()
+    resumed.observe(jobs[0])
+
+    assert intro not in expected[1]
+    assert resumed.reduce(jobs[1]).text == expected[1]
+    assert resumed.stats["postings"] == 1
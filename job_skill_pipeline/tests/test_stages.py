@@ -0,0 +1,47 @@
+
+"""ReorderBuffer: items come out in sequence order, and the producer stays within the window."""
+
+import random
+import threading
+import time
+
+from pipeline.stages import ReorderBuffer, StageStats
+
+
+def test_releases_in_sequence_order():
+    reorder = ReorderBuffer(window=10)
+    order = list(range(50))
+    random.Random(0).shuffle(order)
+
+    released = [item for seq in order for item in reorder.add(seq, f"item-{seq}")]
+
+    assert released == [f"item-{seq}" for seq in range(50)]
+
+
+def test_window_blocks_producer_until_oldest_done():
+    reorder = ReorderBuffer(window=2)
+    stats, stop = StageStats("reader"), threading.Event()
+    assert reorder.wait_window(0, stats, stop) and reorder.wait_window(1, stats, stop)
+
+    admitted = threading.Event()
+    producer = threading.Thread(target=lambda: reorder.wait_window(2, stats, stop) and admitted.set())
+    producer.start()
+    reorder.add(1, "b")  # out of order: 0 is still missing
+    assert not admitted.wait(0.3)
+
+    assert reorder.add(0, "a") == ["a", "b"]
+    assert admitted.wait(2)
+    producer.join()
+    assert stats.blocked >= 0.3
+
+
+def test_stop_releases_waiting_producer():
+    reorder = ReorderBuffer(window=1)
+    stats, stop = StageStats("reader"), threading.Event()
+    result = []
+    producer = threading.Thread(target=lambda: result.append(reorder.wait_window(1, stats, stop)))
+    producer.start()
+    time.sleep(0.1)
+    stop.set()
+    producer.join(2)
+    assert result == [False]
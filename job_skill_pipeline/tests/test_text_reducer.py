@@ -0,0 +1,73 @@
+
+"""TextReducer: skill sections only, boilerplate and repeats dropped, cut at the token budget."""
+
+from nlp.rate_limit import estimate_tokens
+from nlp.text_reducer import TextReducer, clean_company
+
+COMPANY_SENTENCE = "Acme Logistics is a family business with over fifty years of experience in transport."
+
+
+def _job(**fields):
+    return {"company": "Acme Logistics Meer info over dit bedrijf", **fields}
+
+
+def test_keeps_skill_sections_without_boilerplate():
+    job = _job(
+        profiel="Je hebt ervaring met lassen. Solliciteer nu Je hebt een rijbewijs B.",
+        functieomschrijving="Je bedient een heftruck. Je hebt ervaring met lassen.",
+        full_description="Ga naar de inhoud Cookies " + "Lange bedrijfsvoorstelling. " * 50,
+    )
+
+    reduced = TextReducer().reduce(job)
+
+    assert reduced.sections == ["profiel", "functieomschrijving"]
+    assert reduced.text == "Je hebt ervaring met lassen. Je hebt een rijbewijs B.\n\nJe bedient een heftruck."
+    assert reduced.dropped_sentences == 1  # the repeated 'lassen' sentence
+    assert reduced.tokens_before == estimate_tokens(job["full_description"]) > reduced.tokens_after
+
+
+def test_falls_back_to_the_posting_part_of_the_page():
+    page = "Vind een job Log in Solliciteer nu Bewaard Bewaar Je werkt met SAP. Je spreekt Frans. Aanbod Een vast contract."
+
+    reduced = TextReducer().reduce(_job(full_description=page))
+
+    assert (reduced.sections, reduced.text) == (["full_description"], "Je werkt met SAP. Je spreekt Frans.")
+
+
+def test_company_presentation_is_sent_once_per_company():
+    reducer = TextReducer()
+    job = _job(profiel=f"{COMPANY_SENTENCE} Je bent een ervaren chauffeur.")
+
+    assert COMPANY_SENTENCE in reducer.reduce(job).text
+    second = reducer.reduce(_job(profiel=f"{COMPANY_SENTENCE} Je kan plannen."))
+    assert second.text == "Je kan plannen."
+    # Another company's posting still gets its own presentation
+    other = reducer.reduce(dict(job, company="Other NV"))
+    assert COMPANY_SENTENCE in other.text
+
+
+def test_observe_primes_company_history_without_counting():
+    reducer = TextReducer()
+    reducer.observe(_job(profiel=COMPANY_SENTENCE))
+
+    assert reducer.stats["postings"] == 0
+    assert reducer.reduce(_job(profiel=f"{COMPANY_SENTENCE} Je kan plannen.")).text == "Je kan plannen."
+
+
+def test_cuts_at_a_sentence_boundary_within_the_budget():
+    sentences = [f"Zin nummer {i} beschrijft een vaardigheid." for i in range(40)]
+    reducer = TextReducer(max_tokens=50)
+
+    reduced = reducer.reduce(_job(profiel=" ".join(sentences)))
+
+    assert reduced.truncated and reduced.tokens_after <= 50
+    assert reduced.text == " ".join(sentences[:len(reduced.text.split(". "))])
+    assert reducer.stats["truncated"] == 1
+
+    long_sentence = reducer.reduce(_job(profiel="lassen " * 200))
+    assert long_sentence.text and long_sentence.tokens_after <= 50
+
+
+def test_clean_company():
+    assert clean_company("Acme Logistics  Meer info over dit bedrijf Bedrijfswebsite acme.be") == "Acme Logistics"
+    assert clean_company(None) == ""